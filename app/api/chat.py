@@ -1,25 +1,55 @@
 # app/routers/chat.py
+import asyncio
 import json
 import re
 import uuid
-from typing import AsyncGenerator, Dict, List, Optional, Any
+from contextlib import aclosing, suppress
+from typing import AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple
 
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
+from app.core import metrics
+from app.core.exceptions import ClientDisconnectedError
 from app.core.logger import logger
+from app.database.message_queue import message_queue
 from app.database.supabase_client import SupabaseManager
 from app.llm import gemini_integration
-from app.llm.prompts import CS_TUTOR_PROMPT, GENERAL_PROMPT, VISUALIZATION_PROMPT
+from app.llm.gemini_integration import STREAM_ERROR_TEXT
+from app.llm.prompts import (
+    CS_TUTOR_PROMPT,
+    GENERAL_PROMPT,
+    LEETCODE_SOLUTION_PROMPT,
+    LEETCODE_VISUALIZATION_ADDENDUM,
+    VISUALIZATION_PROMPT,
+)
+from app.llm.semantic_cache import cacheable_question, get_semantic_cache, semantic_namespace
+from app.llm.solution_cache import get_solution, replay_chunks, solution_key, store_solution
 from app.memory.chat_memory import ChatMemory, ChatSession
+from app.memory.context_window import estimate_tokens, split_context
+from app.memory.session_store import build_session_store
+from app.memory.summarizer import RollingSummarizer, summary_message
 from app.schemas.chat_schemas import ChatRequest
 from app.scrapers.leetcode_scraper import scrape_leetcode_question
 from app.core.config import settings
 import time
 from collections import defaultdict
+from dataclasses import asdict, dataclass, field
 
 router = APIRouter()
-chat_memory = ChatMemory()
+chat_memory = ChatMemory(
+    store=build_session_store(
+        settings.SESSION_STORE_BACKEND,
+        max_sessions=settings.CHAT_MEMORY_MAX_SESSIONS,
+        max_bytes=settings.CHAT_MEMORY_MAX_BYTES,
+        ttl=settings.CHAT_SESSION_TTL,
+        path=settings.SESSION_STORE_PATH,
+    ),
+    sweep_interval=settings.CHAT_MEMORY_SWEEP_INTERVAL,
+)
+metrics.register("chat_memory", chat_memory.stats)
+summarizer = RollingSummarizer(gemini_integration.summarize_conversation, min_messages=settings.SUMMARY_MIN_MESSAGES)
+metrics.register("summarizer", summarizer.stats)
 
 # Rate limiting state
 in_memory_rate_limit = defaultdict(list)
@@ -50,18 +80,180 @@ def check_rate_limit(ip: str):
     
     in_memory_rate_limit[ip].append(now)
 
-async def stream_response(
-    user_input: str,
-    session_id: str,
-    chat_session: ChatSession,
-    chat_history: List[Dict[str, str]],
-    persist: bool = True,
-) -> AsyncGenerator[str, None]:
+@dataclass
+class TurnContext:
+    """Per-request data derived once in chat_endpoint and shared with stream_response."""
+
+    user_input: str
+    session_id: str
+    chat_history: List[Dict[str, str]] = field(default_factory=list)
+    persist: bool = True
+    intent: Optional[str] = None
+    # Request.is_disconnected, polled while waiting on the model; None disables the check
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    # Model output relayed to the client so far, kept for the disconnect policy
+    streamed: List[str] = field(default_factory=list)
+
+    async def get_intent(self) -> str:
+        """Classify the user input at most once per turn."""
+        if self.intent is None:
+            self.intent = await gemini_integration.classify_intent_with_llm(self.user_input)
+        return self.intent
+
+
+@dataclass
+class StreamDisconnects:
+    """Counts of answers cut short because the client went away."""
+
+    detected: int = 0  # Noticed by polling while waiting on the model
+    closed: int = 0  # The server cancelled or closed the response (e.g. a write to the client failed)
+    upstream_cancelled: int = 0  # Pending model reads cancelled
+    persisted: int = 0  # Partial answers kept under STREAM_DISCONNECT_POLICY=persist
+    discarded: int = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Disconnect policy and counters for the metrics endpoint."""
+        return {"policy": settings.STREAM_DISCONNECT_POLICY, **asdict(self)}
+
+
+stream_disconnects = StreamDisconnects()
+metrics.register("stream_disconnects", stream_disconnects.stats)
+
+
+async def _wait_for_disconnect(is_disconnected: Callable[[], Awaitable[bool]]) -> None:
+    """Return once the client has gone; if the check itself fails, keep streaming and never return."""
+    try:
+        while not await is_disconnected():
+            await asyncio.sleep(settings.STREAM_DISCONNECT_POLL_INTERVAL)
+    except Exception as e:
+        logger.warning(f"Disconnect check failed; no longer watching this response: {e}")
+        await asyncio.Event().wait()
+
+
+async def _relay(turn: TurnContext, chunks: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Yield model chunks until the stream ends or the client disconnects.
+
+    Each chunk is recorded in `turn.streamed`. While waiting for the next chunk the client
+    connection is polled; once it is gone the pending read is cancelled, which stops the
+    upstream stream, and ClientDisconnectedError is raised.
+    """
+    iterator = chunks.__aiter__()
+    watcher = asyncio.create_task(_wait_for_disconnect(turn.is_disconnected)) if turn.is_disconnected else None
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if watcher is None:
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+            else:
+                pending = asyncio.ensure_future(iterator.__anext__())
+                await asyncio.wait((pending, watcher), return_when=asyncio.FIRST_COMPLETED)
+                if not pending.done():
+                    raise ClientDisconnectedError()
+                try:
+                    chunk = pending.result()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    pending = None
+            turn.streamed.append(chunk)
+            yield chunk
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        if pending is not None and not pending.done():
+            # The upstream generator is running in `pending`; cancelling it unwinds the model stream.
+            # Wait for that to finish so the generator is idle before it is closed
+            pending.cancel()
+            stream_disconnects.upstream_cancelled += 1
+            with suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+def _record_interrupted(turn: TurnContext, chat_session: ChatSession, detected: bool) -> None:
+    """Count an answer cut short by a disconnect and keep or drop its partial text by policy.
+
+    Runs synchronously so it also completes while the response task is being cancelled.
+    """
+    if detected:
+        stream_disconnects.detected += 1
+    else:
+        stream_disconnects.closed += 1
+    partial = "".join(turn.streamed)
+    if not partial:
+        return
+    if settings.STREAM_DISCONNECT_POLICY != "persist":
+        stream_disconnects.discarded += 1
+        return
+    stream_disconnects.persisted += 1
+    chat_session.add_message("bot", partial)
+    if turn.persist:
+        message_queue.enqueue(
+            session_id=turn.session_id,
+            sender_type="bot",
+            content=partial,
+            intent=turn.intent,
+            metadata={"response_type": "interrupted", "interrupted": True},
+        )
+
+
+def _split_visualization(full_llm_output: str, session_id: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Separate the visualization JSON block from a solution answer.
+
+    Returns the answer text without the block and the parsed visualization, or the
+    unchanged output and None when there is no valid `visualizationType` JSON.
+    """
+    logger.info(
+        f"[Session: {session_id}] Attempting to extract visualization JSON from LLM output."
+    )
+    json_match = re.search(
+        r"```json\s*([\s\S]*?)\s*```|(?<!`)(\{\s*\"visualizationType\".*?\})(?!`)|(?<!`)(\[\s*\{.*?\}\s*\])(?!`)",
+        full_llm_output,
+        re.DOTALL | re.IGNORECASE,
+    )
+    if not json_match:
+        logger.info(f"[Session: {session_id}] No visualization JSON block found in the LLM output.")
+        return full_llm_output, None
+
+    json_str = next((g for g in json_match.groups() if g is not None), None)
+    if not json_str:
+        logger.info(f"[Session: {session_id}] Regex matched, but no JSON content found in groups.")
+        return full_llm_output, None
+    try:
+        visualization_json = json.loads(json_str.strip())
+    except json.JSONDecodeError as e:
+        logger.warning(
+            f"[Session: {session_id}] Failed to parse extracted JSON: {e}. "
+            f"JSON string: {json_str[:200]}..."
+        )
+        return full_llm_output, None
+    if isinstance(visualization_json, dict) and "visualizationType" in visualization_json:
+        logger.info(
+            f"[Session: {session_id}] Successfully extracted and parsed visualization JSON."
+        )
+        return full_llm_output.replace(json_match.group(0), "").strip(), visualization_json
+    logger.warning(
+        f"[Session: {session_id}] Extracted JSON is invalid or missing "
+        f"'visualizationType'. JSON: {json_str[:200]}..."
+    )
+    return full_llm_output, None
+
+
+async def stream_response(turn: TurnContext, chat_session: ChatSession) -> AsyncGenerator[str, None]:
     """Generate streaming response as SSE events, handling LeetCode scraping,
     solution generation, visualization requests, and regular chat flow.
     Yields JSON strings formatted for Server-Sent Events.
     """
+    user_input = turn.user_input
+    session_id = turn.session_id
+    chat_history = turn.chat_history
+    persist = turn.persist
     logger.info(f"[Session: {session_id}] Processing input: '{user_input[:80]}...'")
+    closed = False
 
     try:
         # --- State Handling: Responding after LeetCode detected & language requested ---
@@ -78,7 +270,7 @@ async def stream_response(
                 # Keep awaiting language state, don't clear it
                 chat_session.add_message("bot", response) # Log bot asking again
                 if persist:
-                    await SupabaseManager.store_message(
+                    message_queue.enqueue(
                         session_id=session_id, sender_type="bot", content=response, intent="cs_tutor", metadata={"response_type": "clarification_retry"}
                     )
                 return # Stop processing this turn
@@ -93,7 +285,7 @@ async def stream_response(
                 chat_session.set_state("request_visualization", False)
                 chat_session.add_message("bot", response)
                 if persist:
-                    await SupabaseManager.store_message(
+                    message_queue.enqueue(
                         session_id=session_id, sender_type="bot", content=response, intent="error", metadata={"response_type": "state_error"}
                     )
                 return # Stop processing
@@ -101,87 +293,53 @@ async def stream_response(
             # --- Generate LeetCode Solution ---
             logger.info(f"[Session: {session_id}] Generating LeetCode solution in '{language}'. Visualization requested: {request_visualization}")
 
-            # Construct the prompt for the LLM, using the CS Tutor guidelines
-            prompt_for_llm = (
-                f"Here is the LeetCode problem description:\n\n"
-                f"```\n{scraped_question}\n```\n\n"
-                f"Please provide a comprehensive, step-by-step explanation and solution for this problem in the **{language}** programming language. "
-                f"Adhere strictly to the following CS Tutor response structure:\n"
-                f"1.  **Problem Refresher:** Briefly restate the goal.\n"
-                f"2.  **Initial Thoughts / Brute Force (If Applicable):** Explain the simplest approach, its logic, and complexity.\n"
-                f"3.  **Optimized Approach(es):** Describe the core idea (e.g., DP, two pointers, sliding window, greedy), explain the logic step-by-step, provide clean, well-commented **{language}** code, and analyze Time and Space Complexity.\n"
-                f"4.  **Edge Cases/Considerations:** Mention any important edge cases or constraints.\n\n"
-                f"Ensure the code is correct, runnable, and follows {language} best practices."
+            # The answer depends only on the problem, language, visualization flag and prompt version
+            cache_key = solution_key(
+                scraped_question.get("slug") if isinstance(scraped_question, dict) else None,
+                language,
+                request_visualization,
             )
+            cached_solution = await get_solution(cache_key)
+
+            if cached_solution:
+                logger.info(f"[Session: {session_id}] Solution cache hit for '{cache_key}'; replaying.")
+                bot_response_text_part = cached_solution["text"]
+                visualization_json = cached_solution.get("visualization")
+                for piece in replay_chunks(bot_response_text_part):
+                    yield f"data: {json.dumps({'type': 'text', 'content': piece})}\n\n"
+                if visualization_json:
+                    yield f"data: {json.dumps({'type': 'visualization', 'data': visualization_json})}\n\n"
+            else:
+                # Construct the prompt for the LLM, using the CS Tutor guidelines
+                prompt_for_llm = LEETCODE_SOLUTION_PROMPT.format(question=scraped_question, language=language)
+
+                # Append visualization request to prompt if needed
+                if request_visualization:
+                    prompt_for_llm += LEETCODE_VISUALIZATION_ADDENDUM
+                    logger.info(f"[Session: {session_id}] Visualization request added to LLM prompt.")
+
+                full_llm_output = ""
+
+                # Stream the response using CS_TUTOR_PROMPT
+                # History is not passed here; the prompt is self-contained for the solution generation task.
+                async with aclosing(_relay(turn, gemini_integration.stream_chat_response(
+                    user_query=prompt_for_llm, system_prompt=CS_TUTOR_PROMPT, chat_history=[]
+                ))) as chunks:
+                    async for chunk in chunks:
+                        full_llm_output += chunk
+                        # Stream text chunks directly to the frontend
+                        yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
 
-            # Append visualization request to prompt if needed
-            if request_visualization:
-                 prompt_for_llm += (
-                     "\n\n**Additionally:** Based on the optimal algorithm discussed, generate the necessary JSON data to visualize its key steps or the primary data structure involved (e.g., array states, DP table build-up, tree/graph traversal). "
-                     "Output this JSON *after* the textual explanation, enclosed in ```json ... ``` blocks. Use one of the standard visualization types (sorting, tree, graph, array, matrix, table, etc.) as defined previously."
-                 )
-                 logger.info(f"[Session: {session_id}] Visualization request added to LLM prompt.")
-
-            bot_response_text_part = ""
-            visualization_json = None
-            full_llm_output = ""
-
-            # Stream the response using CS_TUTOR_PROMPT
-            # History is not passed here; the prompt is self-contained for the solution generation task.
-            async for chunk in gemini_integration.stream_chat_response(
-                user_query=prompt_for_llm, system_prompt=CS_TUTOR_PROMPT, chat_history=[]
-            ):
-                full_llm_output += chunk
-                # Stream text chunks directly to the frontend
-                yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
-
-            # --- Post-Streaming Processing for Visualization ---
-            if request_visualization:
-                logger.info(
-                    f"[Session: {session_id}] Attempting to extract visualization JSON from LLM output."
-                )
-                json_match = re.search(
-                    r"```json\s*([\s\S]*?)\s*```|(?<!`)(\{\s*\"visualizationType\".*?\})(?!`)|(?<!`)(\[\s*\{.*?\}\s*\])(?!`)",
-                    full_llm_output,
-                    re.DOTALL | re.IGNORECASE,
-                )
-
-                if json_match:
-                    json_str = next((g for g in json_match.groups() if g is not None), None)
-
-                    if json_str:
-                        try:
-                            visualization_json = json.loads(json_str.strip())
-                            if isinstance(visualization_json, dict) and "visualizationType" in visualization_json:
-                                bot_response_text_part = full_llm_output.replace(
-                                    json_match.group(0), ""
-                                ).strip()
-                                logger.info(
-                                    f"[Session: {session_id}] Successfully extracted and parsed visualization JSON."
-                                )
-                                yield f"data: {json.dumps({'type': 'visualization', 'data': visualization_json})}\n\n"
-                            else:
-                                logger.warning(
-                                    f"[Session: {session_id}] Extracted JSON is invalid or missing "
-                                    f"'visualizationType'. JSON: {json_str[:200]}..."
-                                )
-                                bot_response_text_part = full_llm_output
-                                visualization_json = None
-                        except json.JSONDecodeError as e:
-                            logger.warning(
-                                f"[Session: {session_id}] Failed to parse extracted JSON: {e}. "
-                                f"JSON string: {json_str[:200]}..."
-                            )
-                            bot_response_text_part = full_llm_output
-                            visualization_json = None
-                    else:
-                        logger.info("[Session: {session_id}] Regex matched, but no JSON content found in groups.")
-                        bot_response_text_part = full_llm_output
+                # --- Post-Streaming Processing for Visualization ---
+                if request_visualization:
+                    bot_response_text_part, visualization_json = _split_visualization(full_llm_output, session_id)
+                    if visualization_json:
+                        yield f"data: {json.dumps({'type': 'visualization', 'data': visualization_json})}\n\n"
                 else:
-                    logger.info(f"[Session: {session_id}] No visualization JSON block found in the LLM output.")
-                    bot_response_text_part = full_llm_output
-            else:
-                bot_response_text_part = full_llm_output
+                    bot_response_text_part, visualization_json = full_llm_output, None
+
+                if full_llm_output and not full_llm_output.endswith(STREAM_ERROR_TEXT):
+                    await store_solution(cache_key, bot_response_text_part, visualization_json)
 
             # --- Clean up state and store results ---
             chat_session.set_state("awaiting_language", False)
@@ -191,19 +349,22 @@ async def stream_response(
             # Store the final response (text part)
             chat_session.add_message("bot", bot_response_text_part)
             if persist:
-                await SupabaseManager.store_message(
+                message_queue.enqueue(
                     session_id=session_id,
                     sender_type="bot",
                     content=bot_response_text_part,
                     intent="cs_tutor", # Mark intent as cs_tutor
                     visualization_data=visualization_json, # Store extracted JSON if any
-                    metadata={"response_type": "LLM_solution", "language": language, "visualization_provided": bool(visualization_json)}
+                    metadata={
+                        "response_type": "LLM_solution", "language": language,
+                        "visualization_provided": bool(visualization_json), "cached": bool(cached_solution),
+                    }
                 )
             logger.info(f"[Session: {session_id}] Finished streaming LeetCode solution.")
 
         # --- Regular Chat Logic / Initial LeetCode Detection ---
         else:
-            initial_intent = await gemini_integration.classify_intent_with_llm(user_input)
+            initial_intent = await turn.get_intent()
             # Check if the user explicitly asked for visualization in *this* turn
             request_visualization_this_turn = (initial_intent == "visualization")
 
@@ -231,7 +392,7 @@ async def stream_response(
                 yield f"data: {json.dumps({'type': 'text', 'content': response})}\n\n"
                 chat_session.add_message("bot", response) # Add bot's question to history
                 if persist:
-                    await SupabaseManager.store_message(
+                    message_queue.enqueue(
                         session_id=session_id,
                         sender_type="bot",
                         content=response,
@@ -245,6 +406,7 @@ async def stream_response(
                 logger.info(f"[Session: {session_id}] Not identified as LeetCode or scrape failed. Proceeding with intent: '{initial_intent}'")
                 bot_response_text = ""
                 vis_data = None
+                cached = False
                 system_prompt = GENERAL_PROMPT # Default prompt
 
                 # --- Handle Visualization Intent (Non-LeetCode) ---
@@ -269,11 +431,25 @@ async def stream_response(
                 elif initial_intent == "cs_tutor":
                      system_prompt = CS_TUTOR_PROMPT
                      logger.info(f"[Session: {session_id}] Handling CS Tutor query (non-LeetCode): '{user_input[:80]}...'")
-                     async for chunk in gemini_integration.stream_chat_response(
-                         user_input, system_prompt, chat_history
-                     ):
-                         bot_response_text += chunk
-                         yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
+                     # Self-contained conceptual questions are answered from earlier answers to the same question
+                     use_semantic_cache = cacheable_question(user_input, chat_history)
+                     namespace = semantic_namespace(settings.GEMINI_MODEL, system_prompt)
+                     cached_answer = get_semantic_cache().lookup(namespace, user_input) if use_semantic_cache else None
+                     if cached_answer:
+                         logger.info(f"[Session: {session_id}] Serving CS Tutor answer from the semantic cache.")
+                         cached = True
+                         for chunk in replay_chunks(cached_answer):
+                             bot_response_text += chunk
+                             yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
+                     else:
+                         async with aclosing(_relay(turn, gemini_integration.stream_chat_response(
+                             user_input, system_prompt, chat_history
+                         ))) as chunks:
+                             async for chunk in chunks:
+                                 bot_response_text += chunk
+                                 yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
+                         if use_semantic_cache and bot_response_text and not bot_response_text.endswith(STREAM_ERROR_TEXT):
+                             get_semantic_cache().store(namespace, user_input, bot_response_text)
 
                 # --- Handle RAG Intent (Placeholder) ---
                 # elif initial_intent == "rag":
@@ -287,26 +463,36 @@ async def stream_response(
                 else: # General intent
                     logger.info(f"[Session: {session_id}] Handling general query: '{user_input[:80]}...'")
                     system_prompt = GENERAL_PROMPT
-                    async for chunk in gemini_integration.stream_chat_response(
+                    async with aclosing(_relay(turn, gemini_integration.stream_chat_response(
                         user_input, system_prompt, chat_history
-                    ):
-                        bot_response_text += chunk
-                        yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
+                    ))) as chunks:
+                        async for chunk in chunks:
+                            bot_response_text += chunk
+                            yield f"data: {json.dumps({'type': 'text', 'content': chunk})}\n\n"
 
                 # --- Store Final Bot Response (Non-LeetCode Flow) ---
                 if bot_response_text: # Avoid storing empty messages
                     chat_session.add_message("bot", bot_response_text)
                     if persist:
-                        await SupabaseManager.store_message(
+                        message_queue.enqueue(
                             session_id=session_id,
                             sender_type="bot",
                             content=bot_response_text,
                             intent=initial_intent,
                             visualization_data=vis_data, # Store vis_data if generated
-                            metadata={"response_type": "LLM_general"} # More specific metadata
+                            metadata={"response_type": "LLM_general", "cached": cached} # More specific metadata
                         )
         logger.info(f"[Session: {session_id}] Finished processing stream.")
 
+    except ClientDisconnectedError:
+        logger.info(f"[Session: {session_id}] Client disconnected; stopped the model stream.")
+        _record_interrupted(turn, chat_session, detected=True)
+    except (asyncio.CancelledError, GeneratorExit):
+        # The server tore the response down (client gone); nothing more can be sent
+        logger.info(f"[Session: {session_id}] Response closed before the answer finished.")
+        closed = True
+        _record_interrupted(turn, chat_session, detected=False)
+        raise
     except Exception as e:
         logger.error(f"[Session: {session_id}] Unhandled exception in stream_response: {e}", exc_info=True)
         error_message = "An unexpected error occurred while processing your request. Please try again."
@@ -315,12 +501,23 @@ async def stream_response(
             # Also store the error message
             chat_session.add_message("bot", f"Error: {error_message}")
             if persist:
-                await SupabaseManager.store_message(
+                message_queue.enqueue(
                     session_id=session_id, sender_type="bot", content=f"Internal Error: {e}",
                     intent="error", metadata={"response_type": "exception"}
                 )
         except Exception as yield_err:
             logger.error(f"[Session: {session_id}] Failed to yield error message to client: {yield_err}")
+    finally:
+        # Hand the session back so a shared store sees this turn's history and state. A cancelled
+        # response would be cancelled again at the next await, so that path writes synchronously
+        if closed:
+            chat_memory.save_session(chat_session)
+        else:
+            await chat_memory.asave_session(chat_session)
+        if settings.SUMMARY_ENABLED:
+            # Fold messages that left the history window (or the token budget) into the running summary,
+            # off the response path
+            summarizer.schedule(chat_session, chat_memory.aupdate_session)
 
 
 # --- API Endpoints ---
@@ -378,7 +575,7 @@ async def chat_endpoint(chat_request: ChatRequest, request: Request):
         raise HTTPException(status_code=400, detail="Invalid X-Session-ID format. Please provide a valid UUID.")
 
     # --- Get/Create Chat Session & History ---
-    chat_session = chat_memory.get_session(session_id)
+    chat_session = await chat_memory.aget_session(session_id, max_history_length=settings.CHAT_HISTORY_MAX_MESSAGES)
     
     # --- Determine if Guest (ephemeral) or Authenticated (persistent) ---
     auth_header = request.headers.get("Authorization")
@@ -391,8 +588,32 @@ async def chat_endpoint(chat_request: ChatRequest, request: Request):
         check_rate_limit(client_ip)
         logger.info(f"[Session: {session_id}] Guest request from IP: {client_ip}")
     
-    # Get a reasonable amount of history for context, limit token usage later if needed
-    chat_history = chat_session.get_history() # Get last 10 turns (user+bot)
+    # Running summary of older turns first, then recent history that fits the rest of the token budget
+    summary = summary_message(chat_session)
+    budget = settings.CONTEXT_TOKEN_BUDGET
+    if summary:
+        budget -= estimate_tokens(summary["content"])
+    chat_history, excluded = split_context(
+        chat_session.get_history(),
+        budget,
+        elide_over_tokens=settings.CONTEXT_ELIDE_TOKENS,
+    )
+    if excluded and settings.SUMMARY_ENABLED:
+        # Messages the budget leaves out are folded into the summary instead of silently dropped
+        chat_session.evict(excluded)
+    if summary:
+        chat_history.insert(0, summary)
+
+    turn = TurnContext(
+        user_input=user_input,
+        session_id=session_id,
+        chat_history=chat_history,
+        persist=persist,
+        is_disconnected=request.is_disconnected,
+    )
+    if chat_session.get_state("awaiting_language"):
+        # The user is answering our language question; no classification needed this turn
+        turn.intent = "cs_tutor"
 
     # --- Store User Message ---
     # Add to in-memory history first (always)
@@ -400,13 +621,12 @@ async def chat_endpoint(chat_request: ChatRequest, request: Request):
     
     # Only interact with DB for authenticated users
     if persist:
-        # Log initial intent guess for the user message to DB
-        initial_intent_for_logging = await gemini_integration.classify_intent_with_llm(user_input)
+        # Classify once; stream_response reuses the result from the turn context
         await SupabaseManager.store_message(
             session_id=session_id,
             sender_type="user",
             content=user_input,
-            intent=initial_intent_for_logging, # Store initial guess based on input
+            intent=await turn.get_intent(), # Store intent classified for this turn
             visualization_data=None,
             metadata={"from_frontend": True}
         )
@@ -433,7 +653,7 @@ async def chat_endpoint(chat_request: ChatRequest, request: Request):
 
     # --- Return Streaming Response ---
     return StreamingResponse(
-        stream_response(user_input, session_id, chat_session, chat_history, persist=persist),
+        stream_response(turn, chat_session),
         media_type="text/event-stream",
         headers={
             'Cache-Control': 'no-cache',
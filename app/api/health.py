@@ -1,6 +1,8 @@
 # Health check endpoint
 from fastapi import APIRouter
 
+from app.core import metrics
+
 router = APIRouter()
 
 
@@ -8,3 +10,9 @@ router = APIRouter()
 async def health_check():
     """Returns the health status of the service."""
     return {"status": "OK"}
+
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Return in-process counters (queues, caches, streams) for this worker."""
+    return metrics.snapshot()
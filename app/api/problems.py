@@ -0,0 +1,18 @@
+# LeetCode problem lookup endpoints
+from fastapi import APIRouter, HTTPException, Query
+
+from app.scrapers import leetcode_scraper
+
+router = APIRouter()
+
+
+@router.get("/problems/search")
+async def search_problems(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Ranked problem suggestions for a (possibly misspelled) title or problem number, for autocomplete."""
+    catalog = await leetcode_scraper.get_problem_catalog()
+    if catalog is None:
+        raise HTTPException(status_code=503, detail="Problem list is not available yet.")
+    return {"query": q, "results": catalog.search(q, limit=limit)}
@@ -0,0 +1,383 @@
+# Pluggable key/value caches with LRU + TTL eviction
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.logger import logger
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate payload size in bytes (UTF-8 / JSON encoded)."""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+# (value, seconds until it expires or None if it never does)
+Entry = Tuple[Any, Optional[float]]
+
+
+class CacheBackend:
+    """Common interface and hit/miss accounting for all cache backends.
+
+    Values must be JSON-serializable so every backend can store them. Async code should
+    use `aget`/`aset`, which keep disk I/O off the event loop.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expiry."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Entry]:
+        """Return `(value, remaining ttl)`, or None on a miss or expiry."""
+        entry = self._get_entry(key)
+        self._count_lookup(entry)
+        return entry
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async `get`; backends that touch disk do so in the default executor."""
+        entry = await self.aget_entry(key)
+        return entry[0] if entry is not None else None
+
+    async def aget_entry(self, key: str) -> Optional[Entry]:
+        """Async `get_entry`. In-memory backends answer inline."""
+        return self.get_entry(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Async `set`. In-memory backends store inline."""
+        self.set(key, value, ttl)
+
+    def _count_lookup(self, entry: Optional[Entry]) -> None:
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; `ttl` overrides the backend default (seconds)."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _get_entry(self, key: str) -> Optional[Entry]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache bounded by entry count and total bytes, with per-entry TTL."""
+
+    def __init__(self, name: str, max_entries: int = 1000, max_bytes: int = 0, ttl: Optional[float] = None):
+        super().__init__(name)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 disables the byte limit
+        self.ttl = ttl
+        self.total_bytes = 0
+        # key -> (value, expires_at, size)
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+
+    def _get_entry(self, key: str) -> Optional[Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        now = time.monotonic()
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return value, (expires_at - now if expires_at is not None else None)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least-recently-used entries to stay within bounds."""
+        ttl = self.ttl if ttl is None else ttl
+        size = _sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # Never cache something larger than the whole budget
+        if key in self._data:
+            self._remove(key)
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at, size)
+        self.total_bytes += size
+        while self._data and (
+            len(self._data) > self.max_entries or (self.max_bytes and self.total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+        self.total_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._data.pop(key)
+        self.total_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current byte usage."""
+        stats = super().stats()
+        stats["bytes"] = self.total_bytes
+        return stats
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache shared by every worker process on the host.
+
+    Uses a WAL-mode SQLite file so concurrent uvicorn workers can read while one writes.
+    Eviction is LRU by last access time once `max_entries` or `max_bytes` (0 disables it)
+    is exceeded. `aget`/`aset` run the blocking SQLite calls in the default executor.
+    """
+
+    def __init__(
+        self, name: str, path: str, max_entries: int = 10000, ttl: Optional[float] = None, max_bytes: int = 0
+    ):
+        super().__init__(name)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL, "
+            "size INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        if "size" not in columns:  # Files written before the byte budget existed
+            self._conn.execute("ALTER TABLE cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE cache SET size = length(CAST(value AS BLOB))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def _get_entry(self, key: str) -> Optional[Entry]:
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if row[1] is not None and row[1] <= now:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0]), (row[1] - now if row[1] is not None else None)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache '{self.name}' read failed: {e}")
+            return None
+
+    async def aget_entry(self, key: str) -> Optional[Entry]:
+        """Look the key up in the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_entry, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store the value from the default executor."""
+        await asyncio.get_running_loop().run_in_executor(None, self.set, key, value, ttl)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value and trim the table back to `max_entries` and `max_bytes`."""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            payload = json.dumps(value)
+            size = len(payload.encode("utf-8"))
+            if self.max_bytes and size > self.max_bytes:
+                return  # Never cache something larger than the whole budget
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, now + ttl if ttl else None, now, size),
+                )
+                self._trim()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"SQLite cache '{self.name}' write failed: {e}")
+
+    def _trim(self) -> None:
+        """Delete least recently used rows until both bounds hold. Caller holds the lock."""
+        excess = self._count() - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+        if not self.max_bytes:
+            return
+        overflow = self._bytes() - self.max_bytes
+        if overflow <= 0:
+            return
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            victims.append((key,))
+            overflow -= size
+            if overflow <= 0:
+                break
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def close(self) -> None:
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus current payload bytes on disk."""
+        stats = super().stats()
+        with self._lock:
+            stats["bytes"] = self._bytes()
+        return stats
+
+
+class TieredCache(CacheBackend):
+    """A memory LRU in front of a shared/on-disk backend; disk hits are promoted to memory.
+
+    A promoted entry keeps the expiry it has on disk rather than starting a fresh TTL.
+    """
+
+    def __init__(self, name: str, memory: LRUCache, disk: CacheBackend):
+        super().__init__(name)
+        self.memory = memory
+        self.disk = disk
+
+    def _promote(self, key: str, entry: Entry) -> None:
+        value, remaining = entry
+        self.memory.set(key, value, remaining)
+
+    def _get_entry(self, key: str) -> Optional[Entry]:
+        entry = self.memory.get_entry(key)
+        if entry is None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                self._promote(key, entry)
+        return entry
+
+    async def aget_entry(self, key: str) -> Optional[Entry]:
+        """Answer from memory inline; go to the disk tier without blocking the loop."""
+        entry = self.memory.get_entry(key)
+        if entry is None:
+            entry = await self.disk.aget_entry(key)
+            if entry is not None:
+                self._promote(key, entry)
+        self._count_lookup(entry)
+        return entry
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Write through to both tiers."""
+        self.memory.set(key, value, ttl)
+        self.disk.set(key, value, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Write through to both tiers, the disk one from the default executor."""
+        self.memory.set(key, value, ttl)
+        await self.disk.aset(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        """Remove a key from both tiers."""
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self) -> None:
+        """Empty both tiers."""
+        self.memory.clear()
+        self.disk.clear()
+
+    def __len__(self) -> int:
+        return len(self.disk)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return combined counters plus a per-tier breakdown."""
+        stats = super().stats()
+        stats["memory"] = self.memory.stats()
+        stats["disk"] = self.disk.stats()
+        return stats
+
+
+def build_cache(
+    name: str,
+    backend: str = "memory",
+    max_entries: int = 1000,
+    max_bytes: int = 0,
+    ttl: Optional[float] = None,
+    cache_dir: str = "cache",
+) -> CacheBackend:
+    """Create a cache by backend name: "memory", "sqlite" (shared on-disk) or "tiered" (memory + sqlite)."""
+    if backend == "memory":
+        return LRUCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+    path = os.path.join(cache_dir, f"{name}.sqlite3")
+    try:
+        disk = SQLiteCache(name, path, max_entries=max_entries, ttl=ttl, max_bytes=max_bytes)
+    except sqlite3.Error as e:
+        logger.error(f"Could not open SQLite cache at {path}: {e}. Falling back to memory.")
+        return LRUCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+    if backend == "sqlite":
+        return disk
+    if backend == "tiered":
+        return TieredCache(name, LRUCache(name, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl), disk)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -14,6 +14,89 @@ class Settings:
     # JSON string mapping specific IPs to custom limits (e.g. {"1.2.3.4": 100, "5.6.7.8": -1})
     # -1 means unlimited. Default for unlisted IPs is 10.
     RATE_LIMIT_RULES: str = os.getenv("RATE_LIMIT_RULES", "{}")
+    # Size of the thread pool that runs blocking supabase-py calls off the event loop
+    SUPABASE_MAX_WORKERS: int = int(os.getenv("SUPABASE_MAX_WORKERS", "8"))
+    # Write-behind batching for bot/user messages persisted from the chat stream
+    MESSAGE_QUEUE_BATCH_SIZE: int = int(os.getenv("MESSAGE_QUEUE_BATCH_SIZE", "50"))
+    MESSAGE_QUEUE_FLUSH_INTERVAL: float = float(os.getenv("MESSAGE_QUEUE_FLUSH_INTERVAL", "0.5"))
+    MESSAGE_QUEUE_MAX_RETRIES: int = int(os.getenv("MESSAGE_QUEUE_MAX_RETRIES", "3"))
+    MESSAGE_QUEUE_MAX_SIZE: int = int(os.getenv("MESSAGE_QUEUE_MAX_SIZE", "10000"))
+    # Minimum confidence for the local intent classifier to answer without calling Gemini (>1 disables it)
+    INTENT_LOCAL_CONFIDENCE: float = float(os.getenv("INTENT_LOCAL_CONFIDENCE", "0.85"))
+    # Directory for on-disk caches and snapshots shared by all workers on the host
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "cache")
+    # Intent cache: "memory" (per-process), "sqlite" (shared on-disk) or "tiered" (both)
+    INTENT_CACHE_BACKEND: str = os.getenv("INTENT_CACHE_BACKEND", "memory")
+    INTENT_CACHE_MAX_ENTRIES: int = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "5000"))
+    INTENT_CACHE_MAX_BYTES: int = int(os.getenv("INTENT_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+    INTENT_CACHE_TTL: float = float(os.getenv("INTENT_CACHE_TTL", str(7 * 24 * 3600)))
+    # LeetCode problems list: refresh schedule and retry backoff after failed fetches (seconds)
+    PROBLEMS_REFRESH_INTERVAL: float = float(os.getenv("PROBLEMS_REFRESH_INTERVAL", str(6 * 3600)))
+    PROBLEMS_RETRY_BASE_SECONDS: float = float(os.getenv("PROBLEMS_RETRY_BASE_SECONDS", "30"))
+    PROBLEMS_RETRY_MAX_SECONDS: float = float(os.getenv("PROBLEMS_RETRY_MAX_SECONDS", "1800"))
+    # Minimum trigram similarity for get_title_slug to accept a fuzzy (typo-tolerant) title match
+    TITLE_FUZZY_MIN_SCORE: float = float(os.getenv("TITLE_FUZZY_MIN_SCORE", "0.6"))
+    # In-process chat sessions: LRU bounds, idle TTL (seconds) and sweep interval; 0 disables a bound
+    CHAT_MEMORY_MAX_SESSIONS: int = int(os.getenv("CHAT_MEMORY_MAX_SESSIONS", "10000"))
+    CHAT_MEMORY_MAX_BYTES: int = int(os.getenv("CHAT_MEMORY_MAX_BYTES", str(256 * 1024 * 1024)))
+    CHAT_SESSION_TTL: float = float(os.getenv("CHAT_SESSION_TTL", str(2 * 3600)))
+    CHAT_MEMORY_SWEEP_INTERVAL: float = float(os.getenv("CHAT_MEMORY_SWEEP_INTERVAL", "60"))
+    # Prompt history: messages kept per session, and the token budget / elision threshold for each turn's context
+    CHAT_HISTORY_MAX_MESSAGES: int = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+    CONTEXT_ELIDE_TOKENS: int = int(os.getenv("CONTEXT_ELIDE_TOKENS", "400"))
+    # Rolling summary of messages that fall out of the session history (min messages per background run)
+    SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    SUMMARY_MIN_MESSAGES: int = int(os.getenv("SUMMARY_MIN_MESSAGES", "2"))
+    SUMMARY_MESSAGE_MAX_CHARS: int = int(os.getenv("SUMMARY_MESSAGE_MAX_CHARS", "1500"))
+    # Share one Gemini stream between concurrent identical chat generations
+    LLM_SINGLE_FLIGHT_ENABLED: bool = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    # Provider-side caching of large system prompts (TTL in seconds; smaller prompts are sent inline)
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+    PROMPT_CACHE_TTL: int = int(os.getenv("PROMPT_CACHE_TTL", "3600"))
+    PROMPT_CACHE_MIN_TOKENS: int = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+    # Session store: "memory" (per-process) or "sqlite" (shared by all workers on the host; use a /dev/shm path for RAM)
+    SESSION_STORE_BACKEND: str = os.getenv("SESSION_STORE_BACKEND", "memory")
+    SESSION_STORE_PATH: str = os.getenv(
+        "SESSION_STORE_PATH", os.path.join(os.getenv("CACHE_DIR", "cache"), "sessions.sqlite3")
+    )
+    # Processed LeetCode question details keyed by title slug
+    QUESTION_CACHE_BACKEND: str = os.getenv("QUESTION_CACHE_BACKEND", "tiered")
+    QUESTION_CACHE_MAX_ENTRIES: int = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "2000"))
+    QUESTION_CACHE_MAX_BYTES: int = int(os.getenv("QUESTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    QUESTION_CACHE_TTL: float = float(os.getenv("QUESTION_CACHE_TTL", str(7 * 24 * 3600)))
+    # Generated LeetCode solutions keyed by (slug, language, visualization, prompt version); bump the version to flush
+    SOLUTION_CACHE_ENABLED: bool = os.getenv("SOLUTION_CACHE_ENABLED", "true").lower() == "true"
+    SOLUTION_CACHE_BACKEND: str = os.getenv("SOLUTION_CACHE_BACKEND", "tiered")
+    SOLUTION_CACHE_MAX_ENTRIES: int = int(os.getenv("SOLUTION_CACHE_MAX_ENTRIES", "5000"))
+    SOLUTION_CACHE_MAX_BYTES: int = int(os.getenv("SOLUTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    SOLUTION_CACHE_TTL: float = float(os.getenv("SOLUTION_CACHE_TTL", str(7 * 24 * 3600)))
+    SOLUTION_PROMPT_VERSION: str = os.getenv("SOLUTION_PROMPT_VERSION", "1")
+    # Client disconnects while an answer streams: how often to check, and whether the partial answer is
+    # kept in history and the database ("persist") or dropped ("discard")
+    STREAM_DISCONNECT_POLL_INTERVAL: float = float(os.getenv("STREAM_DISCONNECT_POLL_INTERVAL", "0.5"))
+    STREAM_DISCONNECT_POLICY: str = os.getenv("STREAM_DISCONNECT_POLICY", "persist")
+    # Conceptual CS tutor answers matched by question similarity (cosine of hashed n-gram embeddings)
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+    SEMANTIC_CACHE_TTL: float = float(os.getenv("SEMANTIC_CACHE_TTL", str(7 * 24 * 3600)))
+    SEMANTIC_CACHE_DIM: int = int(os.getenv("SEMANTIC_CACHE_DIM", "1024"))
+    # Longer questions (pasted code, full problem statements) are never answered from the cache
+    SEMANTIC_CACHE_MAX_QUERY_CHARS: int = int(os.getenv("SEMANTIC_CACHE_MAX_QUERY_CHARS", "300"))
+    # Offline question corpus: "fallback" serves it when upstream fails, "offline" never calls upstream,
+    # "off" disables it
+    QUESTION_CORPUS_MODE: str = os.getenv("QUESTION_CORPUS_MODE", "fallback")
+    QUESTION_CORPUS_PATH: str = os.getenv(
+        "QUESTION_CORPUS_PATH", os.path.join(os.getenv("CACHE_DIR", "cache"), "questions.corpus")
+    )
+    # Shared HTTP client used by the LeetCode scraper
+    SCRAPER_HTTP_TIMEOUT: float = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "30"))
+    SCRAPER_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("SCRAPER_HTTP_CONNECT_TIMEOUT", "5"))
+    SCRAPER_HTTP_MAX_CONNECTIONS: int = int(os.getenv("SCRAPER_HTTP_MAX_CONNECTIONS", "20"))
+    SCRAPER_HTTP_MAX_KEEPALIVE: int = int(os.getenv("SCRAPER_HTTP_MAX_KEEPALIVE", "10"))
+    SCRAPER_HTTP_PER_HOST_LIMIT: int = int(os.getenv("SCRAPER_HTTP_PER_HOST_LIMIT", "8"))
+    SCRAPER_HTTP_RETRIES: int = int(os.getenv("SCRAPER_HTTP_RETRIES", "2"))
     APP_LOG_FILE: str = "app.log"
     CORS_ORIGINS = [
         "http://localhost:5173/",
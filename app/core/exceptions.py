@@ -6,3 +6,7 @@ class APIError(Exception):
         self.detail = detail
         super().__init__(f"API Error: Status Code {status_code}, Detail: {detail}")
 
+
+class ClientDisconnectedError(Exception):
+    """The client of a streaming response went away before the response finished."""
+
@@ -0,0 +1,14 @@
+# Lightweight in-process metrics registry
+from typing import Any, Callable, Dict
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register a callable returning a dict of stats under `name`."""
+    _providers[name] = provider
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Collect the current stats from every registered provider."""
+    return {name: provider() for name, provider in _providers.items()}
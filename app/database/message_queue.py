@@ -0,0 +1,196 @@
+# app/database/message_queue.py
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import logger
+from app.database.supabase_client import SupabaseManager
+
+_STOP = object()
+
+
+class MessageWriteQueue:
+    """Write-behind queue that batches `messages` inserts off the request path.
+
+    Records are accepted immediately by `enqueue` and flushed by a background task
+    as multi-row inserts once `batch_size` records are pending or `flush_interval`
+    seconds have passed since the first pending record, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        max_retries: int = 3,
+        max_size: int = 10000,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.retries = 0
+        self.flushes = 0
+        self.row_fallbacks = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._worker is not None and not self._worker.done():
+            return
+        # A restarted worker picks up the records its predecessor left in the queue
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._worker = asyncio.create_task(self._run())
+        logger.info("Message write-behind queue started.")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still pending and stop the background flusher."""
+        if self._worker is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            # A full queue must not hang shutdown: waiting for room shares the drain timeout
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=timeout)
+            await asyncio.wait_for(self._worker, timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            logger.error(f"Message queue did not drain within {timeout}s; {self.depth} messages lost.")
+            self._worker.cancel()
+        self._worker = None
+        self._queue = None
+        logger.info("Message write-behind queue stopped.")
+
+    @property
+    def depth(self) -> int:
+        """Number of records waiting to be flushed."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def enqueue(
+        self,
+        session_id: str,
+        sender_type: str,
+        content: str,
+        intent: Optional[str] = None,
+        visualization_data: Optional[Dict] = None,
+        parent_message_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> bool:
+        """Accept a message for asynchronous storage. Returns False if it was rejected."""
+        try:
+            record = SupabaseManager.build_message_record(
+                session_id, sender_type, content, intent, visualization_data, parent_message_id, metadata
+            )
+        except ValueError:
+            logger.error(f"Invalid session_id or parent_message_id format for enqueue. Session: {session_id}")
+            return False
+        # Stamp the time now: rows in one multi-row insert would otherwise share a single
+        # server-side default and lose their relative order.
+        record["created_at"] = datetime.now(timezone.utc).isoformat()
+
+        if self._worker is None or self._worker.done():
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Message queue full ({self.max_size}); dropping message for session {session_id}")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _run(self) -> None:
+        """Collect records into batches and flush them until a stop sentinel arrives."""
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Dict[str, Any]] = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Drain whatever arrived after the stop request
+        leftover: List[Dict[str, Any]] = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[i:i + self.batch_size])
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch, retrying with exponential backoff, then row by row before giving up."""
+        start_time = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            if await SupabaseManager.store_messages(batch):
+                self.written += len(batch)
+                break
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(min(0.5 * (2 ** attempt), 5.0))
+        else:
+            await self._flush_rows(batch)
+        duration = time.perf_counter() - start_time
+        self.flushes += 1
+        self.last_flush_seconds = duration
+        self.total_flush_seconds += duration
+
+    async def _flush_rows(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch that keeps failing one row at a time, so only the bad rows are dropped."""
+        if len(batch) > 1:
+            self.row_fallbacks += 1
+            logger.warning(
+                f"Batch of {len(batch)} messages failed {self.max_retries + 1} times; inserting rows singly."
+            )
+            for record in batch:
+                if await SupabaseManager.store_messages([record]):
+                    self.written += 1
+                else:
+                    self.dropped += 1
+                    logger.error(f"Dropping message for session {record.get('session_id')} after its insert failed.")
+            return
+        self.dropped += len(batch)
+        logger.error(f"Giving up on batch of {len(batch)} messages after {self.max_retries} retries.")
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and flush latency."""
+        return {
+            "depth": self.depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "row_fallbacks": self.row_fallbacks,
+            "last_flush_seconds": round(self.last_flush_seconds, 4),
+            "avg_flush_seconds": round(self.total_flush_seconds / self.flushes, 4) if self.flushes else 0.0,
+        }
+
+
+message_queue = MessageWriteQueue(
+    batch_size=settings.MESSAGE_QUEUE_BATCH_SIZE,
+    flush_interval=settings.MESSAGE_QUEUE_FLUSH_INTERVAL,
+    max_retries=settings.MESSAGE_QUEUE_MAX_RETRIES,
+    max_size=settings.MESSAGE_QUEUE_MAX_SIZE,
+)
+metrics.register("message_queue", message_queue.stats)
@@ -1,18 +1,31 @@
 # app/database/supabase_client.py
+import asyncio
 import uuid  # Import uuid if needed for validation within the class
-from typing import Dict, List, Optional  # Ensure Dict is imported
-
-from supabase import Client, create_client
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional  # Ensure Dict is imported
 
 from app.core.config import settings
 from app.core.logger import logger
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def create_client(supabase_url: str, supabase_key: str) -> "Client":
+    """Build a supabase-py client. The SDK (~0.1 s to import) is loaded on first use, not at boot."""
+    from supabase import create_client as _create_client
+
+    return _create_client(supabase_url, supabase_key)
+
 
 class SupabaseManager:
-    _client: Optional[Client] = None
+    _client: Optional["Client"] = None
+    # supabase-py's .execute() is synchronous; run it on a bounded pool so a slow
+    # round trip never stalls the event loop (and every other SSE stream with it).
+    _executor: Optional[ThreadPoolExecutor] = None
 
     @classmethod
-    def get_client(cls) -> Client:
+    def get_client(cls) -> "Client":
         """Initialize and return the Supabase client."""
         if cls._client is None:
             try:
@@ -25,6 +38,28 @@ class SupabaseManager:
                 raise
         return cls._client
 
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """Return the thread pool used for blocking Supabase calls, creating it lazily."""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=settings.SUPABASE_MAX_WORKERS, thread_name_prefix="supabase"
+            )
+        return cls._executor
+
+    @classmethod
+    async def _execute(cls, query: Any) -> Any:
+        """Run a built supabase-py query's blocking .execute() in the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._get_executor(), query.execute)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Release the worker pool. Safe to call more than once."""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
     @classmethod
     async def create_chat_session(
         cls, user_id: str, session_id: str, session_name: str = "New Chat"
@@ -45,7 +80,7 @@ class SupabaseManager:
                 "user_id": user_id,
             }
 
-            response = client.table("chat_sessions").insert(insert_data).execute()
+            response = await cls._execute(client.table("chat_sessions").insert(insert_data))
             # Optional: Check response status or errors if execute() provides them
             # if response.error: logger.error(...) return False
             logger.info(f"Successfully inserted chat session {session_id_str}")
@@ -65,12 +100,11 @@ class SupabaseManager:
             # Validate UUID format before querying
             session_uuid = uuid.UUID(session_id)
             client = cls.get_client()
-            response = (
+            response = await cls._execute(
                 client.table("chat_sessions")
                 .select("*")
                 .eq("id", str(session_uuid)) # Query using the validated string UUID
                 .limit(1) # Optimization: We only expect one session
-                .execute()
             )
             # Check if data was returned
             if response.data:
@@ -93,12 +127,11 @@ class SupabaseManager:
         """Retrieve all chat sessions for a given user."""
         try:
             client = cls.get_client()
-            response = (
+            response = await cls._execute(
                 client.table("chat_sessions")
                 .select("*")
                 .eq("user_id", user_id)
                 .order("created_at", desc=True) # Optional: Order by creation time
-                .execute()
             )
             return response.data # Will be [] if no sessions found, None only on error
         except Exception as e:
@@ -112,12 +145,11 @@ class SupabaseManager:
              # Validate UUID format before querying
             session_uuid = uuid.UUID(session_id)
             client = cls.get_client()
-            response = (
+            response = await cls._execute(
                 client.table("messages")
                 .select("*")
                 .eq("session_id", str(session_uuid))
                 .order("created_at", desc=False) # Order messages chronologically
-                .execute()
             )
             return response.data # Will be [] if no messages found, None only on error
         except ValueError:
@@ -134,9 +166,9 @@ class SupabaseManager:
             # Validate UUID format before querying
             session_uuid = uuid.UUID(session_id)
             client = cls.get_client()
-            response = client.table("chat_sessions").update(
-                {"session_name": session_name}
-            ).eq("id", str(session_uuid)).execute()
+            response = await cls._execute(
+                client.table("chat_sessions").update({"session_name": session_name}).eq("id", str(session_uuid))
+            )
             # Optional: Check if update actually affected rows if API provides count
             # For now, assume success if no exception
             logger.info(f"Updated session name for {session_id} to '{session_name}'")
@@ -148,6 +180,30 @@ class SupabaseManager:
             logger.error(f"Error updating session name for {session_id}: {str(e)}", exc_info=True)
             return False
 
+    @staticmethod
+    def build_message_record(
+        session_id: str,
+        sender_type: str,
+        content: str,
+        intent: Optional[str] = None,
+        visualization_data: Optional[Dict] = None,
+        parent_message_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> Dict[str, Any]:
+        """Build a `messages` row. Raises ValueError on malformed session/parent UUIDs."""
+        session_uuid = uuid.UUID(session_id)
+        return {
+            "session_id": str(session_uuid),
+            "sender_type": sender_type,
+            "content": content,
+            "intent": intent,
+            "visualization_data": visualization_data if visualization_data else None,
+            "parent_message_id": (
+                str(uuid.UUID(parent_message_id)) if parent_message_id else None
+            ),
+            "metadata": metadata or {},
+        }
+
     @classmethod
     async def store_message(
         cls,
@@ -161,21 +217,12 @@ class SupabaseManager:
     ) -> bool:
         """Store a message in the database."""
         try:
-            session_uuid = uuid.UUID(session_id)
+            message_data = cls.build_message_record(
+                session_id, sender_type, content, intent, visualization_data, parent_message_id, metadata
+            )
             client = cls.get_client()
-            message_data = {
-                "session_id": str(session_uuid),
-                "sender_type": sender_type,
-                "content": content,
-                "intent": intent,
-                "visualization_data": visualization_data if visualization_data else None,
-                "parent_message_id": (
-                    str(uuid.UUID(parent_message_id)) if parent_message_id else None
-                ),
-                "metadata": metadata or {},
-            }
 
-            client.table("messages").insert(message_data).execute()
+            await cls._execute(client.table("messages").insert(message_data))
             # Optional: Check for errors in response
             # if response.error: logger.error(...) return False
             logger.debug(f"Stored message for session {session_id} by {sender_type}")
@@ -189,4 +236,18 @@ class SupabaseManager:
             # logger.debug(f"Message data attempted: {message_data}") # Uncomment for deep debugging
             return False
 
+    @classmethod
+    async def store_messages(cls, records: List[Dict[str, Any]]) -> bool:
+        """Insert several pre-built message rows in a single multi-row insert."""
+        if not records:
+            return True
+        try:
+            client = cls.get_client()
+            await cls._execute(client.table("messages").insert(records))
+            logger.debug(f"Stored batch of {len(records)} messages")
+            return True
+        except Exception as e:
+            logger.error(f"Exception storing batch of {len(records)} messages: {str(e)}", exc_info=True)
+            return False
+
 # Note: migrate_chat_sessions method removed - guest sessions are ephemeral and don't need migration
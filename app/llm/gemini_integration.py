@@ -1,47 +1,141 @@
 import json
 import re
+import threading
 import time
-from typing import Any, AsyncGenerator, Dict, List, Optional
-
-from google import genai
-from google.genai import types
+from contextlib import aclosing
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Dict, List, Optional
 
+from app.core import metrics
+from app.core.cache import build_cache
 from app.core.config import settings
 from app.core.logger import logger
-from app.llm.prompts import VISUALIZATION_PROMPT , INTENT_CLASSIFICATION_PROMPT
+from app.llm.intent_classifier import local_classifier
+from app.llm.prompt_cache import PromptCache
+from app.llm.single_flight import StreamFanout, single_flight_key
+from app.llm.prompts import CONVERSATION_SUMMARY_PROMPT, VISUALIZATION_PROMPT , INTENT_CLASSIFICATION_PROMPT
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
 
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+# The google-genai SDK takes ~0.5 s to import and its client ~0.1 s to build, so neither happens
+# at module import: get_client() builds it on first use, or warm_up() during startup.
+client: Optional["genai.Client"] = None
+_client_lock = threading.Lock()
 
 # Default model to use - configurable via GEMINI_MODEL env var
 DEFAULT_MODEL = settings.GEMINI_MODEL
 
-# Generation configurations
-visualization_config = types.GenerateContentConfig(
-    temperature=0.7,
-    top_p=0.95,
-    top_k=40,
-    max_output_tokens=8192,
-    response_mime_type="application/json",
+# Yielded by stream_chat_response in place of (or after) the answer when generation fails
+STREAM_ERROR_TEXT = "Error generating response."
+
+# Generation configurations, built on first use (see _config)
+_CONFIG_PARAMS: Dict[str, Dict[str, Any]] = {
+    "visualization": dict(
+        temperature=0.7,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=8192,
+        response_mime_type="application/json",
+    ),
+    "chat": dict(
+        temperature=0.8,
+        top_p=0.9,
+        top_k=20,
+        max_output_tokens=10000,
+    ),
+    # Faster, more deterministic config for classification
+    "classification": dict(
+        temperature=0.0,
+        top_p=0.95,
+        top_k=40,
+        max_output_tokens=100,
+    ),
+    # Short, factual output for rolling conversation summaries
+    "summary": dict(
+        temperature=0.2,
+        top_p=0.9,
+        top_k=20,
+        max_output_tokens=400,
+    ),
+}
+
+
+def get_client() -> "genai.Client":
+    """Return the shared Gemini client, importing the SDK and building it on first use."""
+    global client
+    if client is None:
+        with _client_lock:
+            if client is None:
+                from google import genai
+                client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    return client
+
+
+@lru_cache(maxsize=None)
+def _config(name: str) -> "types.GenerateContentConfig":
+    from google.genai import types
+    return types.GenerateContentConfig(**_CONFIG_PARAMS[name])
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `gemini_integration.chat_config` and friends working without building them at import
+    if name.endswith("_config") and name[: -len("_config")] in _CONFIG_PARAMS:
+        return _config(name[: -len("_config")])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up() -> None:
+    """Import the SDK and build the client and configs. Run off the event loop from the startup hook."""
+    try:
+        start = time.perf_counter()
+        get_client()
+        for name in _CONFIG_PARAMS:
+            _config(name)
+        logger.info(f"Gemini client ready in {time.perf_counter() - start:.2f}s.")
+    except Exception as e:
+        logger.error(f"Gemini client warm-up failed (will retry on first use): {e}")
+
+# LRU/TTL cache for intent classification; set INTENT_CACHE_BACKEND=sqlite to share it across workers
+_intent_cache = build_cache(
+    "intent",
+    backend=settings.INTENT_CACHE_BACKEND,
+    max_entries=settings.INTENT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.INTENT_CACHE_MAX_BYTES,
+    ttl=settings.INTENT_CACHE_TTL,
+    cache_dir=settings.CACHE_DIR,
 )
+metrics.register("intent_cache", _intent_cache.stats)
 
-chat_config = types.GenerateContentConfig(
-    temperature=0.8,
-    top_p=0.9,
-    top_k=20,
-    max_output_tokens=10000,
+# Large static system prompts (CS tutor, general) are served from provider-side cached content
+prompt_cache = PromptCache(
+    ttl=settings.PROMPT_CACHE_TTL,
+    min_tokens=settings.PROMPT_CACHE_MIN_TOKENS,
+    enabled=settings.PROMPT_CACHE_ENABLED,
 )
+metrics.register("prompt_cache", prompt_cache.stats)
 
-# Faster, more deterministic config for classification
-classification_config = types.GenerateContentConfig(
-    temperature=0.0,
-    top_p=0.95,
-    top_k=40,
-    max_output_tokens=100,
-)
+# Identical generations already streaming (same prompt, history and query) are shared, not repeated
+_chat_streams = StreamFanout()
+metrics.register("chat_streams", _chat_streams.stats)
+
+
+def _with_system_prompt(
+    config: "types.GenerateContentConfig", system_prompt: str, cached_content: Optional[str] = None
+) -> "types.GenerateContentConfig":
+    """Deliver the system prompt as a system instruction, or by reference to its cached content."""
+    if cached_content:
+        return config.model_copy(update={"cached_content": cached_content})
+    if system_prompt:
+        return config.model_copy(update={"system_instruction": system_prompt})
+    return config
 
-# Simple in-memory cache for intent classification
-_intent_cache: Dict[str, str] = {}
-MAX_CACHE_SIZE = 100
+
+async def close_prompt_cache():
+    """Delete this process's prompt caches. Called from the FastAPI shutdown hook."""
+    if client is not None:  # No client means no caches were created
+        await prompt_cache.close(client.aio.caches)
 
 
 def clean_json_response(raw_text: str) -> str:
@@ -59,9 +153,9 @@ def clean_json_response(raw_text: str) -> str:
 async def get_visualization_data(user_query: str) -> Optional[Dict[str, Any]]:
     """Generate visualization data."""
     try:
-        chat = client.aio.chats.create(
+        chat = get_client().aio.chats.create(
             model=DEFAULT_MODEL,
-            config=visualization_config,
+            config=_config("visualization"),
         )
         response = await chat.send_message(
             VISUALIZATION_PROMPT + "\n\n" + user_query
@@ -83,6 +177,8 @@ async def get_chat_response(
         chat_history: List of previous messages [{"role": "user", "content": "..."}, ...]
 
     """
+    from google.genai import types  # Loaded lazily, see get_client()
+
     try:
         # Prepare history in the format expected by google.genai
         # [{'role': 'user', 'parts': [{'text': '...'}]}, {'role': 'model', 'parts': [{'text': '...'}]}]
@@ -92,17 +188,26 @@ async def get_chat_response(
                 role = "user" if message["role"] == "user" else "model"
                 history.append(types.Content(role=role, parts=[types.Part(text=message["content"])]))
 
-        chat = client.aio.chats.create(
-            model=DEFAULT_MODEL,
-            config=chat_config,
-            history=history
-        )
-        if system_prompt:
-            # Send system prompt as the first message if needed, or better, include it in config if supported as system instruction.
-            # But adhering to previous logic: send it first.
-            await chat.send_message(system_prompt)
-
-        response = await chat.send_message(user_query)
+        # The system prompt travels in the config, so the query is the only round trip
+        cached = prompt_cache.lookup(get_client().aio.caches, DEFAULT_MODEL, system_prompt)
+        try:
+            chat = get_client().aio.chats.create(
+                model=DEFAULT_MODEL,
+                config=_with_system_prompt(_config("chat"), system_prompt, cached),
+                history=history
+            )
+            response = await chat.send_message(user_query)
+        except Exception as e:
+            if not cached:
+                raise
+            logger.warning(f"Cached prompt {cached} rejected ({e}); retrying with the prompt inline.")
+            prompt_cache.invalidate(cached)
+            chat = get_client().aio.chats.create(
+                model=DEFAULT_MODEL,
+                config=_with_system_prompt(_config("chat"), system_prompt),
+                history=history
+            )
+            response = await chat.send_message(user_query)
         return response.text.strip()
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
@@ -113,17 +218,35 @@ async def stream_chat_response(
 ) -> AsyncGenerator[str, None]:
     """Stream text response chunks with chat history.
 
+    Concurrent calls with the same system prompt, history and query share one upstream
+    stream; each caller still receives the full response from the first chunk.
+
     Args:
         user_query: The current user query
         system_prompt: System instructions for the model
         chat_history: List of previous messages [{"role": "user", "content": "..."}, ...]
 
     """
+    if not settings.LLM_SINGLE_FLIGHT_ENABLED:
+        stream = _stream_chat_upstream(user_query, system_prompt, chat_history)
+    else:
+        key = single_flight_key(DEFAULT_MODEL, system_prompt, chat_history, user_query)
+        stream = _chat_streams.stream(key, lambda: _stream_chat_upstream(user_query, system_prompt, chat_history))
+    # Closing this generator early closes the inner one at once, so an abandoned upstream stops promptly
+    async with aclosing(stream) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+async def _stream_chat_upstream(
+    user_query: str, system_prompt: str, chat_history: List[Dict[str, str]] = None
+) -> AsyncGenerator[str, None]:
+    """One Gemini streaming call; see stream_chat_response."""
+    from google.genai import types  # Loaded lazily, see get_client()
+
     try:
-        # Construct contents list
+        # Construct contents list; the system prompt goes in the config, not the conversation
         contents = []
-        if system_prompt:
-             contents.append(types.Content(role="user", parts=[types.Part(text=system_prompt)]))
         if chat_history:
             for msg in chat_history:
                 role = "user" if msg["role"] == "user" else "model"
@@ -131,19 +254,36 @@ async def stream_chat_response(
         contents.append(types.Content(role="user", parts=[types.Part(text=user_query)]))
 
         # Stream response
-        # Using generate_content_stream for one-off generation with context manually constructed, 
+        # Using generate_content_stream for one-off generation with context manually constructed,
         # mirroring the previous logic which passed a list of contents.
-        response = await client.aio.models.generate_content_stream(
-            model=DEFAULT_MODEL,
-            contents=contents,
-            config=chat_config,
-        )
-        async for chunk in response:
-            logger.debug(f"Response chunk: {chunk.text}")
-            yield chunk.text
+        cached = prompt_cache.lookup(get_client().aio.caches, DEFAULT_MODEL, system_prompt)
+        for attempt_cache in ([cached, None] if cached else [None]):
+            started = False
+            try:
+                response = await get_client().aio.models.generate_content_stream(
+                    model=DEFAULT_MODEL,
+                    contents=contents,
+                    config=_with_system_prompt(_config("chat"), system_prompt, attempt_cache),
+                )
+                try:
+                    async for chunk in response:  # The request is sent on the first iteration
+                        started = True
+                        logger.debug(f"Response chunk: {chunk.text}")
+                        yield chunk.text
+                finally:
+                    # Stopping early (e.g. the client disconnected) must release the HTTP stream now, not at GC
+                    aclose = getattr(response, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+                break
+            except Exception as e:
+                if started or not attempt_cache:
+                    raise
+                logger.warning(f"Cached prompt {attempt_cache} rejected ({e}); retrying with the prompt inline.")
+                prompt_cache.invalidate(attempt_cache)
     except Exception as e:
         logger.error(f"Streaming error: {str(e)}")
-        yield "Error generating response."
+        yield STREAM_ERROR_TEXT
 
 
 
@@ -172,9 +312,9 @@ async def get_contextual_visualization_data(
                 context_prompt += "\n\nRecent Conversation Context:\n" + "\n".join(recent_context) + "\n"
 
         
-        chat = client.aio.chats.create(
+        chat = get_client().aio.chats.create(
             model=DEFAULT_MODEL,
-            config=visualization_config,
+            config=_config("visualization"),
         )
         response = await chat.send_message(context_prompt + "\n\nUser Request: " + user_query)
 
@@ -215,23 +355,30 @@ async def get_contextual_visualization_data(
 # """
 
 async def classify_intent_with_llm(user_query: str) -> str:
-    """Uses the LLM to classify the user's intent with in-memory caching."""
+    """Uses the LLM to classify the user's intent, backed by the intent cache and local classifier."""
     # Normalize query for better cache hits
     normalized_query = user_query.strip().lower()
     
     # Check cache first
-    if normalized_query in _intent_cache:
-        logger.info(f"Cache hit for intent: '{normalized_query[:30]}...' -> {_intent_cache[normalized_query]}")
-        return _intent_cache[normalized_query]
+    cached_intent = await _intent_cache.aget(normalized_query)
+    if cached_intent:
+        logger.info(f"Cache hit for intent: '{normalized_query[:30]}...' -> {cached_intent}")
+        return cached_intent
+
+    # Confident cases are answered locally; only ambiguous queries pay for a Gemini round trip
+    local_intent = local_classifier.classify(user_query)
+    if local_intent:
+        logger.info(f"Local classifier intent for '{user_query[:60]}...': {local_intent}")
+        return local_intent
 
     try:
         start_time = time.perf_counter()
         prompt = INTENT_CLASSIFICATION_PROMPT.format(user_query=user_query)
 
-        response = await client.aio.models.generate_content(
+        response = await get_client().aio.models.generate_content(
             model=DEFAULT_MODEL,
             contents=prompt,
-            config=classification_config,
+            config=_config("classification"),
         )
 
         intent = response.text.strip().lower()
@@ -239,14 +386,7 @@ async def classify_intent_with_llm(user_query: str) -> str:
 
         if intent in ["visualization", "cs_tutor", "general"]:
             logger.info(f"LLM classified intent for '{user_query[:60]}...' as: {intent} (took {duration:.2f}s)")
-            
-            # Update cache (simple FIFO-ish pruning if it gets too big)
-            if len(_intent_cache) >= MAX_CACHE_SIZE:
-                # Remove a random key or first key if needed, here just clearing oldest entry
-                oldest_key = next(iter(_intent_cache))
-                del _intent_cache[oldest_key]
-            
-            _intent_cache[normalized_query] = intent
+            await _intent_cache.aset(normalized_query, intent)
             return intent
         else:
             logger.warning(f"LLM returned an invalid intent classification: '{intent}'. Defaulting to 'general'.")
@@ -255,3 +395,22 @@ async def classify_intent_with_llm(user_query: str) -> str:
     except Exception as e:
         logger.error(f"Error during LLM intent classification: {e}. Defaulting to 'general'.")
         return "general"
+
+
+async def summarize_conversation(previous_summary: str, messages: List[Dict[str, str]]) -> Optional[str]:
+    """Fold `messages` into the running conversation summary. Returns None on failure."""
+    max_chars = settings.SUMMARY_MESSAGE_MAX_CHARS
+    transcript = "\n".join(f"{msg['role']}: {msg['content'][:max_chars]}" for msg in messages)
+    prompt = CONVERSATION_SUMMARY_PROMPT.format(previous_summary=previous_summary or "(none)", transcript=transcript)
+    try:
+        response = await get_client().aio.models.generate_content(
+            model=DEFAULT_MODEL,
+            contents=prompt,
+            config=_config("summary"),
+        )
+        summary = (response.text or "").strip()
+        return summary or None
+    except Exception as e:
+        logger.error(f"Conversation summary error: {e}")
+        return None
+
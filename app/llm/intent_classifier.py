@@ -0,0 +1,251 @@
+# app/llm/intent_classifier.py
+import math
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+INTENTS = ("visualization", "cs_tutor", "general")
+
+# --- Rule stage: indicators taken from INTENT_CLASSIFICATION_PROMPT ---
+_GREETING_RE = re.compile(
+    r"^\s*(hi|hii+|hello|hey|yo|thanks|thank you|thx|good (morning|afternoon|evening|night)|"
+    r"how are you|what'?s up|bye|goodbye|ok(ay)?|cool|nice)\b[\s!.?,]*(there|again|so much|a lot|bot)?[\s!.?]*$",
+    re.IGNORECASE,
+)
+_META_RE = re.compile(
+    r"\b(what can you do|what can you help|who are you|tell me about yourself|your capabilities|can you help me)\b",
+    re.IGNORECASE,
+)
+_VIS_ACTION_RE = re.compile(
+    r"\b(visuali[sz]e|visuali[sz]ation|animate|animation|trace|draw|demonstrate|run through|walk through|"
+    r"step[- ]by[- ]step|show (me )?(the )?steps)\b",
+    re.IGNORECASE,
+)
+# Concrete input data: bracketed numbers, assignments, edge lists, stack/queue operations
+_DATA_RE = re.compile(
+    r"\[\s*-?\d[^\]]*\]|\b\w+\s*=\s*[\[\d]|\(\s*\w+\s*,\s*\w+\s*\)|\b(push|pop|enqueue|dequeue|insert)\s*\(\s*\w+",
+    re.IGNORECASE,
+)
+_CS_ASK_RE = re.compile(
+    r"\b(explain|teach me|how does|how do|what is|what are|why|solve|solution|how to|time complexity|"
+    r"space complexity|big o|difference between|when (should i|to) use|understand|learn|concept|compare)\b",
+    re.IGNORECASE,
+)
+_LEETCODE_RE = re.compile(r"leetcode|^\s*\d+\s*\.\s*\w", re.IGNORECASE)
+_CS_TERM_RE = re.compile(
+    r"\b(\w*sort|\w*search|tree|graph|bfs|dfs|dijkstra|array|list|stack|queue|heap|hash|map|dynamic programming|dp|"
+    r"recursion|algorithm|pointer|sliding window|greedy|backtracking|complexity|trie|matrix|string|binary)\w*",
+    re.IGNORECASE,
+)
+
+# --- Linear model stage: seed corpus built from the prompt's examples ---
+_SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("Bubble sort visualization with array [64, 34, 25, 12, 22, 11, 90]", "visualization"),
+    ("Quick sort with pivot selection on [3, 6, 8, 10, 1, 2, 1]", "visualization"),
+    ("BFS traversal starting from node A in graph with edges [(A,B), (A,C), (B,D)]", "visualization"),
+    ("Show binary search steps for target 7 in array [1, 3, 5, 7, 9, 11]", "visualization"),
+    ("Visualize Dijkstra's algorithm on graph with weights: A-B(4), A-C(2), B-C(1)", "visualization"),
+    ("Animate merge sort on [38, 27, 43, 3, 9, 82, 10]", "visualization"),
+    ("Step by step insertion sort for [5, 2, 8, 1, 9]", "visualization"),
+    ("Trace DFS on tree with root=1, left=2, right=3", "visualization"),
+    ("Show stack operations: push(10), push(20), pop(), push(30)", "visualization"),
+    ("Visualize Two Sum for nums=[2,7,11,15], target=9", "visualization"),
+    ("visualize heap sort", "visualization"),
+    ("draw the binary tree for [4, 2, 7, 1, 3]", "visualization"),
+    ("show me selection sort on 5 3 8 1", "visualization"),
+    ("animate bfs on a grid", "visualization"),
+    ("trace the dp table for coin change with coins 1 2 5 amount 11", "visualization"),
+    ("teach me binary search", "cs_tutor"),
+    ("solve leetcode 1. two sum", "cs_tutor"),
+    ("what is the time complexity of merge sort?", "cs_tutor"),
+    ("explain how quicksort works", "cs_tutor"),
+    ("how to solve the maximum subarray problem", "cs_tutor"),
+    ("difference between BFS and DFS", "cs_tutor"),
+    ("what is dynamic programming", "cs_tutor"),
+    ("help me understand binary trees", "cs_tutor"),
+    ("when should I use a hash map vs array", "cs_tutor"),
+    ("explain the two pointer technique", "cs_tutor"),
+    ("how does Dijkstra's algorithm work", "cs_tutor"),
+    ("what are the steps in merge sort", "cs_tutor"),
+    ("longest substring without repeating characters", "cs_tutor"),
+    ("reverse a linked list", "cs_tutor"),
+    ("why is quicksort faster than bubble sort", "cs_tutor"),
+    ("what is a trie used for", "cs_tutor"),
+    ("big o of heap insert", "cs_tutor"),
+    ("recursion vs iteration", "cs_tutor"),
+    ("what is tail recursion", "cs_tutor"),
+    ("what is a mutex", "cs_tutor"),
+    ("what is polymorphism", "cs_tutor"),
+    ("explain big o notation", "cs_tutor"),
+    ("what is a red black tree", "cs_tutor"),
+    ("explain amortized analysis", "cs_tutor"),
+    ("what is caching", "cs_tutor"),
+    ("hi how are you", "general"),
+    ("hello there", "general"),
+    ("what can you help me with", "general"),
+    ("thanks for your help", "general"),
+    ("what's the weather like", "general"),
+    ("tell me about yourself", "general"),
+    ("good morning", "general"),
+    ("can you help me", "general"),
+    ("what are your capabilities", "general"),
+    ("who made you", "general"),
+    ("tell me a joke", "general"),
+    ("what time is it", "general"),
+    ("i am bored", "general"),
+    ("nice to meet you", "general"),
+    # Off-topic questions phrased like CS ones ("what is X", "explain X", "how do I X")
+    ("what is art", "general"),
+    ("what is friendship", "general"),
+    ("what is your favorite color", "general"),
+    ("what is the population of india", "general"),
+    ("what is the stock market doing today", "general"),
+    ("explain the rules of football", "general"),
+    ("explain the story of the movie titanic", "general"),
+    ("how do I bake bread", "general"),
+    ("how do I learn to swim", "general"),
+    ("why do cats purr", "general"),
+    ("who wrote hamlet", "general"),
+    ("tell me about ancient egypt", "general"),
+    ("what does it mean to be happy", "general"),
+    ("how much does a car cost", "general"),
+]
+
+_NUM_BUCKETS = 1 << 15
+
+
+def _features(text: str) -> Dict[int, float]:
+    """Hashed character 3-5 gram counts, L2-normalized."""
+    text = " " + re.sub(r"\s+", " ", text.lower()).strip() + " "
+    counts: Dict[int, float] = {}
+    for n in (3, 4, 5):
+        for i in range(len(text) - n + 1):
+            bucket = zlib.crc32(text[i:i + n].encode("utf-8")) & (_NUM_BUCKETS - 1)
+            counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+class CharNgramModel:
+    """Multinomial logistic regression over hashed character n-grams."""
+
+    def __init__(self):
+        self.weights: Dict[str, Dict[int, float]] = {label: {} for label in INTENTS}
+        self.bias: Dict[str, float] = {label: 0.0 for label in INTENTS}
+
+    def fit(self, examples: List[Tuple[str, str]], epochs: int = 40, lr: float = 1.0) -> "CharNgramModel":
+        """Train with plain SGD on the softmax loss."""
+        data = [(_features(text), label) for text, label in examples]
+        for _ in range(epochs):
+            for feats, label in data:
+                probs = self._softmax(feats)
+                for cls in INTENTS:
+                    grad = probs[cls] - (1.0 if cls == label else 0.0)
+                    if grad == 0.0:
+                        continue
+                    w = self.weights[cls]
+                    for k, v in feats.items():
+                        w[k] = w.get(k, 0.0) - lr * grad * v
+                    self.bias[cls] -= lr * grad
+        return self
+
+    def _softmax(self, feats: Dict[int, float]) -> Dict[str, float]:
+        scores = {}
+        for cls in INTENTS:
+            w = self.weights[cls]
+            scores[cls] = self.bias[cls] + sum(w.get(k, 0.0) * v for k, v in feats.items())
+        top = max(scores.values())
+        exps = {cls: math.exp(s - top) for cls, s in scores.items()}
+        total = sum(exps.values())
+        return {cls: e / total for cls, e in exps.items()}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Return class probabilities for `text`."""
+        return self._softmax(_features(text))
+
+
+def classify_by_rules(query: str) -> Optional[Tuple[str, float]]:
+    """Apply the prompt's decision criteria as regex rules. Returns (intent, confidence) or None."""
+    has_data = bool(_DATA_RE.search(query))
+    has_vis_action = bool(_VIS_ACTION_RE.search(query))
+    has_cs_term = bool(_CS_TERM_RE.search(query))
+
+    if _GREETING_RE.match(query) or (_META_RE.search(query) and not has_cs_term):
+        return "general", 0.97
+    # Priority 1: algorithm + concrete data -> visualization
+    if has_data and (has_vis_action or has_cs_term):
+        return "visualization", 0.95 if has_vis_action else 0.9
+    if _LEETCODE_RE.search(query) and not has_vis_action:
+        return "cs_tutor", 0.95
+    # Priority 2: explanation request without data -> cs_tutor
+    if _CS_ASK_RE.search(query) and has_cs_term and not has_data and not has_vis_action:
+        return "cs_tutor", 0.92
+    return None
+
+
+class LocalIntentClassifier:
+    """CPU-only first stage in front of the LLM classifier.
+
+    Confident answers are returned locally; anything below `threshold` returns None so the
+    caller escalates to the LLM.
+    """
+
+    def __init__(self, threshold: float = 0.85, model: Optional[CharNgramModel] = None):
+        self.threshold = threshold
+        self._model = model
+        self._train_lock = threading.Lock()
+        self.rule_hits = 0
+        self.model_hits = 0
+        self.escalations = 0
+
+    def train(self) -> CharNgramModel:
+        """Train the n-gram model once (~0.1 s). Run it off the event loop; the startup hook does."""
+        with self._train_lock:
+            if self._model is None:
+                self._model = CharNgramModel().fit(_SEED_EXAMPLES)
+        return self._model
+
+    @property
+    def model(self) -> CharNgramModel:
+        """The n-gram model, trained on first use."""
+        return self._model if self._model is not None else self.train()
+
+    def predict(self, query: str) -> Tuple[str, float, str]:
+        """Return (intent, confidence, stage) without applying the threshold."""
+        ruled = classify_by_rules(query)
+        if ruled:
+            return ruled[0], ruled[1], "rules"
+        probs = self.model.predict_proba(query)
+        intent = max(probs, key=probs.get)
+        return intent, probs[intent], "model"
+
+    def classify(self, query: str) -> Optional[str]:
+        """Return a confident intent, or None when the query should go to the LLM.
+
+        Never trains on the calling thread: until `train()` has finished, queries the rules
+        can't settle are escalated.
+        """
+        if self._model is None and classify_by_rules(query) is None:
+            self.escalations += 1
+            return None
+        intent, confidence, stage = self.predict(query)
+        if confidence < self.threshold:
+            self.escalations += 1
+            return None
+        if stage == "rules":
+            self.rule_hits += 1
+        else:
+            self.model_hits += 1
+        return intent
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for how each query was resolved."""
+        return {"rule_hits": self.rule_hits, "model_hits": self.model_hits, "escalations": self.escalations}
+
+
+local_classifier = LocalIntentClassifier(threshold=settings.INTENT_LOCAL_CONFIDENCE)
+metrics.register("intent_classifier", local_classifier.stats)
@@ -0,0 +1,194 @@
+# app/llm/prompt_cache.py
+import asyncio
+import hashlib
+import itertools
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from app.core.logger import logger
+from app.memory.context_window import estimate_tokens
+
+if TYPE_CHECKING:
+    from google.genai import types
+
+# Refresh a cache once less than this fraction of its TTL is left
+_REFRESH_FRACTION = 0.2
+# After a failed create, leave the prompt uncached for this long (e.g. model without caching support)
+_FAILURE_BACKOFF = 600.0
+
+
+class _Entry:
+    __slots__ = ("name", "expires_at")
+
+    def __init__(self, name: str, expires_at: float):
+        self.name = name
+        self.expires_at = expires_at
+
+
+class PromptCache:
+    """Provider-side cached content for large, static system prompts.
+
+    `lookup` never waits on the provider: on a miss it starts creating the cache in the
+    background and returns None, so that turn sends the prompt as a plain system instruction
+    and later turns reference the cache instead. Caches in use are extended before they
+    expire; unused ones lapse on the provider at their TTL. Prompts estimated below
+    `min_tokens` are never cached (the provider rejects small caches).
+
+    `caches` is the `client.aio.caches` API, or `InMemoryCachesAPI` in tests.
+    """
+
+    def __init__(self, ttl: int = 3600, min_tokens: int = 1024, enabled: bool = True):
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.enabled = enabled
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._failed_until: Dict[Tuple[str, str], float] = {}
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._token_estimates: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.creates = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.invalidations = 0
+
+    def _cacheable(self, system_prompt: str) -> bool:
+        tokens = self._token_estimates.get(system_prompt)
+        if tokens is None:
+            tokens = self._token_estimates[system_prompt] = estimate_tokens(system_prompt)
+        return tokens >= self.min_tokens
+
+    def lookup(self, caches: Any, model: str, system_prompt: str) -> Optional[str]:
+        """Return the cached-content name for `system_prompt` on `model`, or None to send it inline."""
+        if not self.enabled or not system_prompt or not self._cacheable(system_prompt):
+            return None
+        key = (model, hashlib.sha256(system_prompt.encode("utf-8")).hexdigest())
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            self.hits += 1
+            if entry.expires_at - now < self.ttl * _REFRESH_FRACTION:
+                self._start(key, self._refresh(caches, key, entry))
+            return entry.name
+        self.misses += 1
+        if entry is not None:
+            del self._entries[key]
+        if self._failed_until.get(key, 0.0) <= now:
+            self._start(key, self._create(caches, key, model, system_prompt))
+        return None
+
+    def invalidate(self, name: str) -> None:
+        """Forget a cache the provider no longer accepts (deleted or expired early)."""
+        for key, entry in list(self._entries.items()):
+            if entry.name == name:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def _start(self, key: Tuple[str, str], coro) -> None:
+        if key in self._pending:
+            coro.close()
+            return
+        task = asyncio.create_task(coro)
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _create(self, caches: Any, key: Tuple[str, str], model: str, system_prompt: str) -> None:
+        from google.genai import types  # The SDK is imported lazily (see gemini_integration.get_client)
+
+        try:
+            cached = await caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_prompt,
+                    display_name=f"codequest-prompt-{key[1][:12]}",
+                    ttl=f"{self.ttl}s",
+                ),
+            )
+        except Exception as e:
+            self.failures += 1
+            self._failed_until[key] = time.monotonic() + _FAILURE_BACKOFF
+            logger.warning(f"Prompt cache create failed for {model}; sending the prompt inline: {e}")
+            return
+        self._entries[key] = _Entry(cached.name, time.monotonic() + self.ttl)
+        self.creates += 1
+        tokens = self._token_estimates.get(system_prompt)
+        logger.info(f"Created prompt cache {cached.name} for {model} ({tokens} est. tokens).")
+
+    async def _refresh(self, caches: Any, key: Tuple[str, str], entry: _Entry) -> None:
+        from google.genai import types
+
+        try:
+            await caches.update(name=entry.name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s"))
+        except Exception as e:
+            # Dropping the entry makes the next lookup create a fresh cache
+            logger.warning(f"Prompt cache refresh failed for {entry.name}: {e}")
+            self._entries.pop(key, None)
+            return
+        entry.expires_at = time.monotonic() + self.ttl
+        self.refreshes += 1
+
+    async def close(self, caches: Any) -> None:
+        """Delete the caches this process created. Called from the FastAPI shutdown hook."""
+        for task in list(self._pending.values()):
+            task.cancel()
+        for entry in list(self._entries.values()):
+            try:
+                await caches.delete(name=entry.name)
+            except Exception as e:
+                logger.warning(f"Prompt cache delete failed for {entry.name}: {e}")
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Live caches and hit/miss/create/refresh/failure counters."""
+        return {
+            "enabled": self.enabled,
+            "caches": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "creates": self.creates,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+        }
+
+
+class InMemoryCachesAPI:
+    """Local stand-in for `client.aio.caches`, for tests and offline development.
+
+    Records created caches in `self.caches`; set `fail` to make every call raise.
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.fail = False
+        self.calls = {"create": 0, "update": 0, "delete": 0}
+        self._ids = itertools.count(1)
+
+    def _check(self, op: str):
+        self.calls[op] += 1
+        if self.fail:
+            raise RuntimeError(f"stub caches.{op} failure")
+
+    async def create(self, *, model: str, config: "types.CreateCachedContentConfig") -> "types.CachedContent":
+        """Store the config under a new local cache name."""
+        from google.genai import types
+
+        self._check("create")
+        name = f"cachedContents/local-{next(self._ids)}"
+        self.caches[name] = {"model": model, "system_instruction": config.system_instruction, "ttl": config.ttl}
+        return types.CachedContent(name=name, model=model, display_name=config.display_name)
+
+    async def update(self, *, name: str, config: "types.UpdateCachedContentConfig") -> "types.CachedContent":
+        """Change the TTL of a stored cache; KeyError if it doesn't exist."""
+        from google.genai import types
+
+        self._check("update")
+        if name not in self.caches:
+            raise KeyError(name)
+        self.caches[name]["ttl"] = config.ttl
+        return types.CachedContent(name=name, model=self.caches[name]["model"])
+
+    async def delete(self, *, name: str) -> None:
+        """Forget a stored cache."""
+        self._check("delete")
+        self.caches.pop(name, None)
@@ -898,3 +898,35 @@ If the information needed to answer the question is not provided in the context,
 please say "I don't have enough information to answer this question" rather than making up an answer.
 Make sure your answer maintains continuity with the previous conversation when appropriate.
 """
+
+# Rolling conversation summary, updated in the background as messages leave the session history
+CONVERSATION_SUMMARY_PROMPT = """
+You maintain a running summary of a tutoring conversation between a student ("user") and a computer science tutor ("bot").
+
+Current summary (may be empty):
+{previous_summary}
+
+Messages to fold into the summary, oldest first:
+{transcript}
+
+Write the updated summary in at most 150 words. Keep the problems and topics discussed, the student's
+preferred programming language, decisions and conclusions reached, and anything the student said they
+still don't understand. Drop greetings and code listings. Return only the summary text.
+"""
+
+LEETCODE_SOLUTION_PROMPT = (
+    "Here is the LeetCode problem description:\n\n"
+    "```\n{question}\n```\n\n"
+    "Please provide a comprehensive, step-by-step explanation and solution for this problem in the **{language}** programming language. "
+    "Adhere strictly to the following CS Tutor response structure:\n"
+    "1.  **Problem Refresher:** Briefly restate the goal.\n"
+    "2.  **Initial Thoughts / Brute Force (If Applicable):** Explain the simplest approach, its logic, and complexity.\n"
+    "3.  **Optimized Approach(es):** Describe the core idea (e.g., DP, two pointers, sliding window, greedy), explain the logic step-by-step, provide clean, well-commented **{language}** code, and analyze Time and Space Complexity.\n"
+    "4.  **Edge Cases/Considerations:** Mention any important edge cases or constraints.\n\n"
+    "Ensure the code is correct, runnable, and follows {language} best practices."
+)
+
+LEETCODE_VISUALIZATION_ADDENDUM = (
+    "\n\n**Additionally:** Based on the optimal algorithm discussed, generate the necessary JSON data to visualize its key steps or the primary data structure involved (e.g., array states, DP table build-up, tree/graph traversal). "
+    "Output this JSON *after* the textual explanation, enclosed in ```json ... ``` blocks. Use one of the standard visualization types (sorting, tree, graph, array, matrix, table, etc.) as defined previously."
+)
@@ -0,0 +1,290 @@
+# app/llm/semantic_cache.py
+import hashlib
+import importlib.util
+import math
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+_NUMPY = importlib.util.find_spec("numpy") is not None  # numpy is optional; without it a sparse index is used
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+_POSSESSIVE_RE = re.compile(r"['\u2019]s\b")
+# Question framing that doesn't change what is being asked ("explain X" / "what is X" / "tell me about X")
+_FRAMING_WORDS = frozenset(
+    "a an the what whats is are was were how does do did can could would will you please pls me tell explain "
+    "describe define give i it its this that to of about in on for work works working mean means some".split()
+)
+# Words that point back at earlier turns ("why is it faster?", "show that in java", "what about the other one")
+_FOLLOW_UP_RE = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|above|previous|earlier|again|same|instead|else|another|"
+    r"other one|you said|your answer|last one)\b|^\s*(and|but|so|also|then|ok(ay)?|what about|how about|why)\b",
+    re.IGNORECASE,
+)
+
+
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+def content_tokens(text: str) -> List[str]:
+    """Lowercased word tokens of `text` without question framing."""
+    return [t for t in _TOKEN_RE.findall(_POSSESSIVE_RE.sub("", text.lower())) if t not in _FRAMING_WORDS]
+
+
+def embed(text: str, dim: int = 1024) -> Dict[int, float]:
+    """Hashed word 1-2 gram and character 3-gram features of `text`, L2-normalized.
+
+    Returns a sparse `{bucket: weight}` vector; empty when the text has no content words.
+    Character grams are taken over the words run together, so "quick sort" and
+    "quicksort" land close to each other.
+    """
+    tokens = content_tokens(text)
+    vec: Dict[int, float] = {}
+
+    def add(feature: str, weight: float):
+        bucket, sign = _bucket(feature, dim)
+        vec[bucket] = vec.get(bucket, 0.0) + sign * weight
+
+    for token in tokens:
+        add("w:" + token, 1.0)
+    for first, second in zip(tokens, tokens[1:]):
+        add("b:" + first + " " + second, 1.0)
+    joined = "".join(tokens)
+    for i in range(len(joined) - 2):
+        add("c:" + joined[i:i + 3], 0.5)
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {k: v / norm for k, v in vec.items() if v} if norm else {}
+
+
+def depends_on_history(query: str, chat_history: Optional[Sequence[Mapping[str, str]]]) -> bool:
+    """Whether the answer to `query` may depend on the earlier turns of the conversation.
+
+    Without history nothing can depend on it. With history, follow-ups ("why is it
+    faster?", "what about heaps") and queries too short to stand alone are assumed to.
+    """
+    if not chat_history:
+        return False
+    return bool(_FOLLOW_UP_RE.search(query)) or len(content_tokens(query)) < 2
+
+
+def semantic_namespace(model: str, system_prompt: str) -> str:
+    """Partition of the cache: answers are only shared between turns using the same model and prompt."""
+    return hashlib.sha256(f"{model}\0{system_prompt}".encode("utf-8")).hexdigest()[:12]
+
+
+class _SparseIndex:
+    """Inverted index over sparse vectors, used when numpy isn't installed."""
+
+    def __init__(self):
+        self._rows: Dict[int, Tuple[int, Dict[int, float]]] = {}
+        self._postings: Dict[int, Dict[int, float]] = {}
+
+    def set(self, slot: int, namespace: int, vec: Dict[int, float]):
+        self.clear(slot)
+        self._rows[slot] = (namespace, vec)
+        for bucket, weight in vec.items():
+            self._postings.setdefault(bucket, {})[slot] = weight
+
+    def clear(self, slot: int):
+        row = self._rows.pop(slot, None)
+        if row is None:
+            return
+        for bucket in row[1]:
+            posting = self._postings[bucket]
+            del posting[slot]
+            if not posting:
+                del self._postings[bucket]
+
+    def best(self, namespace: int, vec: Dict[int, float]) -> Tuple[Optional[int], float]:
+        scores: Dict[int, float] = {}
+        for bucket, weight in vec.items():
+            for slot, other in self._postings.get(bucket, {}).items():
+                scores[slot] = scores.get(slot, 0.0) + weight * other
+        best_slot, best_score = None, -1.0
+        for slot, score in scores.items():
+            if score > best_score and self._rows[slot][0] == namespace:
+                best_slot, best_score = slot, score
+        return best_slot, best_score
+
+
+class _MatrixIndex:
+    """Dense `capacity x dim` float32 matrix of unit rows; top-1 cosine is one matrix-vector product."""
+
+    def __init__(self, capacity: int, dim: int):
+        import numpy as np  # Imported lazily to keep it off the boot path
+
+        self._np = np
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._namespaces = np.full(capacity, -1, dtype=np.int32)
+        self._dim = dim
+
+    def _dense(self, vec: Dict[int, float]):
+        dense = self._np.zeros(self._dim, dtype=self._np.float32)
+        dense[list(vec)] = list(vec.values())
+        return dense
+
+    def set(self, slot: int, namespace: int, vec: Dict[int, float]):
+        self._matrix[slot] = self._dense(vec)
+        self._namespaces[slot] = namespace
+
+    def clear(self, slot: int):
+        self._matrix[slot] = 0.0
+        self._namespaces[slot] = -1
+
+    def best(self, namespace: int, vec: Dict[int, float]) -> Tuple[Optional[int], float]:
+        scores = self._matrix @ self._dense(vec)
+        scores[self._namespaces != namespace] = -1.0
+        slot = int(scores.argmax())
+        if self._namespaces[slot] != namespace:
+            return None, -1.0
+        return slot, float(scores[slot])
+
+
+class _Entry:
+    __slots__ = ("namespace", "query", "answer", "expires_at")
+
+    def __init__(self, namespace: int, query: str, answer: str, expires_at: float):
+        self.namespace = namespace
+        self.query = query
+        self.answer = answer
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """Answers keyed by what a question means rather than its exact text.
+
+    Queries are embedded with `embed` and matched against stored questions by cosine
+    similarity; the closest one in the same namespace is a hit when it scores at least
+    `threshold`. Storing a question that matches an existing entry replaces that entry.
+    At most `max_entries` answers are kept, evicting the least recently used.
+    The index is a numpy matrix when numpy is installed, an inverted index otherwise.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 2000,
+        ttl: float = 7 * 24 * 3600,
+        dim: int = 1024,
+        use_numpy: Optional[bool] = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dim = dim
+        self.use_numpy = _NUMPY if use_numpy is None else use_numpy
+        self._index = _MatrixIndex(max_entries, dim) if self.use_numpy else _SparseIndex()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._namespaces: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _namespace_id(self, namespace: str) -> int:
+        return self._namespaces.setdefault(namespace, len(self._namespaces))
+
+    def _match(self, namespace: int, vec: Dict[int, float]) -> Optional[int]:
+        slot, score = self._index.best(namespace, vec)
+        if slot is None or score < self.threshold:
+            return None
+        if self._entries[slot].expires_at <= time.monotonic():
+            self._drop(slot)
+            self.expirations += 1
+            return None
+        return slot
+
+    def _drop(self, slot: int):
+        del self._entries[slot]
+        self._index.clear(slot)
+        self._free.append(slot)
+
+    def lookup(self, namespace: str, query: str) -> Optional[str]:
+        """Return the answer stored for a question close enough to `query`, or None."""
+        vec = embed(query, self.dim)
+        slot = self._match(self._namespace_id(namespace), vec) if vec else None
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(slot)
+        return self._entries[slot].answer
+
+    def store(self, namespace: str, query: str, answer: str) -> None:
+        """Remember `answer` for `query`, replacing the entry of an equivalent question if there is one."""
+        vec = embed(query, self.dim)
+        if not vec or not answer or self.max_entries <= 0:
+            return
+        namespace_id = self._namespace_id(namespace)
+        slot = self._match(namespace_id, vec)
+        if slot is not None:
+            self._drop(slot)
+        if not self._free:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+        slot = self._free.pop()
+        self._index.set(slot, namespace_id, vec)
+        self._entries[slot] = _Entry(namespace_id, query, answer, time.monotonic() + self.ttl)
+        self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, index kind and hit/miss/store/eviction counters."""
+        return {
+            "entries": len(self._entries),
+            "index": "numpy" if self.use_numpy else "sparse",
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Return the process-wide semantic cache, creating it on first use."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl=settings.SEMANTIC_CACHE_TTL,
+            dim=settings.SEMANTIC_CACHE_DIM,
+        )
+    return _semantic_cache
+
+
+def cacheable_question(query: str, chat_history: Optional[Sequence[Mapping[str, str]]]) -> bool:
+    """Whether a turn may be answered from, and stored in, the semantic cache.
+
+    Only short, self-contained questions qualify: pasted code or long problem statements
+    and follow-ups that lean on the conversation are always sent to the model.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return False
+    if len(query) > settings.SEMANTIC_CACHE_MAX_QUERY_CHARS or "```" in query:
+        return False
+    return not depends_on_history(query, chat_history)
+
+
+def _semantic_cache_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"enabled": settings.SEMANTIC_CACHE_ENABLED}
+    if _semantic_cache is not None:
+        stats.update(_semantic_cache.stats())
+    return stats
+
+
+metrics.register("semantic_cache", _semantic_cache_stats)
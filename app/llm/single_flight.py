@@ -0,0 +1,110 @@
+# app/llm/single_flight.py
+import asyncio
+import hashlib
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional, Sequence
+
+
+def single_flight_key(
+    model: str, system_prompt: str, chat_history: Optional[Sequence[Mapping[str, str]]], user_query: str
+) -> str:
+    """Identity of a generation: same model, system prompt, history and query produce the same key."""
+    history = [[msg["role"], msg["content"]] for msg in chat_history or ()]
+    payload = json.dumps([model, system_prompt, history, user_query], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """One upstream stream and the chunks it has produced so far."""
+
+    __slots__ = ("chunks", "done", "error", "subscribers", "task", "_changed")
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait(self):
+        await self._changed.wait()
+
+
+class StreamFanout:
+    """Runs one upstream stream per key and fans its chunks out to every subscriber.
+
+    The upstream runs in its own task, so any subscriber may disconnect without affecting
+    the others; it is cancelled only once every subscriber has gone. Subscribers that join
+    late first receive the chunks already produced, so each one sees the whole answer.
+    A key stays joinable only while its stream is in flight.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+        self.abandoned = 0
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Yield the chunks of the stream for `key`, starting `factory()` if none is in flight."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, factory))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.subscribers += 1
+        try:
+            position = 0
+            while True:
+                if position < len(flight.chunks):
+                    chunk = flight.chunks[position]
+                    position += 1
+                    yield chunk
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; stop paying for tokens
+                self.abandoned += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _produce(self, key: str, flight: _Flight, factory: Callable[[], AsyncIterator[str]]):
+        try:
+            async for chunk in factory():
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.notify()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Upstream streams started, subscribers that joined one in flight, and abandoned streams."""
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "joined": self.joined,
+            "abandoned": self.abandoned,
+        }
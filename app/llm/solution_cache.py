@@ -0,0 +1,112 @@
+# app/llm/solution_cache.py
+import hashlib
+import re
+from typing import Any, Dict, Iterator, Optional
+
+from app.core import metrics
+from app.core.cache import CacheBackend, build_cache
+from app.core.config import settings
+from app.llm.prompts import CS_TUTOR_PROMPT, LEETCODE_SOLUTION_PROMPT, LEETCODE_VISUALIZATION_ADDENDUM
+
+# Spellings users type for the same language; the value is the canonical name used in cache keys
+LANGUAGE_ALIASES = {
+    "python": ("python", "python3", "py", "py3", "python 3"),
+    "java": ("java",),
+    "cpp": ("c++", "cpp", "cplusplus", "c plus plus"),
+    "c": ("c", "ansi c"),
+    "csharp": ("c#", "csharp", "c sharp", "cs"),
+    "javascript": ("javascript", "js", "node", "nodejs", "node.js"),
+    "typescript": ("typescript", "ts"),
+    "go": ("go", "golang"),
+    "rust": ("rust", "rs"),
+    "kotlin": ("kotlin", "kt"),
+    "swift": ("swift",),
+    "ruby": ("ruby", "rb"),
+    "php": ("php",),
+    "scala": ("scala",),
+    "dart": ("dart",),
+}
+_ALIASES = {alias: name for name, aliases in LANGUAGE_ALIASES.items() for alias in aliases}
+_FILLER_RE = re.compile(r"^(?:in|use|using|with|please|pls|the)\s+|\s+(?:please|pls|language|lang|code)$")
+
+# Changes whenever the prompts or model that produce a solution change, so stale answers are never replayed
+PROMPT_VERSION = hashlib.sha256(
+    "\0".join(
+        (CS_TUTOR_PROMPT, LEETCODE_SOLUTION_PROMPT, LEETCODE_VISUALIZATION_ADDENDUM,
+         settings.GEMINI_MODEL, settings.SOLUTION_PROMPT_VERSION)
+    ).encode("utf-8")
+).hexdigest()[:12]
+
+# Characters per replayed SSE text event
+REPLAY_CHUNK_CHARS = 400
+
+_solution_cache: Optional[CacheBackend] = None
+
+
+def canonical_language(language: str) -> Optional[str]:
+    """Map what the user typed ("Python3", "in c++ please") to a canonical language, or None if unknown."""
+    text = " ".join(language.strip().lower().rstrip(".!").split())
+    previous = None
+    while text != previous:
+        previous, text = text, _FILLER_RE.sub("", text)
+    return _ALIASES.get(text)
+
+
+def solution_key(title_slug: Optional[str], language: str, visualization: bool) -> Optional[str]:
+    """Cache key for a generated solution, or None when the answer shouldn't be shared."""
+    canonical = canonical_language(language)
+    if not title_slug or not canonical:
+        return None
+    return f"{title_slug}:{canonical}:{int(bool(visualization))}:{PROMPT_VERSION}"
+
+
+def _get_solution_cache() -> CacheBackend:
+    """Return the solution cache, creating it on first use."""
+    global _solution_cache
+    if _solution_cache is None:
+        _solution_cache = build_cache(
+            "solutions",
+            backend=settings.SOLUTION_CACHE_BACKEND,
+            max_entries=settings.SOLUTION_CACHE_MAX_ENTRIES,
+            max_bytes=settings.SOLUTION_CACHE_MAX_BYTES,
+            ttl=settings.SOLUTION_CACHE_TTL,
+            cache_dir=settings.CACHE_DIR,
+        )
+    return _solution_cache
+
+
+async def get_solution(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Return the cached `{"text", "visualization"}` answer for a key, or None."""
+    if not key or not settings.SOLUTION_CACHE_ENABLED:
+        return None
+    return await _get_solution_cache().aget(key)
+
+
+async def store_solution(key: Optional[str], text: str, visualization: Optional[Dict[str, Any]] = None) -> None:
+    """Cache a complete, successfully generated answer."""
+    if not key or not text or not settings.SOLUTION_CACHE_ENABLED:
+        return
+    await _get_solution_cache().aset(key, {"text": text, "visualization": visualization})
+
+
+def replay_chunks(text: str, size: int = REPLAY_CHUNK_CHARS) -> Iterator[str]:
+    """Split a cached answer into stream-sized pieces, breaking after newlines where possible."""
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start + size // 2, end)
+            if newline != -1:
+                end = newline + 1
+        yield text[start:end]
+        start = end
+
+
+def _solution_cache_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"enabled": settings.SOLUTION_CACHE_ENABLED, "prompt_version": PROMPT_VERSION}
+    if _solution_cache is not None:
+        stats.update(_solution_cache.stats())
+    return stats
+
+
+metrics.register("solution_cache", _solution_cache_stats)
@@ -1,11 +1,19 @@
 # FastAPI app initialization
+import asyncio
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import chat, health
+from app.api import chat, health, problems
 from app.core.config import settings
 from app.core.logger import logger
+from app.database.message_queue import message_queue
 from app.database.supabase_client import SupabaseManager
+from app.llm import gemini_integration
+from app.llm.intent_classifier import local_classifier
+from app.scrapers import leetcode_scraper
+from app.scrapers.http_client import close_http_client, start_http_client
 
 app = FastAPI(title="CodeQuest101 Chatbot Backend")
 
@@ -21,6 +29,7 @@ app.add_middleware(
 # Include routers
 app.include_router(chat.router)
 app.include_router(health.router)
+app.include_router(problems.router)
 
 
 @app.on_event("startup")
@@ -29,11 +38,28 @@ async def startup_event():
     # Initialize Supabase client on startup (optional, can also be lazy-loaded)
     logger.info(f"CORS_ORIGINS set to: {settings.CORS_ORIGINS}")
     SupabaseManager.get_client()  # Initialize Supabase client at startup
+    message_queue.start()
+    await start_http_client()
+    # Serve the last known problems list immediately; refresh it in the background
+    leetcode_scraper.load_problems_snapshot(os.path.join(settings.CACHE_DIR, "leetcode_problems.json.gz"))
+    leetcode_scraper.start_problems_refresher()
+    chat.chat_memory.start_sweeper()
+    # Build the Gemini client in a worker thread; the app starts serving without waiting for it
+    asyncio.get_running_loop().run_in_executor(None, gemini_integration.warm_up)
+    # Same for the local intent model; until it is trained, uncertain queries go to the LLM
+    asyncio.get_running_loop().run_in_executor(None, local_classifier.train)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down the application...")
+    await chat.chat_memory.stop_sweeper()
+    await chat.summarizer.stop()
+    await leetcode_scraper.stop_problems_refresher()
+    await close_http_client()
+    await gemini_integration.close_prompt_cache()
+    await message_queue.stop()  # Flush pending messages before the DB pool goes away
+    SupabaseManager.shutdown()
 
 
 if __name__ == "__main__":
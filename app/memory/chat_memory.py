@@ -1,40 +1,293 @@
 # app/memory/chat_memory.py
+import asyncio
+import sys
+import time
+import zlib
 from collections import deque
-from typing import Any, Dict, List
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.cache import _sizeof
+from app.core.logger import logger
+
+# Messages pushed out of history wait here (newest kept) until the summarizer folds them in
+MAX_EVICTED_MESSAGES = 20
+
+# Bot answers at least this long are kept zlib-compressed (solutions with code run to several KB)
+COMPRESS_MIN_CHARS = 2048
+
+
+class Role(str, Enum):
+    """Message author. Members are singletons, so every message shares the same role object."""
+
+    USER = "user"
+    BOT = "bot"
+
+
+_ROLES = {role.value: role for role in Role}
+
+
+class Message:
+    """Immutable, slotted chat message.
+
+    Supports `msg["role"]`, `msg["content"]` and `msg.get(...)` so code written against the
+    old `{"role": ..., "content": ...}` dicts keeps working, and compares equal to such a dict.
+    """
+
+    __slots__ = ("role", "_text", "_packed", "_tokens")
+
+    def __init__(self, role: str, content: str):
+        self.role = _ROLES.get(role) or sys.intern(role)
+        self._text: Optional[str] = content
+        self._packed: Optional[bytes] = None
+        self._tokens: Optional[int] = None
+        if self.role is Role.BOT and len(content) >= COMPRESS_MIN_CHARS:
+            packed = zlib.compress(content.encode("utf-8"), 6)
+            if len(packed) < len(content) * 0.8:  # Only keep it when it actually saves memory
+                self._text = None
+                self._packed = packed
+
+    @property
+    def content(self) -> str:
+        """Message text, decompressed on access for packed answers."""
+        if self._text is not None:
+            return self._text
+        return zlib.decompress(self._packed).decode("utf-8")
+
+    @property
+    def tokens(self) -> int:
+        """Estimated prompt tokens, computed once per message."""
+        if self._tokens is None:
+            from app.memory.context_window import estimate_tokens  # Avoid circular import
+            self._tokens = estimate_tokens(self.content)
+        return self._tokens
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this message."""
+        payload = self._text if self._text is not None else self._packed
+        return sys.getsizeof(self) + sys.getsizeof(payload)
+
+    def __getitem__(self, key: str) -> str:
+        if key == "role":
+            return str(self.role.value if isinstance(self.role, Role) else self.role)
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style `get` for "role" and "content"."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return the message as a `{"role": ..., "content": ...}` dict."""
+        return {"role": self["role"], "content": self.content}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Message):
+            return self.role == other.role and self.content == other.content
+        if isinstance(other, dict):
+            return other == self.as_dict()
+        return NotImplemented
+
+    __hash__ = None  # Compared by value like the dicts it replaces
+
+    def __repr__(self) -> str:
+        return f"Message({self['role']!r}, {self.content[:40]!r})"
 
 
 class ChatSession:
     """Manages the chat history and state for a single session."""
 
-    def __init__(self, session_id: str, max_history_length: int = 5):
+    __slots__ = (
+        "session_id", "history", "evicted", "state", "last_access", "nbytes", "_state_sizes", "_on_resize",
+    )
+
+    def __init__(self, session_id: str, max_history_length: int = 5,
+                 on_resize: Optional[Callable[[int], None]] = None):
         self.session_id = session_id
-        self.history: deque[Dict[str, str]] = deque(maxlen=max_history_length)
+        self.history: deque[Message] = deque(maxlen=max_history_length)
+        # Messages that rolled out of `history` and are not yet in the conversation summary
+        self.evicted: deque[Message] = deque()
         self.state: Dict[str, Any] = {}  # Added state dictionary
+        self.last_access = time.monotonic()
+        # Approximate footprint, kept current by add_message/set_state
+        self.nbytes = 0
+        self._state_sizes: Dict[str, int] = {}
+        self._on_resize = on_resize
+
+    def _resize(self, delta: int):
+        self.nbytes += delta
+        if self._on_resize and delta:
+            self._on_resize(delta)
 
     def add_message(self, role: str, content: str):
         """Add a message to the session's history."""
-        self.history.append({"role": role, "content": content})
+        message = Message(role, content)
+        if self.history.maxlen is not None and len(self.history) == self.history.maxlen:
+            self._keep_evicted([self.history[0]])
+        self.history.append(message)
+        self._resize(message.nbytes)
+
+    def _keep_evicted(self, messages: List[Message], front: bool = False):
+        if front:
+            self.evicted.extendleft(reversed(messages))
+        else:
+            self.evicted.extend(messages)
+        # The rolled-out message stays accounted for while it waits; only what's dropped here is freed
+        delta = 0
+        while len(self.evicted) > MAX_EVICTED_MESSAGES:
+            delta -= self.evicted.popleft().nbytes
+        self._resize(delta)
+
+    def evict(self, messages: List[Message]):
+        """Move `messages` (records from `history`) out of the history to wait for the summarizer."""
+        ids = {id(message) for message in messages}
+        moved = [message for message in self.history if id(message) in ids]
+        if not moved:
+            return
+        kept = [message for message in self.history if id(message) not in ids]
+        self.history.clear()
+        self.history.extend(kept)
+        self._keep_evicted(moved)
 
-    def get_history(self) -> List[Dict[str, str]]:
-        """Return the current chat history."""
-        return list(self.history)
+    def discard_evicted(self, messages: List[Message]):
+        """Drop waiting messages equal to `messages` (e.g. folded into the summary by another copy)."""
+        delta = 0
+        for message in messages:
+            for i, waiting in enumerate(self.evicted):
+                if waiting == message:
+                    delta -= waiting.nbytes
+                    del self.evicted[i]
+                    break
+        self._resize(delta)
+
+    def take_evicted(self) -> List[Message]:
+        """Remove and return the messages waiting to be summarized, oldest first."""
+        messages = list(self.evicted)
+        self.evicted.clear()
+        self._resize(-sum(message.nbytes for message in messages))
+        return messages
+
+    def restore_evicted(self, messages: List[Message]):
+        """Put messages back (e.g. after a failed summary) ahead of any evicted since."""
+        self._resize(sum(message.nbytes for message in messages))
+        self._keep_evicted(messages, front=True)
+
+    def get_history(self, context_window_size: Optional[int] = None) -> List[Message]:
+        """Return the current chat history (optionally only the last `context_window_size` messages).
+
+        The result is a snapshot list of references to the shared immutable records, not
+        per-turn dict copies; messages added later in the turn don't appear in it.
+        """
+        history = list(self.history)
+        if context_window_size is not None and context_window_size < len(history):
+            del history[:len(history) - context_window_size]
+        return history
 
     def set_state(self, key: str, value: Any):
         """Set a state variable for the session."""
         self.state[key] = value
+        size = _sizeof(value) if value is not None else 0
+        self._resize(size - self._state_sizes.get(key, 0))
+        self._state_sizes[key] = size
 
     def get_state(self, key: str, default: Any = None) -> Any:
         """Get a state variable from the session."""
         return self.state.get(key, default)
 
 class ChatMemory:
-    """Manages multiple chat sessions."""
+    """Manages multiple chat sessions on top of a pluggable SessionStore.
+
+    Defaults to an in-process LRU store bounded by `max_sessions`, `max_bytes` and an idle
+    `ttl`; pass a shared store (e.g. SQLiteSessionStore) for multi-worker deployments.
+    Sessions changed during a turn must be handed back with `save_session`. Request handlers
+    use `aget_session`/`asave_session`, which keep a shared store's I/O off the event loop.
+    """
 
-    def __init__(self):
-        self.sessions: Dict[str, ChatSession] = {}
+    def __init__(self, max_sessions: int = 0, max_bytes: int = 0, ttl: Optional[float] = None,
+                 sweep_interval: float = 60.0, store: Any = None):
+        if store is None:
+            from app.memory.session_store import InMemorySessionStore  # Avoid circular import
+            store = InMemorySessionStore(max_sessions=max_sessions, max_bytes=max_bytes, ttl=ttl)
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[asyncio.Task] = None
 
     def get_session(self, session_id: str, max_history_length: int = 5) -> ChatSession:
         """Retrieve or create a chat session."""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = ChatSession(session_id, max_history_length=max_history_length)
-        return self.sessions[session_id]
+        session = self.store.get(session_id)
+        if session is None:
+            session = ChatSession(session_id, max_history_length=max_history_length)
+            self.store.put(session)
+        return session
+
+    def save_session(self, session: ChatSession) -> None:
+        """Write a session back to the store after a turn changed it."""
+        self.store.put(session)
+
+    async def aget_session(self, session_id: str, max_history_length: int = 5) -> ChatSession:
+        """Async `get_session`; a shared store's blocking I/O runs in the default executor."""
+        if not self.store.shared:
+            return self.get_session(session_id, max_history_length)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get_session, session_id, max_history_length
+        )
+
+    async def asave_session(self, session: ChatSession) -> None:
+        """Async `save_session`; a shared store's blocking I/O runs in the default executor."""
+        if not self.store.shared:
+            self.save_session(session)
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.save_session, session)
+
+    def update_session(self, session_id: str, apply: Callable[[ChatSession], None]) -> bool:
+        """Apply a change to the stored session only (see `SessionStore.update`)."""
+        return self.store.update(session_id, apply)
+
+    async def aupdate_session(self, session_id: str, apply: Callable[[ChatSession], None]) -> bool:
+        """Async `update_session`; a shared store's blocking I/O runs in the default executor."""
+        if not self.store.shared:
+            return self.update_session(session_id, apply)
+        return await asyncio.get_running_loop().run_in_executor(None, self.update_session, session_id, apply)
+
+    def sweep(self) -> int:
+        """Evict idle sessions and enforce limits. Returns the number evicted."""
+        evicted = self.store.sweep()
+        if evicted:
+            logger.info(f"Chat memory sweep evicted {evicted} sessions ({len(self.store)} remaining).")
+        return evicted
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                if self.store.shared:
+                    # Shared stores do blocking I/O; keep it off the event loop
+                    await asyncio.get_running_loop().run_in_executor(None, self.sweep)
+                else:
+                    self.sweep()
+            except Exception as e:
+                logger.error(f"Chat memory sweep failed: {e}", exc_info=True)
+
+    def start_sweeper(self):
+        """Start the periodic sweep task. Called from the FastAPI startup hook."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop_sweeper(self):
+        """Cancel the periodic sweep task."""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Store backend, session count and eviction counters."""
+        return self.store.stats()
@@ -0,0 +1,105 @@
+# app/memory/context_window.py
+import re
+from typing import Any, List, Mapping, Sequence, Tuple
+
+# Approximates subword tokenizers: words split into <=4-char pieces, each punctuation mark on its own
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+_ELISION = "\n[... earlier part of this answer omitted ...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of how many model tokens `text` costs."""
+    return sum(1 for _ in _TOKEN_RE.finditer(text))
+
+
+_ELISION_TOKENS = estimate_tokens(_ELISION)
+# Older answers aren't squeezed into less room than this; a marker with a few words around it isn't worth sending
+_MIN_ELIDED_TOKENS = 32
+
+
+def _tokens(message: Any) -> int:
+    tokens = getattr(message, "tokens", None)  # Message records cache their estimate
+    return tokens if tokens is not None else estimate_tokens(message["content"])
+
+
+def _elide(content: str, max_tokens: int) -> str:
+    """Keep the opening and the end of a long answer within `max_tokens` estimated tokens.
+
+    Returns "" when not even the elision marker fits.
+    """
+    total = estimate_tokens(content)
+    if total <= max_tokens:
+        return content
+    room = max_tokens - _ELISION_TOKENS
+    if room <= 0:
+        return ""
+    # Start from the answer's own characters-per-token ratio (code and JSON run near 2, prose near 4)
+    # and shrink until `estimate_tokens` agrees. Keep 2/3 from the start (approach), 1/3 from the end (result)
+    budget_chars = room * len(content) // total
+    while budget_chars >= 3:
+        head = content[: budget_chars * 2 // 3]
+        tail = content[len(content) - budget_chars // 3:]
+        elided = head.rstrip() + _ELISION + tail.lstrip()
+        tokens = estimate_tokens(elided)
+        if tokens <= max_tokens:
+            return elided
+        budget_chars = budget_chars * room // (tokens - _ELISION_TOKENS) - 1
+    return ""
+
+
+def split_context(
+    history: Sequence[Mapping[str, str]],
+    budget_tokens: int,
+    keep_recent: int = 2,
+    elide_over_tokens: int = 400,
+) -> Tuple[List[Mapping[str, str]], List[Mapping[str, str]]]:
+    """Select history for the prompt within `budget_tokens`, newest first.
+
+    - The newest message is always included, elided to the budget if it is too long on its own.
+    - The newest `keep_recent` messages are kept whole when they fit.
+    - Older bot answers longer than `elide_over_tokens` are cut down to their opening and end.
+    - An older bot answer that doesn't fit is elided to the remaining budget (if at least
+      `_MIN_ELIDED_TOKENS` are left); any other message that doesn't fit is skipped, and older
+      messages that still fit are kept.
+
+    Returns `(context, excluded)`, both in chronological order: the messages for the prompt
+    (untouched entries are the original records) and the original records left out entirely.
+    """
+    selected: List[Mapping[str, str]] = []
+    excluded: List[Mapping[str, str]] = []
+    remaining = budget_tokens
+    for position, original in enumerate(reversed(history)):
+        if remaining <= 0:
+            excluded.append(original)
+            continue
+        message = original
+        tokens = _tokens(message)
+        is_bot = message["role"] != "user"
+        if is_bot and position >= keep_recent and tokens > elide_over_tokens:
+            message = {"role": message["role"], "content": _elide(message["content"], elide_over_tokens)}
+            tokens = estimate_tokens(message["content"])
+        if tokens > remaining:
+            if position and (not is_bot or remaining < _MIN_ELIDED_TOKENS):
+                excluded.append(original)
+                continue
+            content = _elide(message["content"], remaining)
+            if not content:
+                excluded.append(original)
+                continue
+            message = {"role": message["role"], "content": content}
+            tokens = estimate_tokens(content)
+        selected.append(message)
+        remaining -= tokens
+    selected.reverse()
+    excluded.reverse()
+    return selected, excluded
+
+
+def build_context(
+    history: Sequence[Mapping[str, str]],
+    budget_tokens: int,
+    keep_recent: int = 2,
+    elide_over_tokens: int = 400,
+) -> List[Mapping[str, str]]:
+    """Return only the prompt history chosen by `split_context`."""
+    return split_context(history, budget_tokens, keep_recent, elide_over_tokens)[0]
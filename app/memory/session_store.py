@@ -0,0 +1,362 @@
+# app/memory/session_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from app.core.logger import logger
+from app.memory.chat_memory import ChatSession, Message
+
+# Payloads at least this large are zlib-compressed (scraped questions dominate session size)
+_COMPRESS_MIN_BYTES = 512
+_RAW, _ZLIB = b"j", b"z"
+_ROLE_CODES = {"user": "u", "bot": "b"}
+_ROLE_NAMES = {code: role for role, code in _ROLE_CODES.items()}
+
+
+def serialize_session(session: ChatSession) -> bytes:
+    """Encode a session as compact JSON, zlib-compressed when large. First byte tags the encoding."""
+    payload = {
+        "m": session.history.maxlen,
+        # [role code, content] pairs instead of {"role": ..., "content": ...} dicts
+        "h": [[_ROLE_CODES.get(msg["role"], msg["role"]), msg["content"]] for msg in session.history],
+        "s": {key: value for key, value in session.state.items() if value is not None},
+    }
+    if session.evicted:
+        payload["e"] = [[_ROLE_CODES.get(msg["role"], msg["role"]), msg["content"]] for msg in session.evicted]
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        return _ZLIB + zlib.compress(data, 6)
+    return _RAW + data
+
+
+def deserialize_session(session_id: str, blob: bytes) -> ChatSession:
+    """Rebuild a ChatSession from `serialize_session` output."""
+    tag, data = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        data = zlib.decompress(data)
+    payload = json.loads(data)
+    session = ChatSession(session_id, max_history_length=payload["m"])
+    for role, content in payload["h"]:
+        session.add_message(_ROLE_NAMES.get(role, role), content)
+    for key, value in payload["s"].items():
+        session.set_state(key, value)
+    if payload.get("e"):
+        session.restore_evicted([Message(_ROLE_NAMES.get(role, role), content) for role, content in payload["e"]])
+    return session
+
+
+class SessionStore:
+    """Where ChatMemory keeps sessions between turns.
+
+    `get` returns a session to work on; callers hand it back with `put` once the turn has
+    changed it, so stores that copy sessions out of shared storage see the update.
+    """
+
+    # True when the store is shared across processes and does blocking I/O; ChatMemory then
+    # runs its calls in the executor
+    shared = False
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return the session, or None if it is unknown or expired."""
+        raise NotImplementedError
+
+    def put(self, session: ChatSession) -> None:
+        """Add or update a session."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session."""
+        raise NotImplementedError
+
+    def update(self, session_id: str, apply: Callable[[ChatSession], None]) -> bool:
+        """Run `apply` on the stored session and keep the result, without writing any other copy.
+
+        Used for changes made in the background (the conversation summary) that must not
+        overwrite turns stored since the caller loaded the session. Returns False if the
+        session is gone.
+        """
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Evict expired sessions and enforce bounds. Returns the number evicted."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend name, session count and counters for the metrics endpoint."""
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """Per-process store holding live ChatSession objects.
+
+    Sessions are kept in least-recently-used order and bounded by count, total approximate
+    bytes and an idle TTL; 0/None disables a limit.
+    """
+
+    def __init__(self, max_sessions: int = 0, max_bytes: int = 0, ttl: Optional[float] = None):
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.evictions = {"expired": 0, "max_sessions": 0, "max_bytes": 0}
+
+    def _on_resize(self, delta: int):
+        self.total_bytes += delta
+
+    def _expired(self, session: ChatSession, now: float) -> bool:
+        return bool(self.ttl) and now - session.last_access > self.ttl
+
+    def _evict(self, session_id: str, reason: str):
+        session = self.sessions.pop(session_id)
+        self.total_bytes -= session.nbytes
+        session._on_resize = None
+        self.evictions[reason] += 1
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return the live session, or None if it is unknown or idle past the TTL."""
+        now = time.monotonic()
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self._expired(session, now):
+            self._evict(session_id, "expired")
+            return None
+        self.sessions.move_to_end(session_id)
+        session.last_access = now
+        self._enforce_limits(keep=session_id)
+        return session
+
+    def put(self, session: ChatSession) -> None:
+        """Add or touch a session, evicting least-recently-used ones over the bounds."""
+        if self.sessions.get(session.session_id) is not session:
+            self.delete(session.session_id)
+            self.sessions[session.session_id] = session
+            session._on_resize = self._on_resize
+            self.total_bytes += session.nbytes
+        session.last_access = time.monotonic()
+        self.sessions.move_to_end(session.session_id)
+        self._enforce_limits(keep=session.session_id)
+
+    def update(self, session_id: str, apply: Callable[[ChatSession], None]) -> bool:
+        """Apply the change to the live session; there is only one copy."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        apply(session)
+        return True
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session and release its accounted bytes."""
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= session.nbytes
+            session._on_resize = None
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        """Evict least-recently-used sessions until within bounds, never evicting `keep`."""
+        while self.sessions:
+            if self.max_sessions and len(self.sessions) > self.max_sessions:
+                reason = "max_sessions"
+            elif self.max_bytes and self.total_bytes > self.max_bytes:
+                reason = "max_bytes"
+            else:
+                break
+            oldest = next(iter(self.sessions))
+            if oldest == keep:
+                break
+            self._evict(oldest, reason)
+
+    def sweep(self) -> int:
+        """Evict expired sessions and enforce bounds.
+
+        Sessions are in access order, so expired ones are all at the front and the sweep
+        touches only those rather than scanning every session.
+        """
+        before = sum(self.evictions.values())
+        now = time.monotonic()
+        while self.sessions:
+            oldest_id, oldest = next(iter(self.sessions.items()))
+            if not self._expired(oldest, now):
+                break
+            self._evict(oldest_id, "expired")
+        self._enforce_limits()
+        return sum(self.evictions.values()) - before
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        """Session count, approximate bytes and eviction counters."""
+        return {
+            "backend": "memory",
+            "sessions": len(self.sessions),
+            "bytes": self.total_bytes,
+            "evictions": dict(self.evictions),
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions serialized into a WAL-mode SQLite file shared by every worker on the host.
+
+    Any worker can pick up the next turn of a conversation (e.g. the `awaiting_language`
+    LeetCode flow). Put the file on tmpfs (/dev/shm) to keep it in shared memory.
+    Concurrent turns for the same session are last-writer-wins.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, max_sessions: int = 0, ttl: Optional[float] = None):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.evictions = {"expired": 0, "max_sessions": 0}
+        self.reads = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Load and deserialize a session; None if it is unknown, expired or unreadable."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Session store read failed for {session_id}: {e}")
+            return None
+        if row is None:
+            return None
+        if self.ttl and time.time() - row[1] > self.ttl:
+            self.delete(session_id)
+            self.evictions["expired"] += 1
+            return None
+        self.reads += 1
+        try:
+            return deserialize_session(session_id, row[0])
+        except (ValueError, KeyError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable stored session {session_id}: {e}")
+            return None
+
+    def put(self, session: ChatSession) -> None:
+        """Serialize and write a session, replacing the stored copy."""
+        try:
+            blob = serialize_session(session)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, updated_at) VALUES (?, ?, ?)",
+                    (session.session_id, blob, time.time()),
+                )
+            self.writes += 1
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Session store write failed for {session.session_id}: {e}")
+
+    def update(self, session_id: str, apply: Callable[[ChatSession], None]) -> bool:
+        """Read, change and write back the stored session in one write transaction."""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")  # Holds the write lock against other workers
+                try:
+                    row = self._conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                    if row is None:
+                        self._conn.execute("ROLLBACK")
+                        return False
+                    session = deserialize_session(session_id, row[0])
+                    apply(session)
+                    # updated_at is left alone: a background change isn't activity on the session
+                    self._conn.execute(
+                        "UPDATE sessions SET data = ? WHERE id = ?", (serialize_session(session), session_id)
+                    )
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+            self.writes += 1
+            return True
+        except (sqlite3.Error, TypeError, ValueError, KeyError, zlib.error) as e:
+            logger.warning(f"Session store update failed for {session_id}: {e}")
+            return False
+
+    def delete(self, session_id: str) -> None:
+        """Delete a session's row."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        """Delete rows idle past the TTL, then the oldest beyond `max_sessions`."""
+        evicted = 0
+        with self._lock:
+            if self.ttl:
+                cursor = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+                self.evictions["expired"] += cursor.rowcount
+                evicted += cursor.rowcount
+            if self.max_sessions:
+                excess = self._count() - self.max_sessions
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evictions["max_sessions"] += excess
+                    evicted += excess
+        return evicted
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Session count, read/write and eviction counters."""
+        return {
+            "backend": "sqlite",
+            "sessions": len(self),
+            "reads": self.reads,
+            "writes": self.writes,
+            "evictions": dict(self.evictions),
+        }
+
+
+def build_session_store(
+    backend: str = "memory",
+    max_sessions: int = 0,
+    max_bytes: int = 0,
+    ttl: Optional[float] = None,
+    path: str = "cache/sessions.sqlite3",
+) -> SessionStore:
+    """Create a session store by backend name: "memory" (per-process) or "sqlite" (shared on-host)."""
+    if backend == "memory":
+        return InMemorySessionStore(max_sessions=max_sessions, max_bytes=max_bytes, ttl=ttl)
+    if backend == "sqlite":
+        try:
+            return SQLiteSessionStore(path, max_sessions=max_sessions, ttl=ttl)
+        except sqlite3.Error as e:
+            logger.error(f"Could not open session store at {path}: {e}. Falling back to memory.")
+            return InMemorySessionStore(max_sessions=max_sessions, max_bytes=max_bytes, ttl=ttl)
+    raise ValueError(f"Unknown session store backend: {backend}")
+
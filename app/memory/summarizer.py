@@ -0,0 +1,96 @@
+# app/memory/summarizer.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.logger import logger
+from app.memory.chat_memory import ChatSession
+
+# Session state key holding the running summary of messages that left the history window
+SUMMARY_STATE_KEY = "conversation_summary"
+SUMMARY_PREFIX = "[Summary of the earlier conversation]\n"
+
+Summarize = Callable[[str, List[Any]], Awaitable[Optional[str]]]
+# (session_id, apply) -> applies the change to the stored copy of the session, e.g. ChatMemory.aupdate_session
+UpdateStored = Callable[[str, Callable[[ChatSession], None]], Awaitable[Any]]
+
+
+def summary_message(session: ChatSession) -> Optional[Dict[str, str]]:
+    """Return the running summary as a history entry to prepend to the prompt, or None."""
+    summary = session.get_state(SUMMARY_STATE_KEY)
+    if not summary:
+        return None
+    return {"role": "user", "content": SUMMARY_PREFIX + summary}
+
+
+class RollingSummarizer:
+    """Folds messages evicted from a session's history into its running summary.
+
+    Runs after a turn has finished streaming, as one background task per session; a turn
+    that ends while its session is still being summarized leaves its evictions for the next
+    run. Only the evicted messages and the previous summary are sent, never the transcript.
+    """
+
+    def __init__(self, summarize: Summarize, min_messages: int = 2):
+        self.summarize = summarize
+        self.min_messages = min_messages
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def schedule(self, session: ChatSession, update_stored: Optional[UpdateStored] = None) -> bool:
+        """Start summarizing `session` in the background if it has enough evicted messages.
+
+        `update_stored` writes the new summary to the session's stored copy (see
+        `SessionStore.update`). Only the summary and the folded messages are changed there, so
+        turns stored while the summary was being written are kept. Returns True if a task was started.
+        """
+        if len(session.evicted) < self.min_messages:
+            return False
+        if session.session_id in self._tasks:
+            self.skipped += 1
+            return False
+        # Taken now so messages evicted while this run is in flight wait for the next one
+        task = asyncio.create_task(self._run(session, session.take_evicted(), update_stored))
+        self._tasks[session.session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session.session_id, None))
+        return True
+
+    async def _run(self, session: ChatSession, messages: List[Any], update_stored: Optional[UpdateStored]):
+        previous = session.get_state(SUMMARY_STATE_KEY) or ""
+        try:
+            summary = await self.summarize(previous, messages)
+        except Exception as e:
+            logger.error(f"[Session: {session.session_id}] Conversation summary failed: {e}", exc_info=True)
+            summary = None
+        if not summary:
+            # Keep the messages for the next attempt
+            session.restore_evicted(messages)
+            self.failures += 1
+            return
+        session.set_state(SUMMARY_STATE_KEY, summary)
+        self.runs += 1
+        logger.info(f"[Session: {session.session_id}] Folded {len(messages)} messages into the conversation summary.")
+        if update_stored is None:
+            return
+
+        def apply(stored: ChatSession):
+            if stored is session:
+                return  # In-process store: already updated above
+            stored.set_state(SUMMARY_STATE_KEY, summary)
+            # A copy saved before this run still lists the folded messages as waiting
+            stored.discard_evicted(messages)
+
+        try:
+            await update_stored(session.session_id, apply)
+        except Exception as e:
+            logger.error(f"[Session: {session.session_id}] Saving conversation summary failed: {e}")
+
+    async def stop(self):
+        """Wait for in-flight summaries to finish. Called from the FastAPI shutdown hook."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summaries written, failed and skipped (already running), plus in-flight tasks."""
+        return {"runs": self.runs, "failures": self.failures, "skipped": self.skipped, "in_flight": len(self._tasks)}
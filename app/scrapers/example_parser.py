@@ -0,0 +1,242 @@
+# app/scrapers/example_parser.py
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Values longer than this are kept as raw strings instead of being parsed (huge constraint arrays)
+MAX_VALUE_CHARS = 20000
+MAX_NESTING_DEPTH = 32
+
+# One scan over the content finds every token of the "Example N: Input: ... Output: ... Explanation:" grammar.
+# Design problems put a bare "Input"/"Output" on its own line instead. The leading lookahead lets the
+# engine skip positions that cannot start any token.
+_TOKEN_RE = re.compile(
+    r"(?=[EeIOCFN])(?:"
+    r"(?P<example>[Ee][Xx][Aa][Mm][Pp][Ll][Ee]\s*(?P<num>\d+)\s*:)"
+    r"|(?P<label>\b(?:Input|Output|Explanation)\s*:|(?<![^\n])(?:Input|Output|Explanation)[ \t]*$)"
+    r"|(?P<end>(?<![^\n])(?:Constraints|Follow[- ]?up|Note)\s*:))",
+    re.MULTILINE,
+)
+# Markup fragments that survive when content was not converted to text first
+_RESIDUAL_TAG_RE = re.compile(r"</?(?:p|pre|b|strong|em|code|sup|sub|ul|ol|li|span|br|img|font|div)\b[^<>]*>")
+_IDENT_RE = re.compile(r"\s*([A-Za-z_]\w*)\s*=\s*")
+_NEXT_VAR_RE = re.compile(r",\s*[A-Za-z_]\w*\s*=")
+# Literal tokenizer: punctuation | quoted string | number | bare word, each with leading whitespace
+_LITERAL_TOKEN_RE = re.compile(
+    r"\s*(?:([\[\](){}:,])"
+    r"|(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')"
+    r"|(-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)"
+    r"|([A-Za-z_]\w*))"
+)
+_ESCAPE_RE = re.compile(r"\\(.)")
+_WORD_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+_CLOSING = {"[": "]", "(": ")", "{": "}"}
+
+
+class _LiteralError(ValueError):
+    pass
+
+
+def _skip_ws(text: str, pos: int, stop: int) -> int:
+    while pos < stop and text[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def _unescape(match: "re.Match[str]") -> str:
+    return _ESCAPES.get(match.group(1), match.group(1))
+
+
+def _close(frame: List[Any]) -> Any:
+    """Build the value of a finished bracket frame `[closing, items, saw_comma]`."""
+    closing, items, saw_comma = frame
+    if closing == "]":
+        return items
+    if closing == ")":
+        # Python semantics: "(x)" is just x, "(x,)" and "(x, y)" are tuples
+        return items[0] if len(items) == 1 and not saw_comma else tuple(items)
+    if len(items) % 2:
+        raise _LiteralError("dict key without a value")
+    try:
+        return dict(zip(items[::2], items[1::2]))
+    except TypeError as e:  # Unhashable key such as a list
+        raise _LiteralError(str(e)) from None
+
+
+def _parse_literal(text: str, pos: int, stop: int) -> Tuple[Any, int]:
+    """Parse one JSON/Python-style literal in text[pos:stop]. Returns (value, end position).
+
+    Lists, tuples and dicts follow `ast.literal_eval`. Iterative over precompiled tokens with a
+    capped bracket stack, so cost is linear in `stop - pos`.
+    """
+    stack: List[List[Any]] = []  # [closing bracket, items, saw_comma] for each open bracket
+    expect_value = True
+    while True:
+        token = _LITERAL_TOKEN_RE.match(text, pos, stop)
+        if token is None:
+            raise _LiteralError("unexpected character or end of value")
+        pos = token.end()
+        punct, string, number, word = token.groups()
+
+        if expect_value:
+            if punct in _CLOSING:
+                if len(stack) >= MAX_NESTING_DEPTH:
+                    raise _LiteralError("nesting too deep")
+                stack.append([_CLOSING[punct], [], False])
+                continue
+            if punct:
+                # "]" right after "[" (or a trailing comma) closes the bracket
+                if not stack or punct != stack[-1][0]:
+                    raise _LiteralError(f"unexpected {punct!r}")
+                value = _close(stack.pop())
+            elif string:
+                value = string[1:-1]
+                if "\\" in value:
+                    value = _ESCAPE_RE.sub(_unescape, value)
+            elif number:
+                value = float(number) if ("." in number or "e" in number or "E" in number) else int(number)
+            elif word in _WORD_LITERALS:
+                value = _WORD_LITERALS[word]
+            else:
+                raise _LiteralError(f"unexpected word {word!r}")
+        else:
+            if not stack or not punct:
+                raise _LiteralError("expected ',' or closing bracket")
+            frame = stack[-1]
+            # Inside a dict an odd item count means a key is waiting for ":"
+            awaiting_colon = frame[0] == "}" and len(frame[1]) % 2 == 1
+            if punct == ":" and awaiting_colon:
+                expect_value = True
+                continue
+            if punct == "," and not awaiting_colon:
+                frame[2] = True
+                expect_value = True
+                continue
+            if punct != frame[0]:
+                raise _LiteralError(f"unexpected {punct!r}")
+            value = _close(stack.pop())
+
+        if not stack:
+            return value, pos
+        stack[-1][1].append(value)
+        expect_value = False
+
+
+def parse_value(text: str) -> Tuple[Any, bool]:
+    """Parse a complete literal. Returns (value, True) on success or (stripped text, False)."""
+    text = text.strip()
+    if not text or len(text) > MAX_VALUE_CHARS:
+        return text, False
+    try:
+        value, end = _parse_literal(text, 0, len(text))
+    except _LiteralError:
+        return text, False
+    if end != len(text):
+        return text, False
+    return value, True
+
+
+def _unquote(text: str) -> str:
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return text
+
+
+def parse_input_data(input_text: str) -> Dict[str, Any]:
+    """Parse "a = 1, b = [2,3]" into typed variables in a single left-to-right scan."""
+    variables: Dict[str, Any] = {}
+    length = len(input_text)
+    pos = 0
+    while True:
+        ident = _IDENT_RE.match(input_text, pos)
+        if not ident:
+            break
+        value_start = ident.end()
+        try:
+            value, end = _parse_literal(input_text, value_start, min(length, value_start + MAX_VALUE_CHARS))
+            after = _skip_ws(input_text, end, length)
+            # A literal only counts if it ends this variable (", next =" or end of input)
+            if after < length and not _NEXT_VAR_RE.match(input_text, after):
+                raise _LiteralError("trailing text after literal")
+        except _LiteralError:
+            # Plain text (or a value too large to parse): keep it raw up to the next variable
+            next_var = _NEXT_VAR_RE.search(input_text, value_start)
+            end = next_var.start() if next_var else length
+            value = _unquote(input_text[value_start:end].strip())
+        variables[ident.group(1)] = value
+        after = _skip_ws(input_text, end, length)
+        if after >= length or input_text[after] != ",":
+            break
+        pos = after + 1
+    return {"raw": input_text, "variables": variables}
+
+
+def parse_output_data(output_text: str) -> Dict[str, Any]:
+    """Parse the expected output into a typed value, falling back to the text itself."""
+    clean_output = output_text.strip()
+    if clean_output.startswith("Output:"):
+        clean_output = clean_output[len("Output:"):].strip()
+    value, ok = parse_value(clean_output)
+    if not ok and "\n" in clean_output:
+        # Text that trails the example block (notes, bullets) follows the value on later lines
+        value, ok = parse_value(clean_output.split("\n", 1)[0])
+    if not ok:
+        value = _unquote(clean_output)
+    return {"raw": output_text, "value": value}
+
+
+def _clean_field(text: str) -> str:
+    return _RESIDUAL_TAG_RE.sub("", text).strip()
+
+
+def extract_examples_from_content(content: str) -> List[Dict[str, Any]]:
+    """Extract example inputs, outputs and explanations from problem text in one pass."""
+    examples: List[Dict[str, Any]] = []
+    if not content:
+        return examples
+
+    current: Optional[Dict[str, Any]] = None
+    field: Optional[str] = None
+    field_start = body_start = 0
+
+    def close_field(end: int):
+        if current is None or field is None:
+            return
+        text = _clean_field(content[field_start:end])
+        if field == "Input":
+            current["input"] = parse_input_data(text)
+        elif field == "Output":
+            current["output"] = parse_output_data(text)
+        else:
+            current["explanation"] = text or None
+
+    def close_example(end: int):
+        if current is not None:
+            current["raw_content"] = content[body_start:end].strip()
+            examples.append(current)
+
+    for token in _TOKEN_RE.finditer(content):
+        if token.group("example"):
+            close_field(token.start())
+            close_example(token.start())
+            current = {
+                "example_number": int(token.group("num")),
+                "raw_content": "",
+                "input": None,
+                "output": None,
+                "explanation": None,
+            }
+            field = None
+            body_start = token.end()
+        elif token.group("label") and current is not None:
+            close_field(token.start())
+            field = token.group("label").strip().rstrip(":").strip()
+            field_start = token.end()
+        elif token.group("end") and current is not None:
+            close_field(token.start())
+            close_example(token.start())
+            current = None
+            field = None
+    close_field(len(content))
+    close_example(len(content))
+    return examples
@@ -0,0 +1,89 @@
+# app/scrapers/html_to_text.py
+import re
+from html.parser import HTMLParser
+from typing import List
+
+# One pass over the joined text: newline-containing whitespace runs -> "\n", runs of spaces/tabs -> " "
+_WHITESPACE_RE = re.compile(r"\s*\n\s*|[ \t]{2,}")
+_SKIP_TAGS = frozenset(("script", "style"))
+
+
+def _collapse(match: "re.Match[str]") -> str:
+    return "\n" if "\n" in match.group(0) else " "
+
+
+class _LeetCodeTextParser(HTMLParser):
+    """Streaming converter for the small tag set used in LeetCode question content.
+
+    Emits the same text pieces BeautifulSoup would after the scraper's rewrites
+    (`<br>` -> newline, `<p>` -> trailing blank line, `<li>` -> "* " bullet plus newline,
+    `<script>`/`<style>` dropped), without building a tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pieces: List[str] = []
+        self._data: List[str] = []
+        self._open: List[str] = []  # Open <p>/<li> tags still owing their closing text
+        self._skip_depth = 0
+
+    def _flush_data(self):
+        if self._data:
+            if not self._skip_depth:
+                self.pieces.append("".join(self._data))
+            self._data = []
+
+    def handle_data(self, data: str):
+        self._data.append(data)
+
+    def handle_comment(self, data: str):
+        # Comments are dropped but still split the surrounding text into separate nodes
+        self._flush_data()
+
+    def handle_starttag(self, tag: str, attrs):
+        self._flush_data()
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag == "br":
+            self.pieces.append("\n")
+        elif tag == "li":
+            self._open.append(tag)
+            self.pieces.append("* ")
+        elif tag == "p":
+            self._open.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs):
+        self._flush_data()
+        if tag == "br" and not self._skip_depth:
+            self.pieces.append("\n")
+
+    def handle_endtag(self, tag: str):
+        self._flush_data()
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif self._skip_depth or tag not in ("p", "li") or tag not in self._open:
+            return
+        else:
+            # Close the innermost matching tag and anything left open inside it
+            while self._open:
+                open_tag = self._open.pop()
+                self.pieces.append("\n\n" if open_tag == "p" else "\n")
+                if open_tag == tag:
+                    break
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        while self._open:
+            self.pieces.append("\n\n" if self._open.pop() == "p" else "\n")
+
+
+def html_to_text(html: str) -> str:
+    """Convert LeetCode question HTML to the scraper's plain-text layout in a single pass."""
+    parser = _LeetCodeTextParser()
+    parser.feed(html)
+    parser.close()
+    # BeautifulSoup.get_text(separator=" ") joins every text node with a space
+    return _WHITESPACE_RE.sub(_collapse, " ".join(parser.pieces).strip())
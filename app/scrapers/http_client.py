@@ -0,0 +1,68 @@
+# app/scrapers/http_client.py
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+from app.core.logger import logger
+
+# Process-wide pooled client shared by the scraper subsystem
+_client: Optional[httpx.AsyncClient] = None
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = importlib.util.find_spec("h2") is not None  # httpx[http2] is optional
+    if not http2:
+        logger.info("h2 package not installed; scraper HTTP client will use HTTP/1.1.")
+    # Pool limits belong to the transport: AsyncClient ignores its own `limits` when given one
+    limits = httpx.Limits(
+        max_connections=settings.SCRAPER_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SCRAPER_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=30.0,
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.SCRAPER_HTTP_TIMEOUT, connect=settings.SCRAPER_HTTP_CONNECT_TIMEOUT),
+        # Transport-level retries cover connection failures (refused, reset, DNS)
+        transport=httpx.AsyncHTTPTransport(http2=http2, limits=limits, retries=settings.SCRAPER_HTTP_RETRIES),
+    )
+
+
+async def start_http_client() -> None:
+    """Create the shared client. Called from the FastAPI startup hook."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("Scraper HTTP client started.")
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("Scraper HTTP client closed.")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily when used outside the app lifecycle."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+@asynccontextmanager
+async def host_slot(url: str) -> AsyncIterator[None]:
+    """Hold one of the per-host concurrency slots for the duration of a request."""
+    host = urlsplit(url).netloc
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(settings.SCRAPER_HTTP_PER_HOST_LIMIT)
+    async with semaphore:
+        yield
@@ -1,55 +1,195 @@
 # app/scrapers/leetcode_scraper.py
-import ast
+import asyncio
+import gzip
 import json
+import os
 import re
+import time
 import unicodedata
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
-from bs4 import BeautifulSoup
 
+from app.core import metrics
+from app.core.cache import CacheBackend, build_cache
+from app.core.config import settings
 from app.core.logger import logger  # Make sure logger is configured in app.core
+from app.scrapers.example_parser import extract_examples_from_content, parse_input_data, parse_output_data  # noqa: F401
+from app.scrapers.html_to_text import html_to_text
+from app.scrapers.http_client import get_http_client, host_slot
+from app.scrapers.question_corpus import QuestionCorpus
+from app.scrapers.title_index import TrigramTitleIndex, covers_title, title_words
 
 LEETCODE_GRAPHQL_URL = "https://leetcode.com/graphql"
 LEETCODE_ALL_PROBLEMS_URL = "https://leetcode.com/api/problems/all/"
 
 # Cache for problems list to avoid repeated fetching
 _problems_cache: Optional[List[Dict[str, Any]]] = None
-
-async def _fetch_all_problems() -> Optional[List[Dict[str, Any]]]:
-    """Fetches and caches the list of all LeetCode problems."""
-    global _problems_cache
-    if _problems_cache:
-        return _problems_cache
-
+_problems_fetched_at: float = 0.0
+# Failed fetches are retried with exponential backoff instead of being cached forever
+_problems_failures: int = 0
+_problems_next_retry_at: float = 0.0
+_problems_refresh_task: Optional[asyncio.Task] = None
+_problems_refresher: Optional[asyncio.Task] = None
+# Set by load_problems_snapshot(); persistence is disabled until the app configures it
+_snapshot_path: Optional[str] = None
+
+
+def _save_problems_snapshot(problems: List[Dict[str, Any]], fetched_at: float) -> None:
+    """Persist the problems list as gzipped JSON rows of [frontend_id, title, slug]."""
+    if not _snapshot_path:
+        return
+    rows = []
+    for problem in problems:
+        stat = problem.get("stat", {})
+        if stat.get("question__title_slug"):
+            rows.append([stat.get("frontend_question_id"), stat.get("question__title"), stat["question__title_slug"]])
+    tmp_path = f"{_snapshot_path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_snapshot_path) or ".", exist_ok=True)
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"fetched_at": fetched_at, "problems": rows}, f, separators=(",", ":"))
+        os.replace(tmp_path, _snapshot_path)  # Atomic so other workers never read a partial file
+        logger.info(f"Saved LeetCode problems snapshot ({len(rows)} problems) to {_snapshot_path}")
+    except OSError as e:
+        logger.warning(f"Could not write LeetCode problems snapshot: {e}")
+
+
+def load_problems_snapshot(path: str) -> bool:
+    """Enable snapshot persistence at `path` and preload the problems list from it if present."""
+    global _snapshot_path, _problems_cache, _problems_fetched_at
+    _snapshot_path = path
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logger.info(f"No LeetCode problems snapshot at {path}; will fetch on demand.")
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable LeetCode problems snapshot {path}: {e}")
+        return False
+    _problems_cache = [
+        {"stat": {"frontend_question_id": fid, "question__title": title, "question__title_slug": slug}}
+        for fid, title, slug in data.get("problems", [])
+    ]
+    _problems_fetched_at = float(data.get("fetched_at", 0.0))
+    logger.info(f"Loaded {len(_problems_cache)} LeetCode problems from snapshot {path}")
+    return True
+
+
+async def _download_problems() -> Optional[List[Dict[str, Any]]]:
+    """Fetch the full problems list from LeetCode. Returns None on any failure."""
     logger.info("Fetching all LeetCode problems list...")
     try:
-        # Increased timeout for potentially large response
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        # Shared pooled client: keep-alive connections are reused across requests
+        client = get_http_client()
+        async with host_slot(LEETCODE_ALL_PROBLEMS_URL):
             response = await client.get(LEETCODE_ALL_PROBLEMS_URL)
             response.raise_for_status() # Raise exception for bad status codes (4xx or 5xx)
             data = response.json()
             if "stat_status_pairs" in data:
-                _problems_cache = data["stat_status_pairs"]
-                logger.info(f"Successfully fetched and cached {len(_problems_cache)} LeetCode problems.")
-                return _problems_cache
-            else:
-                logger.error("Fetched LeetCode problems data missing 'stat_status_pairs'.")
-                _problems_cache = [] # Set to empty list to avoid retrying immediately
-                return None
+                return data["stat_status_pairs"]
+            logger.error("Fetched LeetCode problems data missing 'stat_status_pairs'.")
+            return None
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP status error fetching LeetCode problems: {e.response.status_code} - {e.request.url}")
-        _problems_cache = []
         return None
     except httpx.RequestError as e:
         logger.error(f"HTTP request error fetching LeetCode problems: {e}")
-        _problems_cache = []
         return None
     except Exception as e:
         logger.error(f"Unexpected error fetching LeetCode problems: {e}", exc_info=True)
-        _problems_cache = []
         return None
 
+
+async def _download_and_store() -> Optional[List[Dict[str, Any]]]:
+    """Download the problems list and update the cache, or schedule the next retry on failure."""
+    global _problems_cache, _problems_fetched_at, _problems_failures, _problems_next_retry_at
+    problems = await _download_problems()
+    now = time.time()
+    if problems is None:
+        _problems_failures += 1
+        delay = min(
+            settings.PROBLEMS_RETRY_BASE_SECONDS * (2 ** (_problems_failures - 1)),
+            settings.PROBLEMS_RETRY_MAX_SECONDS,
+        )
+        _problems_next_retry_at = now + delay
+        logger.warning(f"LeetCode problems fetch failed ({_problems_failures} in a row); next retry in {delay:.0f}s.")
+        return None
+    _problems_cache = problems
+    _problems_fetched_at = now
+    _problems_failures = 0
+    _problems_next_retry_at = 0.0
+    logger.info(f"Successfully fetched and cached {len(problems)} LeetCode problems.")
+    _save_problems_snapshot(problems, now)
+    return problems
+
+
+def _schedule_refresh() -> asyncio.Task:
+    """Start a refresh unless one is already running, and return the running one."""
+    global _problems_refresh_task
+    if _problems_refresh_task is None or _problems_refresh_task.done():
+        _problems_refresh_task = asyncio.create_task(_download_and_store())
+    return _problems_refresh_task
+
+
+async def _refresh_problems() -> Optional[List[Dict[str, Any]]]:
+    """Refresh the problems list; concurrent callers all await the same download."""
+    # Shielded so a cancelled caller doesn't abort the download the other callers are waiting on
+    return await asyncio.shield(_schedule_refresh())
+
+
+async def _fetch_all_problems() -> Optional[List[Dict[str, Any]]]:
+    """Return the cached problems list, serving stale data while a refresh runs in the background."""
+    now = time.time()
+    if _problems_cache:
+        if now - _problems_fetched_at > settings.PROBLEMS_REFRESH_INTERVAL and now >= _problems_next_retry_at:
+            _schedule_refresh()  # Stale-while-revalidate
+        return _problems_cache
+    if now < _problems_next_retry_at:
+        logger.debug("Skipping LeetCode problems fetch while backing off after a failure.")
+        return None
+    return await _refresh_problems()
+
+
+async def get_problems_list(refresh: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """Return the list of all LeetCode problems.
+
+    With `refresh`, download it now (joining a refresh already in flight) instead of serving
+    the cached copy, e.g. when the caller needs fields the snapshot doesn't keep.
+    """
+    if refresh:
+        return await _refresh_problems() or await _fetch_all_problems()
+    return await _fetch_all_problems()
+
+
+async def _problems_refresh_loop() -> None:
+    """Keep the problems list fresh on a schedule, honouring failure backoff."""
+    while True:
+        now = time.time()
+        due = _problems_fetched_at + settings.PROBLEMS_REFRESH_INTERVAL if _problems_cache else now
+        await asyncio.sleep(max(due - now, _problems_next_retry_at - now, 1.0))
+        await _refresh_problems()
+
+
+def start_problems_refresher() -> None:
+    """Start the scheduled background refresh of the problems list."""
+    global _problems_refresher
+    if _problems_refresher is None or _problems_refresher.done():
+        _problems_refresher = asyncio.create_task(_problems_refresh_loop())
+
+
+async def stop_problems_refresher() -> None:
+    """Cancel the scheduled refresh task."""
+    global _problems_refresher
+    if _problems_refresher is not None:
+        _problems_refresher.cancel()
+        try:
+            await _problems_refresher
+        except asyncio.CancelledError:
+            pass
+        _problems_refresher = None
+
 def normalize_text(text: str) -> str:
     """Normalize text by lowercasing, removing accents, and extra whitespace."""
     if not isinstance(text, str):
@@ -63,6 +203,121 @@ def normalize_text(text: str) -> str:
     text = re.sub(r'\s+', ' ', text).strip() # Replace multiple spaces with one
     return text
 
+class ProblemCatalog:
+    """Lookup indexes over the problems list, built once per fetched list.
+
+    Replaces repeated linear scans (and per-title `normalize_text` calls) in
+    `get_title_slug` with dict lookups.
+    """
+
+    def __init__(self, problems: List[Dict[str, Any]]):
+        self.source = problems
+        # frontend id -> (slug, normalized title)
+        self.by_frontend_id: Dict[str, Tuple[str, str]] = {}
+        # normalized title -> slug
+        self.by_normalized_title: Dict[str, str] = {}
+        # slug -> (frontend id, display title)
+        self.by_slug: Dict[str, Tuple[str, str]] = {}
+        # title words without punctuation, space-joined -> slug (for spans of free text)
+        self.by_title_words: Dict[str, str] = {}
+        self.max_title_words = 0
+        self._title_index: Optional[TrigramTitleIndex] = None
+        for problem in problems:
+            stat = problem.get("stat", {})
+            slug = stat.get("question__title_slug")
+            if not slug:
+                continue
+            title = stat.get("question__title", "")
+            title_norm = normalize_text(title)
+            frontend_id = str(stat.get("frontend_question_id"))
+            self.by_frontend_id.setdefault(frontend_id, (slug, title_norm))
+            self.by_slug.setdefault(slug, (frontend_id, title))
+            if title_norm:
+                self.by_normalized_title.setdefault(title_norm, slug)
+            words = title_words(title_norm)
+            if words:
+                self.by_title_words.setdefault(" ".join(words), slug)
+                self.max_title_words = max(self.max_title_words, len(words))
+
+    def __len__(self) -> int:
+        return len(self.by_frontend_id)
+
+    def lookup_number(self, number: str, title_part: str = "") -> Optional[Tuple[str, bool]]:
+        """Resolve a frontend id. Returns (slug, title_verified) or None if the id is unknown."""
+        entry = self.by_frontend_id.get(number)
+        if entry is None:
+            return None
+        slug, title_norm = entry
+        verified = bool(title_part) and (title_part in title_norm or title_norm in title_part)
+        return slug, verified
+
+    def lookup_title(self, normalized_title: str) -> Optional[str]:
+        """Exact match on a normalized title."""
+        return self.by_normalized_title.get(normalized_title)
+
+    def find_contained_title(self, normalized_text: str) -> Optional[Tuple[str, str]]:
+        """Find the longest problem title appearing as a word span of `normalized_text`.
+
+        Checks every span of up to `max_title_words` words against the title map, so the
+        cost depends on the input length rather than the number of problems. Punctuation is
+        dropped from both sides, so "solve two sum?" contains "Two Sum".
+        """
+        words = title_words(normalized_text)
+        best: Optional[Tuple[str, str]] = None
+        for i in range(len(words)):
+            for j in range(i + 1, min(len(words), i + self.max_title_words) + 1):
+                candidate = " ".join(words[i:j])
+                slug = self.by_title_words.get(candidate)
+                if slug and (best is None or len(candidate) > len(best[1])):
+                    best = (slug, candidate)
+        return best
+
+
+    @property
+    def title_index(self) -> TrigramTitleIndex:
+        """Trigram index over normalized titles, built on first fuzzy lookup."""
+        if self._title_index is None:
+            self._title_index = TrigramTitleIndex(
+                [(slug, title_norm) for title_norm, slug in self.by_normalized_title.items()]
+            )
+        return self._title_index
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> List[Dict[str, Any]]:
+        """Ranked, typo-tolerant title matches for `query`. A bare problem number ranks its problem first."""
+        results = []
+        number = query.strip().rstrip(".")
+        if number.isdigit() and number in self.by_frontend_id:
+            slug = self.by_frontend_id[number][0]
+            results.append({"id": number, "title": self.by_slug[slug][1], "slug": slug, "score": 1.0})
+        for slug, score in self.title_index.search(normalize_text(query), limit, min_score):
+            if len(results) >= limit:
+                break
+            if not results or results[0]["slug"] != slug:
+                frontend_id, title = self.by_slug[slug]
+                results.append({"id": frontend_id, "title": title, "slug": slug, "score": score})
+        return results
+
+
+_catalog: Optional[ProblemCatalog] = None
+
+
+async def _get_catalog() -> Optional[ProblemCatalog]:
+    """Return the catalog for the current problems list, rebuilding it if the list changed."""
+    global _catalog
+    problems = await _fetch_all_problems()
+    if not problems:
+        return None
+    if _catalog is None or _catalog.source is not problems:
+        _catalog = ProblemCatalog(problems)
+        logger.info(f"Built LeetCode problem catalog with {len(_catalog)} problems.")
+    return _catalog
+
+
+async def get_problem_catalog() -> Optional[ProblemCatalog]:
+    """Return the `ProblemCatalog` for the current problems list, or None if the list is unavailable."""
+    return await _get_catalog()
+
+
 async def get_title_slug(identifier: str) -> Optional[str]:
     """Resolve a LeetCode question identifier (URL, number, title, combined, or pasted) to a title slug.
     """
@@ -82,8 +337,8 @@ async def get_title_slug(identifier: str) -> Optional[str]:
         # For now, trust the extracted slug.
         return title_slug
 
-    problems = await _fetch_all_problems()
-    if not problems:
+    catalog = await _get_catalog()
+    if not catalog:
         logger.error("Failed to fetch or use problem list for matching. Cannot resolve non-URL identifier.")
         # Maybe attempt GraphQL query directly if identifier *looks* like a slug?
         if re.match(r"^[a-z0-9]+(?:-[a-z0-9]+)*$", identifier.strip()):
@@ -111,34 +366,19 @@ async def get_title_slug(identifier: str) -> Optional[str]:
 
     # Match using number first if available (most reliable)
     if potential_number:
-        for problem in problems:
-            stat = problem.get("stat", {})
-            # Use frontend_question_id as it's the displayed number
-            if str(stat.get("frontend_question_id")) == potential_number:
-                slug = stat.get("question__title_slug")
-                if not slug: continue # Skip if slug is missing for this problem
-
-                # If we also have a title part, verify it loosely matches
-                if potential_title_part:
-                    problem_title_norm = normalize_text(stat.get("question__title", ""))
-                    # Check if normalized potential title is substring of normalized actual title or vice-versa
-                    if potential_title_part in problem_title_norm or problem_title_norm in potential_title_part:
-                        logger.info(f"Matched by number ({potential_number}) and verified title part: {slug}")
-                        matched_slug = slug
-                        break # Found best match
-                    else:
-                        logger.debug(f"Number {potential_number} matched slug {slug}, but title part '{potential_title_part}' didn't match problem title '{problem_title_norm}'")
-                        # Don't break yet, maybe another problem has same number? (unlikely)
-                        # If we don't find a better match, we might fallback to this later.
-                        if not matched_slug: # Store first number match as fallback
-                            matched_slug = slug
-
-                else: # Matched by number only
-                     logger.info(f"Matched by number ({potential_number}): {slug}")
-                     matched_slug = slug
-                     break # Found match
-
-        if matched_slug:
+        number_match = catalog.lookup_number(potential_number, potential_title_part)
+        if number_match:
+            matched_slug, title_verified = number_match
+            if title_verified:
+                logger.info(f"Matched by number ({potential_number}) and verified title part: {matched_slug}")
+            elif potential_title_part:
+                # Title part didn't match; the number is still the most reliable signal
+                logger.debug(
+                    f"Number {potential_number} matched slug {matched_slug}, "
+                    f"but title part '{potential_title_part}' didn't match"
+                )
+            else:
+                logger.info(f"Matched by number ({potential_number}): {matched_slug}")
             logger.info(f"Resolution successful based on number: {matched_slug}")
             return matched_slug # Return early if number match found
 
@@ -154,38 +394,29 @@ async def get_title_slug(identifier: str) -> Optional[str]:
     else:
         logger.info(f"Attempting fuzzy title matching with: '{search_title}'")
         # Look for exact title match first (case-insensitive via normalization)
-        for problem in problems:
-            stat = problem.get("stat", {})
-            problem_title_norm = normalize_text(stat.get("question__title", ""))
-            slug = stat.get("question__title_slug")
-            if not slug or not problem_title_norm: continue
-
-            if problem_title_norm == search_title:
-                logger.info(f"Matched by exact title: {slug}")
-                matched_slug = slug
-                break
-        # If no exact match, look for containment (problem title within identifier)
-        # This handles cases like "solve two sum" matching "Two Sum"
-        if not matched_slug:
-             candidates = []
-             for problem in problems:
-                stat = problem.get("stat", {})
-                problem_title_norm = normalize_text(stat.get("question__title", ""))
-                slug = stat.get("question__title_slug")
-                if not slug or not problem_title_norm: continue
-
-                # Check if the actual problem title is a substring of the search title
-                if problem_title_norm and problem_title_norm in search_title:
-                    # Score based on length - longer matches are better
-                    candidates.append({'slug': slug, 'title': problem_title_norm, 'score': len(problem_title_norm)})
-                    logger.debug(f"Potential title match (title in identifier): {slug} (Title: {problem_title_norm})")
-
-             # If multiple candidates, pick the one with the longest matching title
-             if candidates:
-                 candidates.sort(key=lambda x: x['score'], reverse=True)
-                 matched_slug = candidates[0]['slug']
-                 matched_title = candidates[0]['title']
-                 logger.info(f"Matched by best fuzzy title (title in identifier): {matched_slug} (Matched Title: '{matched_title}')")
+        matched_slug = catalog.lookup_title(search_title)
+        if matched_slug:
+            logger.info(f"Matched by exact title: {matched_slug}")
+        else:
+            # Look for containment (problem title within identifier), longest title wins.
+            # This handles cases like "solve two sum" matching "Two Sum"
+            contained = catalog.find_contained_title(search_title)
+            if contained:
+                matched_slug, matched_title = contained
+                logger.info(
+                    f"Matched by best fuzzy title (title in identifier): {matched_slug} "
+                    f"(Matched Title: '{matched_title}')"
+                )
+            else:
+                # Typo-tolerant trigram match ("two summ", "revers linkd list"). The query must still cover
+                # every word of the title, so topic questions like "binary tree traversal" don't resolve
+                # to a problem that merely shares most of its words
+                candidates = catalog.title_index.search(search_title, limit=5, min_score=settings.TITLE_FUZZY_MIN_SCORE)
+                for slug, score in candidates:
+                    if covers_title(search_title, normalize_text(catalog.by_slug[slug][1])):
+                        matched_slug = slug
+                        logger.info(f"Matched by trigram title similarity: {matched_slug} (score {score})")
+                        break
 
         if matched_slug:
             logger.info(f"Resolution successful based on title matching: {matched_slug}")
@@ -203,25 +434,12 @@ async def get_title_slug(identifier: str) -> Optional[str]:
                 num = pasted_match.group(1)
                 title_part = normalize_text(pasted_match.group(2))
                 logger.info(f"Pasted text heuristic found pattern: Number={num}, Title Part='{title_part}'")
-                # Try matching this extracted info using the number logic again
-                for problem in problems:
-                     stat = problem.get("stat", {})
-                     slug = stat.get("question__title_slug")
-                     if not slug: continue
-
-                     if str(stat.get("frontend_question_id")) == num:
-                        problem_title_norm = normalize_text(stat.get("question__title", ""))
-                        # Check if extracted title part matches loosely
-                        if title_part in problem_title_norm or problem_title_norm in title_part:
-                            logger.info(f"Matched via pasted text heuristic: {slug}")
-                            matched_slug = slug
-                            break # Found match
-
-                if matched_slug:
-                     logger.info(f"Resolution successful based on pasted text heuristic: {matched_slug}")
-                     return matched_slug # Exit outer loop too
-            # Stop checking lines if match found
-            if matched_slug: break
+                # Try matching this extracted info using the number index, requiring the title to agree
+                number_match = catalog.lookup_number(num, title_part)
+                if number_match and number_match[1]:
+                    matched_slug = number_match[0]
+                    logger.info(f"Resolution successful based on pasted text heuristic: {matched_slug}")
+                    return matched_slug
 
     if not matched_slug:
         logger.warning(f"Could not resolve identifier to a LeetCode title slug: '{identifier[:100]}...'")
@@ -265,8 +483,8 @@ async def fetch_leetcode_question(title_slug: str) -> Optional[str]:
     }
 
     try:
-        # Use a reasonable timeout
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        client = get_http_client()
+        async with host_slot(LEETCODE_GRAPHQL_URL):
             response = await client.post(
                 LEETCODE_GRAPHQL_URL,
                 json={"query": query, "variables": variables},
@@ -296,31 +514,13 @@ async def fetch_leetcode_question(title_slug: str) -> Optional[str]:
         frontend_id = question_data.get('questionFrontendId', '')
         difficulty = question_data.get('difficulty', 'N/A')
 
-        # Clean HTML content using BeautifulSoup
+        # Convert the question HTML to plain text
         html_content = question_data.get("content", "")
         clean_content = "No description available."
         if html_content:
             try:
-                soup = BeautifulSoup(html_content, "html.parser")
-                # Extract text, trying to preserve paragraphs and structure slightly better
-                # Replace <p> with newline, <li> with "* ", etc.
-                for br in soup.find_all("br"):
-                    br.replace_with("\n")
-                for p in soup.find_all("p"):
-                    p.append("\n\n")
-                for li in soup.find_all("li"):
-                    li.insert(0, "* ")
-                    li.append("\n")
-                # Remove script/style tags
-                for tag in soup(["script", "style"]):
-                    tag.decompose()
-
-                # Get text, strip extra whitespace but keep meaningful newlines
-                clean_content = soup.get_text(separator=" ").strip()
-                # Consolidate multiple newlines/spaces that might result
-                clean_content = re.sub(r'\s*\n\s*', '\n', clean_content).strip()
-                clean_content = re.sub(r'[ \t]{2,}', ' ', clean_content) # Consolidate spaces
-
+                # Single-pass conversion: <p> -> paragraphs, <li> -> "* " bullets, <br> -> newlines
+                clean_content = html_to_text(html_content)
             except Exception as parse_error:
                 logger.warning(f"Error parsing HTML content for {title_slug}: {parse_error}. Falling back to raw content.")
                 clean_content = html_content # Fallback
@@ -373,103 +573,47 @@ async def scrape_leetcode_question(identifier: str) -> Optional[str]:
 
 
 
-def extract_examples_from_content(content: str) -> List[Dict[str, Any]]:
-    """Extract example inputs and outputs from LeetCode problem content.
-    Returns a list of examples with input and output data.
-    """
-    examples = []
-
-    if not content:
-        return examples
-
-    # Pattern to match Example blocks
-    example_pattern = r'Example\s*(\d+):\s*(.*?)(?=Example\s*\d+:|$)'
-    example_matches = re.findall(example_pattern, content, re.DOTALL | re.IGNORECASE)
-
-    for example_num, example_content in example_matches:
-        example_data = {
-            "example_number": int(example_num),
-            "raw_content": example_content.strip(),
-            "input": None,
-            "output": None,
-            "explanation": None
-        }
-
-        # Extract Input
-        input_match = re.search(r'Input:\s*(.+?)(?=\n(?:Output|Explanation))', example_content, re.DOTALL)
-        if input_match:
-            input_text = input_match.group(1).strip()
-            example_data["input"] = parse_input_data(input_text)
+def build_question_details(question_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a GraphQL `question` object into the structured record the tutor uses."""
+    # Extract basic info
+    title = question_data.get('title', 'N/A')
+    frontend_id = question_data.get('questionFrontendId', '')
+    difficulty = question_data.get('difficulty', 'N/A')
+    html_content = question_data.get("content", "")
 
-        # Extract Output
-        output_match = re.search(r'Output:\s*(.+?)(?=\n(?:Explanation|Example|\Z))', example_content, re.DOTALL)
-        if output_match:
-            output_text = output_match.group(1).strip()
-            example_data["output"] = parse_output_data(output_text)
-
-        # Extract Explanation
-        explanation_match = re.search(r'Explanation:\s*(.+?)(?=\nExample|\Z)', example_content, re.DOTALL)
-        if explanation_match:
-            example_data["explanation"] = explanation_match.group(1).strip()
-
-        examples.append(example_data)
-
-    return examples
-
-def parse_input_data(input_text: str) -> Dict[str, Any]:
-    """Parse input text to extract variable names and values."""
-    parsed_input = {
-        "raw": input_text,
-        "variables": {}
-    }
-    # Pattern to capture variable_name = value
-    # It tries to be as broad as possible for the value part
-    pattern = r'(\w+)\s*=\s*(.+?)(?:,\s*\w+\s*=|\Z)'
-    matches = re.findall(pattern, input_text, re.DOTALL)
-    for var_name, var_value_raw in matches:
-        var_value = var_value_raw.strip()
+    # Clean HTML content
+    clean_content = "No description available."
+    if html_content:
         try:
-            # Attempt to evaluate the value as a Python literal
-            # This handles numbers, booleans, strings, lists, and dictionaries
-            parsed_input["variables"][var_name] = ast.literal_eval(var_value)
-        except (ValueError, SyntaxError):
-            # If literal_eval fails, treat it as a string
-            # Remove surrounding quotes if present
-            if (var_value.startswith('"') and var_value.endswith('"')) or \
-               (var_value.startswith('\'') and var_value.endswith('\'')):
-                parsed_input["variables"][var_name] = var_value[1:-1]
-            else:
-                parsed_input["variables"][var_name] = var_value
-    return parsed_input
-
-
-
-def parse_output_data(output_text: str) -> Dict[str, Any]:
-    """Parse output text to extract expected result."""
-    parsed_output = {
-        "raw": output_text,
-        "value": None
+            clean_content = html_to_text(html_content)
+        except Exception as parse_error:
+            logger.warning(f"Error parsing HTML content for {title}: {parse_error}")
+            clean_content = html_content
+
+    # Extract examples from content
+    examples = extract_examples_from_content(clean_content)
+
+    # Add topic tags
+    tags = [tag['name'] for tag in question_data.get('topicTags', []) if tag and 'name' in tag]
+    tags_str = f"Topics: {', '.join(tags)}\n" if tags else ""
+
+    # Return structured data instead of formatted string
+    return {
+        "id": frontend_id,
+        "title": title,
+        "difficulty": difficulty,
+        "tags": tags,
+        "content": clean_content,
+        "examples": examples,
+        "formatted_content": (
+            f"ID: {frontend_id}\n"
+            f"Title: {title}\n"
+            f"Difficulty: {difficulty}\n"
+            f"{tags_str}"
+            f"\nContent:\n{clean_content}"
+        )
     }
 
-    clean_output = re.sub(r'^(Output:\s*)?', '', output_text.strip())
-
-    try:
-        parsed_output["value"] = ast.literal_eval(clean_output)
-    except (ValueError, SyntaxError):
-        # If literal_eval fails, try to handle as a string
-        if (clean_output.startswith('"') and clean_output.endswith('"')) or \
-           (clean_output.startswith('\'') and clean_output.endswith('\'')):
-            parsed_output["value"] = clean_output[1:-1]
-        elif clean_output.lower() == 'true':
-            parsed_output["value"] = True
-        elif clean_output.lower() == 'false':
-            parsed_output["value"] = False
-        else:
-            parsed_output["value"] = clean_output
-    except json.JSONDecodeError: # This exception is not raised by ast.literal_eval
-        parsed_output["value"] = clean_output
-
-    return parsed_output
 
 async def fetch_leetcode_question(title_slug: str) -> Optional[Dict[str, Any]]:
     """Enhanced version that returns structured data including examples.
@@ -504,7 +648,8 @@ async def fetch_leetcode_question(title_slug: str) -> Optional[Dict[str, Any]]:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        client = get_http_client()
+        async with host_slot(LEETCODE_GRAPHQL_URL):
             response = await client.post(
                 LEETCODE_GRAPHQL_URL,
                 json={"query": query, "variables": variables},
@@ -527,64 +672,117 @@ async def fetch_leetcode_question(title_slug: str) -> Optional[Dict[str, Any]]:
             logger.warning(f"No question data found for slug '{title_slug}'.")
             return None
 
-        # Extract basic info
-        title = question_data.get('title', 'N/A')
-        frontend_id = question_data.get('questionFrontendId', '')
-        difficulty = question_data.get('difficulty', 'N/A')
-        html_content = question_data.get("content", "")
+        result = build_question_details(question_data)
+        examples = len(result["examples"])
+        logger.info(f"Successfully fetched details for: {result['id']}. {result['title']} with {examples} examples")
+        return result
 
-        # Clean HTML content
-        clean_content = "No description available."
-        if html_content:
-            try:
-                soup = BeautifulSoup(html_content, "html.parser")
-                for br in soup.find_all("br"):
-                    br.replace_with("\n")
-                for p in soup.find_all("p"):
-                    p.append("\n\n")
-                for li in soup.find_all("li"):
-                    li.insert(0, "* ")
-                    li.append("\n")
-                for tag in soup(["script", "style"]):
-                    tag.decompose()
-
-                clean_content = soup.get_text(separator=" ").strip()
-                clean_content = re.sub(r'\s*\n\s*', '\n', clean_content).strip()
-                clean_content = re.sub(r'[ \t]{2,}', ' ', clean_content)
-            except Exception as parse_error:
-                logger.warning(f"Error parsing HTML content for {title_slug}: {parse_error}")
-                clean_content = html_content
+    except Exception as e:
+        logger.error(f"Error fetching LeetCode question '{title_slug}': {e}", exc_info=True)
+        return None
 
-        # Extract examples from content
-        examples = extract_examples_from_content(clean_content)
+# Processed question details keyed by title slug, plus in-flight fetches for de-duplication
+_question_cache: Optional[CacheBackend] = None
+_inflight_questions: Dict[str, asyncio.Task] = {}
+_question_stats = {"upstream_fetches": 0, "deduplicated": 0, "corpus_served": 0}
+# Offline corpus, opened on first use; False means "looked and there isn't one"
+_corpus: Any = None
+
+
+def _get_question_cache() -> CacheBackend:
+    """Return the question detail cache, creating it on first use."""
+    global _question_cache
+    if _question_cache is None:
+        _question_cache = build_cache(
+            "questions",
+            backend=settings.QUESTION_CACHE_BACKEND,
+            max_entries=settings.QUESTION_CACHE_MAX_ENTRIES,
+            max_bytes=settings.QUESTION_CACHE_MAX_BYTES,
+            ttl=settings.QUESTION_CACHE_TTL,
+            cache_dir=settings.CACHE_DIR,
+        )
+    return _question_cache
 
-        # Add topic tags
-        tags = [tag['name'] for tag in question_data.get('topicTags', []) if tag and 'name' in tag]
-        tags_str = f"Topics: {', '.join(tags)}\n" if tags else ""
 
-        # Return structured data instead of formatted string
-        result = {
-            "id": frontend_id,
-            "title": title,
-            "difficulty": difficulty,
-            "tags": tags,
-            "content": clean_content,
-            "examples": examples,
-            "formatted_content": (
-                f"ID: {frontend_id}\n"
-                f"Title: {title}\n"
-                f"Difficulty: {difficulty}\n"
-                f"{tags_str}"
-                f"\nContent:\n{clean_content}"
-            )
-        }
+def load_question_corpus(path: Optional[str] = None) -> bool:
+    """(Re)open the offline question corpus. Returns True if one was found."""
+    global _corpus
+    if _corpus:
+        _corpus.close()
+    _corpus = QuestionCorpus.open(path or settings.QUESTION_CORPUS_PATH) or False
+    return bool(_corpus)
 
-        logger.info(f"Successfully fetched details for: {frontend_id}. {title} with {len(examples)} examples")
-        return result
 
-    except Exception as e:
-        logger.error(f"Error fetching LeetCode question '{title_slug}': {e}", exc_info=True)
+def _get_corpus() -> Optional[QuestionCorpus]:
+    if settings.QUESTION_CORPUS_MODE == "off":
         return None
+    if _corpus is None:
+        load_question_corpus()
+    return _corpus or None
+
+
+def _question_cache_stats() -> Dict[str, Any]:
+    stats = dict(_question_stats)
+    stats["inflight"] = len(_inflight_questions)
+    if _question_cache is not None:
+        stats.update(_question_cache.stats())
+    if _corpus:
+        stats["corpus"] = _corpus.stats()
+    return stats
+
+
+metrics.register("question_cache", _question_cache_stats)
+
+
+def _from_corpus(title_slug: str) -> Optional[Dict[str, Any]]:
+    corpus = _get_corpus()
+    result = corpus.get(title_slug) if corpus else None
+    if result:
+        _question_stats["corpus_served"] += 1
+    return result
+
+
+async def _fetch_and_cache_question(title_slug: str) -> Optional[Dict[str, Any]]:
+    if settings.QUESTION_CORPUS_MODE == "offline":
+        return _from_corpus(title_slug)
+    _question_stats["upstream_fetches"] += 1
+    result = await fetch_leetcode_question(title_slug)
+    if result:
+        await _get_question_cache().aset(title_slug, result)
+        return result
+    # Upstream failed (throttled, down, or unknown slug): serve the offline copy if there is one
+    result = _from_corpus(title_slug)
+    if result:
+        logger.info(f"Served '{title_slug}' from the offline question corpus.")
+    return result
+
+
+async def is_question_cached(title_slug: str) -> bool:
+    """Whether processed details for `title_slug` are in the question cache."""
+    return await _get_question_cache().aget(title_slug) is not None
+
+
+async def get_question_details(title_slug: str) -> Optional[Dict[str, Any]]:
+    """Return processed question details for a slug from cache, fetching upstream on a miss.
+
+    Concurrent misses for the same slug share a single upstream fetch. The fetch runs as its
+    own task, so a caller that disconnects does not cancel it for the others.
+    """
+    cached = await _get_question_cache().aget(title_slug)
+    if cached is not None:
+        logger.info(f"Question cache hit for '{title_slug}'")
+        return cached
+
+    task = _inflight_questions.get(title_slug)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_cache_question(title_slug))
+        _inflight_questions[title_slug] = task
+        task.add_done_callback(lambda _: _inflight_questions.pop(title_slug, None))
+    else:
+        _question_stats["deduplicated"] += 1
+        logger.debug(f"Joining in-flight fetch for '{title_slug}'")
+    return await asyncio.shield(task)
+
 
 async def scrape_leetcode_question(identifier: str) -> Optional[Dict[str, Any]]:
     """Enhanced scraper that returns structured data with examples.
@@ -592,4 +790,8 @@ async def scrape_leetcode_question(identifier: str) -> Optional[Dict[str, Any]]:
     title_slug = await get_title_slug(identifier)
     if not title_slug:
         return None
-    return await fetch_leetcode_question(title_slug)
+    details = await get_question_details(title_slug)
+    if details is not None and "slug" not in details:
+        # Callers key per-problem data (e.g. cached solutions) by slug; don't mutate the cached record
+        details = {**details, "slug": title_slug}
+    return details
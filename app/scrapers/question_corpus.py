@@ -0,0 +1,114 @@
+# app/scrapers/question_corpus.py
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.core.logger import logger
+
+CORPUS_VERSION = 1
+
+
+def _index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def build_corpus(records: Iterable[Tuple[str, Dict[str, Any]]], path: str) -> int:
+    """Write processed question records to an offline corpus. Returns the number of records.
+
+    The data file is the records' compact JSON concatenated back to back. The `.idx` file next to it
+    maps each slug to (offset, length). Both files are written to temporary names and
+    swapped in with a rename, so readers never see a half-written corpus.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    index: Dict[str, Tuple[int, int]] = {}
+    offset = 0
+    with open(path + ".tmp", "wb") as data:
+        for slug, record in records:
+            if slug in index:
+                continue  # First source wins
+            payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            data.write(payload)
+            index[slug] = (offset, len(payload))
+            offset += len(payload)
+    with open(_index_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": CORPUS_VERSION, "data_size": offset, "records": index}, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+    os.replace(_index_path(path) + ".tmp", _index_path(path))
+    return len(index)
+
+
+class QuestionCorpus:
+    """Read-only, memory-mapped view over a corpus built by `build_corpus`.
+
+    Only the slug index lives in RAM. Each `get` decodes one record from the mapping, so
+    the OS pages in just the questions actually served.
+    """
+
+    def __init__(self, path: str, index: Dict[str, Tuple[int, int]], data_file, data: Optional[mmap.mmap]):
+        self.path = path
+        self._index = index
+        self._file = data_file
+        self._data = data
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: str) -> Optional["QuestionCorpus"]:
+        """Open a corpus, or return None if it is missing or inconsistent."""
+        try:
+            with open(_index_path(path), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != CORPUS_VERSION:
+                logger.warning(f"Question corpus at {path} has unsupported version {meta.get('version')}.")
+                return None
+            data_file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open question corpus at {path}: {e}")
+            return None
+
+        size = os.fstat(data_file.fileno()).st_size
+        if size != meta.get("data_size"):
+            logger.warning(f"Question corpus at {path} does not match its index ({size} bytes); ignoring it.")
+            data_file.close()
+            return None
+        # mmap cannot map an empty file
+        data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        index = {slug: (entry[0], entry[1]) for slug, entry in meta.get("records", {}).items()}
+        logger.info(f"Opened question corpus at {path} with {len(index)} questions.")
+        return cls(path, index, data_file, data)
+
+    def get(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Return the record for a slug, or None if the corpus doesn't have it."""
+        entry = self._index.get(slug)
+        if entry is None or self._data is None:
+            self.misses += 1
+            return None
+        offset, length = entry
+        self.hits += 1
+        return json.loads(self._data[offset:offset + length])
+
+    def slugs(self) -> Iterator[str]:
+        """Iterate over the slugs in the corpus."""
+        return iter(self._index)
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        """Unmap the data and close the file."""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+        self._file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Question count and hit/miss counters."""
+        return {"questions": len(self._index), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,97 @@
+# app/scrapers/title_index.py
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def title_words(normalized: str) -> List[str]:
+    """Words of a normalized string with punctuation dropped ("two sum?" -> ["two", "sum"])."""
+    return _NON_ALNUM_RE.sub(" ", normalized).split()
+
+
+def _trigrams(normalized: str) -> List[str]:
+    """Distinct character trigrams of a normalized string, with word boundaries marked by spaces."""
+    padded = f" {_NON_ALNUM_RE.sub(' ', normalized).strip()} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def _within_edits(a: str, b: str, max_edits: int) -> bool:
+    """Whether the Levenshtein distance between `a` and `b` is at most `max_edits`."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+def covers_title(normalized_query: str, normalized_title: str) -> bool:
+    """Whether every word of the title appears in the query, allowing a typo per word.
+
+    Words of up to 7 characters may be one edit off and longer ones two, so "revers linkd list"
+    covers "reverse linked list" while "binary tree traversal" does not cover
+    "binary tree inorder traversal" and "sorting an array" does not cover "sort an array".
+    """
+    query_words = title_words(normalized_query)
+    for word in title_words(normalized_title):
+        max_edits = 1 if len(word) <= 7 else 2
+        if not any(_within_edits(word, candidate, max_edits) for candidate in query_words):
+            return False
+    return True
+
+
+class TrigramTitleIndex:
+    """Typo-tolerant title search over an inverted index of character trigrams.
+
+    Scores are the mean of containment (share of the query's trigrams found in the title) and
+    Jaccard similarity, so partial queries rank titles that contain them and, among those,
+    the closest-length titles first.
+    """
+
+    def __init__(self, entries: Sequence[Tuple[str, str]]):
+        """`entries` are (key, normalized title) pairs; search results return the keys."""
+        self.keys: List[str] = []
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        for key, normalized in entries:
+            grams = _trigrams(normalized)
+            if not grams:
+                continue
+            doc = len(self.keys)
+            self.keys.append(key)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(doc)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, normalized_query: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[str, float]]:
+        """Return up to `limit` (key, score) pairs with score >= `min_score`, best first."""
+        grams = [g for g in _trigrams(normalized_query) if g in self.postings]
+        query_size = len(_trigrams(normalized_query))
+        if not grams or not query_size:
+            return []
+        counts: Counter = Counter()
+        for gram in grams:
+            counts.update(self.postings[gram])  # C-accelerated counting
+
+        # Containment alone caps the score at (common / q + 1) / 2, so prune before scoring
+        min_common = max(1, (2 * min_score - 1) * query_size)
+        sizes = self.sizes
+        scored = []
+        for doc, common in counts.items():
+            if common < min_common:
+                continue
+            score = (common / query_size + common / (query_size + sizes[doc] - common)) / 2
+            if score >= min_score:
+                scored.append((score, -sizes[doc], doc))
+        scored.sort(reverse=True)
+        return [(self.keys[doc], round(score, 4)) for score, _, doc in scored[:limit]]
@@ -0,0 +1,87 @@
+"""Measure per-session memory of ChatSession against the previous dict-per-message layout.
+
+Usage: python benchmarks/bench_chat_memory.py [--sessions 10000 100000]
+(needs the usual app environment variables, e.g. GEMINI_API_KEY, since it imports app.memory)
+
+Each session holds a typical LeetCode turn: two short user messages, a short bot
+clarification, a medium explanation and one long solution answer with code.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.memory.chat_memory import ChatSession  # noqa: E402
+
+SOLUTION = (
+    "Approach: use a hash map from value to index. For each element x at index i, check whether "
+    "target - x was seen before; if so return both indices.\n\n```python\nclass Solution:\n"
+    "    def twoSum(self, nums: List[int], target: int) -> List[int]:\n        seen = {}\n"
+    "        for i, x in enumerate(nums):\n            if target - x in seen:\n"
+    "                return [seen[target - x], i]\n            seen[x] = i\n```\n\n"
+    "Time complexity: O(n). Space complexity: O(n).\n"
+)
+
+
+class LegacyChatSession:
+    """The previous representation: plain attributes and one dict per message."""
+
+    def __init__(self, session_id: str, max_history_length: int = 5):
+        self.session_id = session_id
+        self.history = deque(maxlen=max_history_length)
+        self.state = {}
+
+    def add_message(self, role: str, content: str):
+        """Append a message as a plain dict."""
+        self.history.append({"role": role, "content": content})
+
+
+def fill(session_cls, count: int):
+    """Create `count` sessions holding a typical LeetCode solution conversation."""
+    sessions = []
+    for i in range(count):
+        session = session_cls(f"00000000-0000-0000-0000-{i:012d}")
+        # Unique strings per session, like real traffic
+        session.add_message("user", f"Can you solve problem {i} for me?")
+        session.add_message("bot", f"Sure - which language would you like for problem {i}?")
+        session.add_message("user", "python")
+        session.add_message("bot", f"Walkthrough #{i}: " + SOLUTION[:700])
+        session.add_message("bot", f"Solution #{i}\n" + SOLUTION * 5)
+        sessions.append(session)
+    return sessions
+
+
+def measure(session_cls, count: int) -> float:
+    """Return the traced bytes per session for `count` filled sessions."""
+    gc.collect()
+    tracemalloc.start()
+    sessions = fill(session_cls, count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    gc.collect()
+    return current / count
+
+
+def main():
+    """Report per-session memory for each session count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for count in args.sessions:
+        legacy = measure(LegacyChatSession, count)
+        compact = measure(ChatSession, count)
+        print(
+            f"{count:>7} sessions: legacy {legacy / 1024:6.2f} KiB/session ({legacy * count / 2**20:7.1f} MiB), "
+            f"compact {compact / 1024:6.2f} KiB/session ({compact * count / 2**20:7.1f} MiB), "
+            f"{(1 - compact / legacy) * 100:4.1f}% smaller"
+        )
+
+
+if __name__ == "__main__":
+    main()
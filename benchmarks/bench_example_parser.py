@@ -0,0 +1,98 @@
+"""Benchmark the example parser against the previous regex + ast.literal_eval extractor.
+
+Usage: python benchmarks/bench_example_parser.py [data/question_html] [--repeat 500] [--array-size 2000]
+
+Reports throughput over the stored question corpus, then the cost of parsing one large array input.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.scrapers.example_parser import extract_examples_from_content, parse_input_data  # noqa: E402
+from app.scrapers.html_to_text import html_to_text  # noqa: E402
+
+
+def legacy_parse_input_data(input_text: str):
+    """Split variables the original way; kept as the reference implementation."""
+    variables = {}
+    for var_name, var_value_raw in re.findall(r'(\w+)\s*=\s*(.+?)(?:,\s*\w+\s*=|\Z)', input_text, re.DOTALL):
+        var_value = var_value_raw.strip()
+        try:
+            variables[var_name] = ast.literal_eval(var_value)
+        except (ValueError, SyntaxError):
+            variables[var_name] = var_value.strip("\"'")
+    return {"raw": input_text, "variables": variables}
+
+
+def legacy_extract_examples(content: str):
+    """Extract examples with the original per-example regexes."""
+    examples = []
+    for example_num, example_content in re.findall(
+        r'Example\s*(\d+):\s*(.*?)(?=Example\s*\d+:|$)', content, re.DOTALL | re.IGNORECASE
+    ):
+        example = {"example_number": int(example_num), "input": None, "output": None, "explanation": None}
+        input_match = re.search(r'Input:\s*(.+?)(?=\n(?:Output|Explanation))', example_content, re.DOTALL)
+        if input_match:
+            example["input"] = legacy_parse_input_data(input_match.group(1).strip())
+        output_match = re.search(r'Output:\s*(.+?)(?=\n(?:Explanation|Example|\Z))', example_content, re.DOTALL)
+        if output_match:
+            output_text = output_match.group(1).strip()
+            try:
+                example["output"] = ast.literal_eval(output_text)
+            except (ValueError, SyntaxError):
+                example["output"] = output_text
+        explanation_match = re.search(r'Explanation:\s*(.+?)(?=\nExample|\Z)', example_content, re.DOTALL)
+        if explanation_match:
+            example["explanation"] = explanation_match.group(1).strip()
+        examples.append(example)
+    return examples
+
+
+def timed(func, docs, repeat):
+    """Return the seconds taken to run `func` over every doc `repeat` times."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            func(doc)
+    return time.perf_counter() - start
+
+
+def main():
+    """Compare both extractors on the corpus and on one large array input."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="?", default="data/question_html")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--array-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = []
+    for name in sorted(os.listdir(args.corpus)):
+        if name.endswith(".html"):
+            with open(os.path.join(args.corpus, name), encoding="utf-8") as f:
+                texts.append(html_to_text(f.read()))
+
+    found = sum(len(extract_examples_from_content(t)) for t in texts)
+    print(f"Corpus: {len(texts)} documents, {found} examples")
+    legacy_time = timed(legacy_extract_examples, texts, args.repeat)
+    new_time = timed(extract_examples_from_content, texts, args.repeat)
+    print(f"Regex + literal_eval extractor: {legacy_time:.3f}s")
+    print(f"Single-pass extractor:          {new_time:.3f}s")
+    print(f"Speedup: {legacy_time / new_time:.1f}x")
+
+    big_input = f"nums = {json.dumps(list(range(args.array_size)))}, target = 7"
+    for label, func in (("legacy", legacy_parse_input_data), ("single-pass", parse_input_data)):
+        start = time.perf_counter()
+        parsed = func(big_input)["variables"]["nums"]
+        elapsed = (time.perf_counter() - start) * 1000
+        note = "" if isinstance(parsed, list) else " (kept raw: over MAX_VALUE_CHARS)"
+        print(f"{label:>11} parse of a {args.array_size}-element input: {elapsed:.1f} ms{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare html_to_text against the previous BeautifulSoup pipeline.
+
+Usage: python benchmarks/bench_html_to_text.py [data/question_html] [--repeat 200]
+
+Checks that both paths produce identical text for every file in the corpus, then reports throughput.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.scrapers.html_to_text import html_to_text  # noqa: E402
+
+
+def bs4_html_to_text(html_content: str) -> str:
+    """Clean HTML with the original fetch_leetcode_question code; kept as the reference implementation."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for br in soup.find_all("br"):
+        br.replace_with("\n")
+    for p in soup.find_all("p"):
+        p.append("\n\n")
+    for li in soup.find_all("li"):
+        li.insert(0, "* ")
+        li.append("\n")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    clean_content = soup.get_text(separator=" ").strip()
+    clean_content = re.sub(r'\s*\n\s*', '\n', clean_content).strip()
+    clean_content = re.sub(r'[ \t]{2,}', ' ', clean_content)
+    return clean_content
+
+
+def load_corpus(path: str):
+    """Read every .html file in `path`, keyed by file name."""
+    corpus = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".html"):
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                corpus[name] = f.read()
+    return corpus
+
+
+def throughput(func, docs, repeat):
+    """Return (seconds, MB/s) for running `func` over every doc `repeat` times."""
+    total_bytes = sum(len(d.encode("utf-8")) for d in docs) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            func(doc)
+    elapsed = time.perf_counter() - start
+    return elapsed, total_bytes / elapsed / 1e6
+
+
+def main():
+    """Compare both converters and check that their output matches."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="?", default="data/question_html")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    mismatches = [name for name, html in corpus.items() if html_to_text(html) != bs4_html_to_text(html)]
+    for name in mismatches:
+        print(f"MISMATCH: {name}")
+    print(f"Output equality: {len(corpus) - len(mismatches)}/{len(corpus)} documents identical")
+
+    docs = list(corpus.values())
+    legacy_time, legacy_mbps = throughput(bs4_html_to_text, docs, args.repeat)
+    new_time, new_mbps = throughput(html_to_text, docs, args.repeat)
+    print(f"BeautifulSoup pipeline: {legacy_time:.3f}s ({legacy_mbps:.2f} MB/s)")
+    print(f"html_to_text:           {new_time:.3f}s ({new_mbps:.2f} MB/s)")
+    print(f"Speedup: {legacy_time / new_time:.1f}x")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measure how long a fresh interpreter takes to import app.main (the container cold-start path).
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--top 15]
+(sets dummy GEMINI_API_KEY/SUPABASE_* values when they're not in the environment)
+
+Reports min/median wall time over several fresh interpreters, lists heavy SDKs that were
+imported eagerly, and shows the slowest imports by cumulative time from `python -X importtime`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# SDKs that must only load on first use / startup warm-up, never at import
+LAZY_MODULES = ("google.genai", "supabase")
+PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "eager = [m for m in {lazy!r} if m in sys.modules]\n"
+    "print(time.perf_counter() - start, ','.join(eager))\n"
+).format(lazy=LAZY_MODULES)
+
+
+def probe_env():
+    """Return an environment with placeholder credentials so app.main can be imported."""
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("SUPABASE_URL", "http://localhost")
+    env.setdefault("SUPABASE_ANON_KEY", "benchmark")
+    return env
+
+
+def import_app(extra_args=()):
+    """Import app.main in a fresh interpreter. Returns (seconds, eagerly loaded SDKs, stderr)."""
+    result = subprocess.run(
+        [sys.executable, *extra_args, "-c", PROBE],
+        cwd=ROOT, env=probe_env(), capture_output=True, text=True, check=True,
+    )
+    elapsed, _, eager = result.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), [m for m in eager.split(",") if m], result.stderr
+
+
+def slowest_imports(stderr: str, top: int):
+    """Return the `top` (cumulative microseconds, module) rows from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    """Time app startup over several runs and list the slowest imports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings = []
+    eager = []
+    for _ in range(args.runs):
+        elapsed, eager, _ = import_app()
+        timings.append(elapsed)
+    print(
+        f"import app.main over {args.runs} runs: min {min(timings) * 1000:.0f} ms, "
+        f"median {statistics.median(timings) * 1000:.0f} ms"
+    )
+    print(f"eagerly imported SDKs: {', '.join(eager) or 'none'}")
+
+    _, _, stderr = import_app(["-X", "importtime"])
+    print("\nslowest imports (cumulative):")
+    for cumulative, name in slowest_imports(stderr, args.top):
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Build the offline LeetCode question corpus from cached question data.
+
+Sources, in priority order (the first one to provide a slug wins):
+
+    --responses DIR   saved GraphQL responses, one <title-slug>.json per question
+                      ({"data": {"question": {...}}} or the bare question object)
+    --cache PATH      the on-disk question cache written by the app / warm_question_cache.py
+    the existing corpus at --out (skip with --fresh)
+
+    python build_question_corpus.py --responses graphql_dumps/
+    python build_question_corpus.py --cache cache/questions.sqlite3 --out cache/questions.corpus
+
+Running servers pick up the new corpus on restart.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, Tuple
+
+from app.core.config import settings
+from app.scrapers.leetcode_scraper import build_question_details
+from app.scrapers.question_corpus import QuestionCorpus, build_corpus
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def from_responses(directory: str) -> Iterator[Record]:
+    """Yield (slug, details) from saved GraphQL question responses."""
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  skipped  {name}: {e}")
+            continue
+        question = data.get("data", {}).get("question") if "data" in data else data
+        if not question or not question.get("content"):
+            print(f"  skipped  {name}: no question content")
+            continue
+        yield question.get("titleSlug") or name[: -len(".json")], build_question_details(question)
+
+
+def from_cache(path: str) -> Iterator[Record]:
+    """Yield (slug, details) from an on-disk question cache."""
+    # Reads the SQLiteCache table directly; expired rows are still better than nothing offline
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for key, value in conn.execute("SELECT key, value FROM cache"):
+            yield key, json.loads(value)
+    finally:
+        conn.close()
+
+
+def from_corpus(corpus: QuestionCorpus) -> Iterator[Record]:
+    """Yield every record of an existing corpus."""
+    for slug in list(corpus.slugs()):
+        yield slug, corpus.get(slug)
+
+
+def main():
+    """Build the corpus from the given sources."""
+    parser = argparse.ArgumentParser(description="Build the offline LeetCode question corpus.")
+    parser.add_argument("--responses", help="Directory of saved GraphQL question responses")
+    parser.add_argument("--cache", default=os.path.join(settings.CACHE_DIR, "questions.sqlite3"))
+    parser.add_argument("--out", default=settings.QUESTION_CORPUS_PATH)
+    parser.add_argument("--fresh", action="store_true", help="Don't carry over questions from the existing corpus")
+    args = parser.parse_args()
+
+    sources = []
+    if args.responses:
+        sources.append(from_responses(args.responses))
+    if os.path.exists(args.cache):
+        sources.append(from_cache(args.cache))
+    existing = None if args.fresh else QuestionCorpus.open(args.out)
+    if existing:
+        sources.append(from_corpus(existing))
+    if not sources:
+        print("Nothing to import: pass --responses or point --cache at a question cache.")
+        sys.exit(1)
+
+    def records() -> Iterator[Record]:
+        for source in sources:
+            yield from source
+
+    count = build_corpus(records(), args.out)
+    if existing:
+        existing.close()
+    print(f"Wrote {count} questions to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Offline evaluation of the local intent classifier against a labeled query file.
+
+Usage: python evaluate_intent_classifier.py [data/intent_queries.jsonl] [--threshold 0.85]
+
+Each line of the input file is a JSON object with "query" and "intent" keys.
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from app.llm.intent_classifier import INTENTS, LocalIntentClassifier
+
+
+def main():
+    """Print local coverage, precision, latency and confusion counts on a labelled query file."""
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier.")
+    parser.add_argument("path", nargs="?", default="data/intent_queries.jsonl")
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    with open(args.path) as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    classifier = LocalIntentClassifier(threshold=args.threshold)
+    classifier.model  # Train before timing
+    answered = correct = 0
+    confusion = Counter()
+    start = time.perf_counter()
+    for sample in samples:
+        intent, confidence, stage = classifier.predict(sample["query"])
+        if confidence < args.threshold:
+            continue
+        answered += 1
+        confusion[(sample["intent"], intent)] += 1
+        if intent == sample["intent"]:
+            correct += 1
+        else:
+            print(f"MISS [{stage} {confidence:.2f}] {sample['query']!r}: expected {sample['intent']}, got {intent}")
+    elapsed = time.perf_counter() - start
+
+    total = len(samples)
+    print(f"\nSamples: {total}")
+    print(f"Answered locally: {answered} ({answered / total:.0%}), escalated: {total - answered}")
+    print(f"Local precision: {correct / answered:.1%}" if answered else "Local precision: n/a")
+    print(f"Mean latency: {elapsed / total * 1e6:.1f} us/query")
+    print("\nConfusion (expected -> predicted):")
+    for expected in INTENTS:
+        row = "  ".join(f"{predicted}={confusion[(expected, predicted)]}" for predicted in INTENTS)
+        print(f"  {expected:<13} {row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
-from unittest.mock import MagicMock, patch, AsyncMock
-from fastapi.testclient import TestClient
 from fastapi import HTTPException
+from fastapi.testclient import TestClient
 
 # Patch settings before importing app to avoid validation errors
 with patch("app.core.config.Settings") as MockSettings:
@@ -11,8 +14,8 @@ with patch("app.core.config.Settings") as MockSettings:
     MockSettings.return_value.RATE_LIMIT_RULES = "{}"
     MockSettings.return_value.CORS_ORIGINS = []
     
-    from app.main import app
     from app.api.chat import check_rate_limit, in_memory_rate_limit
+    from app.main import app
 
 client = TestClient(app)
 
@@ -79,3 +82,212 @@ def test_migrate_sessions_no_auth(mock_supabase):
     payload = {"guest_session_ids": ["sess1"]}
     response = client.post("/sessions/migrate", json=payload)
     assert response.status_code == 401
+
+def test_chat_classifies_intent_once_per_authenticated_turn(mock_supabase):
+    """An authenticated turn classifies the query only once."""
+    mock_supabase.store_message = AsyncMock(return_value=True)
+    mock_supabase.get_messages_by_session_id = AsyncMock(return_value=[])
+
+    async def fake_stream(*args, **kwargs):
+        yield "Hello!"
+
+    with patch("app.api.chat.gemini_integration") as mock_gemini, patch("app.api.chat.message_queue") as mock_queue:
+        mock_gemini.classify_intent_with_llm = AsyncMock(return_value="general")
+        mock_gemini.stream_chat_response = fake_stream
+        response = client.post(
+            "/chat",
+            json={"user_input": "hi there"},
+            headers={"X-Session-ID": str(uuid.uuid4()), "Authorization": "Bearer token"},
+        )
+
+    assert response.status_code == 200
+    assert "Hello!" in response.text
+    mock_gemini.classify_intent_with_llm.assert_awaited_once_with("hi there")
+    assert mock_supabase.store_message.await_args.kwargs["intent"] == "general"
+    assert mock_queue.enqueue.call_args.kwargs["intent"] == "general"
+
+
+def test_solution_is_generated_once_and_replayed_from_cache(mock_supabase, monkeypatch):
+    """A repeated solution request is replayed from the solution cache."""
+    from app.api.chat import chat_memory
+    from app.core.cache import LRUCache
+    from app.llm import solution_cache
+
+    monkeypatch.setattr(solution_cache, "_solution_cache", LRUCache("solutions"))
+    mock_supabase.store_message = AsyncMock(return_value=True)
+    mock_supabase.get_messages_by_session_id = AsyncMock(return_value=[])
+    calls = []
+
+    async def fake_stream(*args, **kwargs):
+        calls.append(kwargs["user_query"])
+        yield "Use a hash map. "
+        yield "O(n) time."
+
+    session_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    for session_id in session_ids:
+        session = chat_memory.get_session(session_id)
+        session.set_state("awaiting_language", True)
+        session.set_state("scraped_question", {"title": "Two Sum", "slug": "two-sum"})
+        session.set_state("request_visualization", False)
+
+    responses = []
+    with patch("app.api.chat.gemini_integration") as mock_gemini, patch("app.api.chat.message_queue") as mock_queue:
+        mock_gemini.classify_intent_with_llm = AsyncMock(return_value="cs_tutor")
+        mock_gemini.stream_chat_response = fake_stream
+        for session_id, language in zip(session_ids, ["Python3", "python"]):
+            responses.append(client.post(
+                "/chat",
+                json={"user_input": language},
+                headers={"X-Session-ID": session_id, "Authorization": "Bearer token"},
+            ))
+
+    assert len(calls) == 1  # The second user got the cached answer
+    assert all(r.status_code == 200 and "O(n) time." in r.text for r in responses)
+    assert mock_queue.enqueue.call_args.kwargs["metadata"]["cached"] is True
+    replayed = chat_memory.get_session(session_ids[1])
+    assert replayed.get_history()[-1]["content"] == "Use a hash map. O(n) time."
+    assert replayed.get_state("awaiting_language") is False
+
+
+def test_conceptual_question_is_answered_from_semantic_cache(mock_supabase, monkeypatch):
+    """A repeated conceptual question is answered from the semantic cache."""
+    from app.llm import semantic_cache
+
+    monkeypatch.setattr(semantic_cache, "_semantic_cache", semantic_cache.SemanticCache(max_entries=8))
+    mock_supabase.store_message = AsyncMock(return_value=True)
+    mock_supabase.get_messages_by_session_id = AsyncMock(return_value=[])
+    calls = []
+
+    async def fake_stream(user_query, system_prompt, chat_history):
+        calls.append(user_query)
+        yield "Binary search halves "
+        yield "the range each step."
+
+    responses = []
+    with patch("app.api.chat.gemini_integration") as mock_gemini, \
+            patch("app.api.chat.message_queue") as mock_queue, \
+            patch("app.api.chat.scrape_leetcode_question", AsyncMock(return_value=None)):
+        mock_gemini.classify_intent_with_llm = AsyncMock(return_value="cs_tutor")
+        mock_gemini.stream_chat_response = fake_stream
+        for question in ["Explain binary search", "what is binary search?"]:
+            responses.append(client.post(
+                "/chat",
+                json={"user_input": question},
+                headers={"X-Session-ID": str(uuid.uuid4()), "Authorization": "Bearer token"},
+            ))
+
+    assert calls == ["Explain binary search"]  # The rephrased question was served from the cache
+    assert all(r.status_code == 200 and "the range each step." in r.text for r in responses)
+    assert mock_queue.enqueue.call_args.kwargs["metadata"]["cached"] is True
+
+
+def _slow_model_stream(state):
+    async def stream(*args, **kwargs):
+        try:
+            yield "Binary search "
+            await asyncio.sleep(10)  # Still generating when the client goes away
+            yield "never sent"
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        finally:
+            state["closed"] = True
+    return stream
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_model_stream_and_keeps_partial_answer(monkeypatch):
+    """A disconnect cancels the model stream and persists the partial answer."""
+    from app.api import chat
+    from app.memory.chat_memory import ChatSession
+
+    monkeypatch.setattr(chat.settings, "STREAM_DISCONNECT_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(chat.settings, "STREAM_DISCONNECT_POLICY", "persist")
+    monkeypatch.setattr(chat, "stream_disconnects", chat.StreamDisconnects())
+    state = {"gone": False}
+
+    async def is_disconnected():
+        return state["gone"]
+
+    session = ChatSession(str(uuid.uuid4()))
+    turn = chat.TurnContext(
+        user_input="hello there", session_id=session.session_id, intent="general", is_disconnected=is_disconnected
+    )
+    events = []
+    with patch("app.api.chat.gemini_integration") as mock_gemini, patch("app.api.chat.message_queue") as mock_queue:
+        mock_gemini.stream_chat_response = _slow_model_stream(state)
+        async for event in chat.stream_response(turn, session):
+            events.append(event)
+            state["gone"] = True  # The tab is closed after the first chunk
+
+    assert len(events) == 1
+    assert state["cancelled"] and state["closed"]  # Upstream fully unwound before the response ended
+    assert session.get_history()[-1] == {"role": "bot", "content": "Binary search "}
+    assert mock_queue.enqueue.call_args.kwargs["metadata"]["interrupted"] is True
+    stats = chat.stream_disconnects.stats()
+    assert stats["detected"] == 1 and stats["upstream_cancelled"] == 1 and stats["persisted"] == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_response_stops_model_stream_and_discards_partial_answer(monkeypatch):
+    """Closing the response stops the model stream and drops the partial answer."""
+    from app.api import chat
+    from app.memory.chat_memory import ChatSession
+
+    monkeypatch.setattr(chat.settings, "STREAM_DISCONNECT_POLICY", "discard")
+    monkeypatch.setattr(chat, "stream_disconnects", chat.StreamDisconnects())
+    state = {}
+    session = ChatSession(str(uuid.uuid4()))
+    session.add_message("user", "hello there")
+    turn = chat.TurnContext(user_input="hello there", session_id=session.session_id, intent="general")
+    with patch("app.api.chat.gemini_integration") as mock_gemini, patch("app.api.chat.message_queue") as mock_queue:
+        mock_gemini.stream_chat_response = _slow_model_stream(state)
+        response = chat.stream_response(turn, session)
+        assert "Binary search" in await response.__anext__()
+        await response.aclose()  # A write to the client failed and the server closed the response
+
+    assert state["closed"]
+    assert [m["role"] for m in session.get_history()] == ["user"]
+    mock_queue.enqueue.assert_not_called()
+    stats = chat.stream_disconnects.stats()
+    assert stats["closed"] == 1 and stats["discarded"] == 1 and stats["policy"] == "discard"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_response_still_saves_to_shared_store_and_schedules_summary(monkeypatch, tmp_path):
+    """A response cancelled mid-stream writes the partial answer to a shared store and schedules the summary."""
+    import anyio
+
+    from app.api import chat
+    from app.memory.chat_memory import ChatMemory, ChatSession
+    from app.memory.session_store import SQLiteSessionStore
+
+    monkeypatch.setattr(chat.settings, "STREAM_DISCONNECT_POLICY", "persist")
+    monkeypatch.setattr(chat.settings, "SUMMARY_ENABLED", True)
+    monkeypatch.setattr(chat, "stream_disconnects", chat.StreamDisconnects())
+    memory = ChatMemory(store=SQLiteSessionStore(str(tmp_path / "sessions.sqlite3")))
+    monkeypatch.setattr(chat, "chat_memory", memory)
+    summarizer = MagicMock()
+    monkeypatch.setattr(chat, "summarizer", summarizer)
+    state = {}
+    session = ChatSession(str(uuid.uuid4()))
+    session.add_message("user", "hello there")
+    turn = chat.TurnContext(user_input="hello there", session_id=session.session_id, intent="general")
+    started = asyncio.Event()
+
+    async def consume():
+        async for _ in chat.stream_response(turn, session):
+            started.set()
+
+    with patch("app.api.chat.gemini_integration") as mock_gemini, patch("app.api.chat.message_queue"):
+        mock_gemini.stream_chat_response = _slow_model_stream(state)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(consume)
+            await started.wait()
+            tg.cancel_scope.cancel()  # The server cancels the response when the client goes away
+
+    assert state["closed"]
+    stored = memory.store.get(session.session_id)
+    assert stored.get_history()[-1] == {"role": "bot", "content": "Binary search "}
+    summarizer.schedule.assert_called_once_with(session, memory.aupdate_session)
+    memory.store.close()
@@ -0,0 +1,143 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache import LRUCache, SQLiteCache, TieredCache, build_cache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Entries beyond max_entries are evicted least recently used first."""
+    cache = LRUCache("test", max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now least recently used
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_respects_byte_budget():
+    """Entries are evicted to stay within max_bytes."""
+    cache = LRUCache("test", max_entries=100, max_bytes=10)
+    cache.set("a", "12345")
+    cache.set("b", "67890")
+    cache.set("c", "x")
+
+    assert cache.get("a") is None
+    assert cache.total_bytes <= 10
+    cache.set("huge", "y" * 50)
+    assert cache.get("huge") is None
+
+
+def test_lru_cache_ttl_expiry():
+    """Expired entries are no longer served."""
+    cache = LRUCache("test", ttl=10)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", "1")
+    with patch("app.core.cache.time.monotonic", return_value=105.0):
+        assert cache.get("a") == "1"
+    with patch("app.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_cache_hit_miss_counters():
+    """Hits and misses are counted in stats."""
+    cache = LRUCache("test")
+    cache.set("a", "1")
+    cache.get("a")
+    cache.get("missing")
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    """Two SQLite caches on one file see each other's entries."""
+    path = str(tmp_path / "intent.sqlite3")
+    writer = SQLiteCache("intent", path)
+    reader = SQLiteCache("intent", path)
+    writer.set("explain bfs", {"intent": "cs_tutor"})
+
+    assert reader.get("explain bfs") == {"intent": "cs_tutor"}
+
+
+def test_sqlite_cache_evicts_beyond_max_entries(tmp_path):
+    """The SQLite cache evicts the oldest entries beyond max_entries."""
+    cache = SQLiteCache("intent", str(tmp_path / "c.sqlite3"), max_entries=2)
+    with patch("app.core.cache.time.time", side_effect=[1.0, 2.0, 3.0]):
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.set("c", "3")
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path):
+    """A disk hit in the tiered cache is promoted to memory."""
+    cache = build_cache("tiered", backend="tiered", cache_dir=str(tmp_path))
+    assert isinstance(cache, TieredCache)
+    cache.disk.set("k", "v")
+
+    assert cache.get("k") == "v"
+    assert cache.memory.get("k") == "v"
+
+
+def test_sqlite_cache_respects_byte_budget(tmp_path):
+    """The SQLite cache evicts entries to stay within max_bytes."""
+    cache = SQLiteCache("questions", str(tmp_path / "q.sqlite3"), max_entries=100, max_bytes=30)
+    with patch("app.core.cache.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+        cache.set("a", "x" * 10)  # 12 bytes as JSON
+        cache.set("b", "y" * 10)
+        cache.set("c", "z" * 10)  # Pushes the table to 36 bytes; "a" is the least recently used
+        cache.set("huge", "w" * 50)  # Larger than the whole budget; never stored
+
+    assert cache.get("a") is None
+    assert cache.get("huge") is None
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] <= 30
+    assert cache.stats()["evictions"] == 1
+
+
+def test_tiered_cache_promotion_keeps_remaining_ttl(tmp_path):
+    """A promoted entry keeps its remaining TTL instead of a fresh one."""
+    cache = build_cache("tiered", backend="tiered", ttl=100, cache_dir=str(tmp_path))
+    with patch("app.core.cache.time.time", return_value=1000.0):
+        cache.disk.set("k", "v")
+    with patch("app.core.cache.time.time", return_value=1090.0), \
+            patch("app.core.cache.time.monotonic", return_value=50.0):
+        assert cache.get("k") == "v"  # 10 s of the disk entry's TTL are left
+    with patch("app.core.cache.time.monotonic", return_value=59.0):
+        assert cache.memory.get("k") == "v"
+    with patch("app.core.cache.time.monotonic", return_value=61.0):
+        assert cache.memory.get("k") is None  # Not a fresh 100 s TTL
+
+
+@pytest.mark.asyncio
+async def test_async_access_runs_disk_io_in_the_executor(tmp_path):
+    """Async access to a disk cache runs in the executor."""
+    cache = build_cache("tiered", backend="tiered", cache_dir=str(tmp_path))
+    loop_thread = threading.get_ident()
+    disk_threads = []
+    original = cache.disk.get_entry
+
+    def tracking_get_entry(key):
+        disk_threads.append(threading.get_ident())
+        return original(key)
+
+    cache.disk.get_entry = tracking_get_entry
+    await cache.aset("k", {"answer": 42})
+    cache.memory.clear()
+
+    assert await cache.aget("k") == {"answer": 42}
+    assert disk_threads and loop_thread not in disk_threads
+    assert await cache.aget("k") == {"answer": 42}  # Promoted; served from memory
+    assert len(disk_threads) == 1
+    assert await cache.aget("missing") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
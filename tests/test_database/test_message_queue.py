@@ -0,0 +1,132 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.database.message_queue import MessageWriteQueue
+
+
+@pytest.fixture
+def mock_store_messages():
+    """Patch the batch insert used by the message queue."""
+    with patch("app.database.message_queue.SupabaseManager.store_messages", new_callable=AsyncMock) as mock:
+        mock.return_value = True
+        yield mock
+
+
+@pytest.mark.asyncio
+async def test_enqueue_coalesces_into_single_batch(mock_store_messages):
+    """Messages enqueued together are stored in one batch."""
+    queue = MessageWriteQueue(batch_size=10, flush_interval=0.05)
+    session_id = str(uuid.uuid4())
+    for i in range(3):
+        assert queue.enqueue(session_id, "bot", f"msg {i}") is True
+
+    await queue.stop()
+
+    mock_store_messages.assert_awaited_once()
+    batch = mock_store_messages.await_args[0][0]
+    assert [r["content"] for r in batch] == ["msg 0", "msg 1", "msg 2"]
+    assert all("created_at" in r for r in batch)
+    assert queue.stats()["written"] == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_size_triggers_flush(mock_store_messages):
+    """Reaching the batch size flushes without waiting for the interval."""
+    queue = MessageWriteQueue(batch_size=2, flush_interval=10)
+    session_id = str(uuid.uuid4())
+    queue.enqueue(session_id, "user", "a")
+    queue.enqueue(session_id, "bot", "b")
+    await asyncio.sleep(0.01)
+
+    mock_store_messages.assert_awaited_once()
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_restarted_worker_flushes_records_left_in_the_queue(mock_store_messages):
+    """Records queued when the worker died are flushed by the restarted worker."""
+    queue = MessageWriteQueue(batch_size=10, flush_interval=0.01)
+    session_id = str(uuid.uuid4())
+    queue.enqueue(session_id, "bot", "a")
+    queue.enqueue(session_id, "bot", "b")
+    queue._worker.cancel()
+    await asyncio.sleep(0)
+    assert queue._worker.done() and queue.depth == 2
+
+    queue.enqueue(session_id, "bot", "c")  # Restarts the worker
+    await queue.stop()
+
+    written = [r["content"] for call in mock_store_messages.await_args_list for r in call.args[0]]
+    assert written == ["a", "b", "c"]
+    assert queue.stats()["written"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried(mock_store_messages):
+    """A failed batch is retried on the next flush."""
+    mock_store_messages.side_effect = [False, True]
+    queue = MessageWriteQueue(batch_size=1, flush_interval=0.01, max_retries=2)
+    with patch("app.database.message_queue.asyncio.sleep", new_callable=AsyncMock):
+        queue.enqueue(str(uuid.uuid4()), "bot", "hello")
+        await queue.stop()
+
+    assert mock_store_messages.await_count == 2
+    stats = queue.stats()
+    assert stats["retries"] == 1
+    assert stats["written"] == 1
+    assert stats["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_invalid_session_id(mock_store_messages):
+    """Messages with an invalid session id are rejected at enqueue time."""
+    queue = MessageWriteQueue()
+    assert queue.enqueue("not-a-uuid", "bot", "hello") is False
+    assert queue.stats()["enqueued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_batch_falls_back_to_single_rows(mock_store_messages):
+    """A batch that keeps failing is stored row by row so good rows survive."""
+    async def store(records):
+        # The batch insert fails because of one bad row; every other row is fine on its own
+        return len(records) == 1 and records[0]["content"] != "bad"
+
+    mock_store_messages.side_effect = store
+    queue = MessageWriteQueue(batch_size=10, flush_interval=0.01, max_retries=1)
+    session_id = str(uuid.uuid4())
+    with patch("app.database.message_queue.asyncio.sleep", new_callable=AsyncMock):
+        for content in ["a", "bad", "c"]:
+            queue.enqueue(session_id, "bot", content)
+        await queue.stop()
+
+    stats = queue.stats()
+    assert stats["written"] == 2
+    assert stats["dropped"] == 1
+    assert stats["row_fallbacks"] == 1
+    singles = [call[0][0] for call in mock_store_messages.await_args_list if len(call[0][0]) == 1]
+    assert [r[0]["content"] for r in singles] == ["a", "bad", "c"]
+
+
+@pytest.mark.asyncio
+async def test_stop_does_not_hang_when_queue_is_full(mock_store_messages):
+    """Stopping a full queue does not block."""
+    release = asyncio.Event()
+
+    async def blocked(records):
+        await release.wait()
+        return True
+
+    mock_store_messages.side_effect = blocked
+    queue = MessageWriteQueue(batch_size=1, flush_interval=0.01, max_size=1)
+    session_id = str(uuid.uuid4())
+    queue.enqueue(session_id, "bot", "in flight")
+    await asyncio.sleep(0.01)  # The worker is now stuck writing the first message
+    queue.enqueue(session_id, "bot", "fills the queue")
+
+    await asyncio.wait_for(queue.stop(timeout=0.05), timeout=1)
+    assert queue.depth == 0
+    release.set()
@@ -1,8 +1,11 @@
-import pytest
+import uuid
 from unittest.mock import MagicMock, patch
-from app.database.supabase_client import SupabaseManager
+
+import pytest
 from supabase import Client
-import uuid
+
+from app.database.supabase_client import SupabaseManager
+
 
 @pytest.fixture(autouse=True)
 def mock_supabase_client():
@@ -290,3 +293,27 @@ async def test_store_message_invalid_parent_message_uuid(mock_supabase_client):
 
     assert result is False
     mock_supabase_client.table.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_execute_runs_off_event_loop_thread(mock_supabase_client):
+    """Blocking supabase-py calls run on a worker thread."""
+    import threading
+
+    loop_thread = threading.get_ident()
+    seen = {}
+
+    def blocking_execute():
+        seen["thread"] = threading.get_ident()
+        result = MagicMock()
+        result.data = []
+        return result
+
+    select = mock_supabase_client.table.return_value.select.return_value
+    select.eq.return_value.order.return_value.execute.side_effect = blocking_execute
+
+    result = await SupabaseManager.get_messages_by_session_id(str(uuid.uuid4()))
+
+    assert result == []
+    assert seen["thread"] != loop_thread
+    SupabaseManager.shutdown()
+    assert SupabaseManager._executor is None
@@ -1,14 +1,18 @@
-import pytest
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import types
+
 from app.llm.gemini_integration import (
     clean_json_response,
-    get_visualization_data,
     get_chat_response,
-    stream_chat_response,
     get_contextual_visualization_data,
+    get_visualization_data,
+    stream_chat_response,
 )
 from app.llm.prompts import VISUALIZATION_PROMPT
-from google.genai import types
+
 
 # Test for clean_json_response
 def test_clean_json_response():
@@ -80,8 +84,10 @@ async def test_get_chat_response_success(mock_genai_client):
     result = await get_chat_response(user_query, system_prompt, chat_history)
 
     mock_genai_client.aio.chats.create.assert_called_once()
-    mock_chat_session.send_message.assert_any_call(system_prompt)
-    mock_chat_session.send_message.assert_called_with(user_query)
+    # The system prompt is a system instruction, not an extra round trip
+    _, kwargs = mock_genai_client.aio.chats.create.call_args
+    assert kwargs['config'].system_instruction == system_prompt
+    mock_chat_session.send_message.assert_called_once_with(user_query)
     assert result == "Hello from bot"
 
 @pytest.mark.asyncio
@@ -107,8 +113,8 @@ async def test_get_chat_response_with_history(mock_genai_client):
     assert kwargs['history'][0].role == 'user'
     assert kwargs['history'][0].parts[0].text == 'Hello'
     
-    mock_chat_session.send_message.assert_any_call(system_prompt)
-    mock_chat_session.send_message.assert_any_call(user_query)
+    assert kwargs['config'].system_instruction == system_prompt
+    mock_chat_session.send_message.assert_called_once_with(user_query)
     assert result == "Bot response with history"
 
 @pytest.mark.asyncio
@@ -137,11 +143,10 @@ async def test_stream_chat_response_success(mock_genai_client):
     _, kwargs = mock_genai_client.aio.models.generate_content_stream.call_args
     # Verify contents structure
     contents = kwargs['contents']
-    assert len(contents) == 2 
+    assert len(contents) == 1
+    assert kwargs['config'].system_instruction == system_prompt
     assert contents[0].role == 'user'
-    assert contents[0].parts[0].text == system_prompt
-    assert contents[1].role == 'user'
-    assert contents[1].parts[0].text == user_query
+    assert contents[0].parts[0].text == user_query
 
 @pytest.mark.asyncio
 @pytest.mark.asyncio
@@ -164,12 +169,12 @@ async def test_stream_chat_response_with_history(mock_genai_client):
     assert chunks == ["history_chunk1", "history_chunk2"]
     _, kwargs = mock_genai_client.aio.models.generate_content_stream.call_args
     contents = kwargs['contents']
-    assert len(contents) == 4
-    assert contents[0].parts[0].text == system_prompt
-    assert contents[1].parts[0].text == "Once upon a time"
-    assert contents[2].role == "model"
-    assert contents[2].parts[0].text == "there was a brave knight"
-    assert contents[3].parts[0].text == user_query
+    assert len(contents) == 3
+    assert kwargs['config'].system_instruction == system_prompt
+    assert contents[0].parts[0].text == "Once upon a time"
+    assert contents[1].role == "model"
+    assert contents[1].parts[0].text == "there was a brave knight"
+    assert contents[2].parts[0].text == user_query
 
 @pytest.mark.asyncio
 async def test_get_contextual_visualization_data_success(mock_genai_client):
@@ -245,3 +250,81 @@ async def test_get_contextual_visualization_data_exception(mock_genai_client):
     result = await get_contextual_visualization_data(user_query)
 
     assert result is None
+
+@pytest.mark.asyncio
+async def test_stream_chat_response_uses_cached_prompt_and_falls_back(mock_genai_client, monkeypatch):
+    """Streams use the cached prompt and fall back to inline on a cache error."""
+    from app.llm import gemini_integration
+    from app.llm.prompt_cache import InMemoryCachesAPI, PromptCache
+
+    cache = PromptCache(min_tokens=1)
+    monkeypatch.setattr(gemini_integration, "prompt_cache", cache)
+    mock_genai_client.aio.caches = InMemoryCachesAPI()
+    configs = []
+
+    async def fake_stream(model, contents, config):
+        configs.append(config)
+
+        async def chunks():
+            if config.cached_content and len(configs) == 2:
+                raise RuntimeError("cached content not found")
+            yield MagicMock(text="ok")
+        return chunks()
+
+    mock_genai_client.aio.models.generate_content_stream = fake_stream
+    system_prompt = "You are a CS tutor."
+
+    # First turn sends the prompt inline while the cache is created in the background
+    assert [c async for c in stream_chat_response("q1", system_prompt)] == ["ok"]
+    await asyncio.sleep(0)
+    assert configs[0].system_instruction == system_prompt and configs[0].cached_content is None
+
+    # Next turn references the cache; the provider rejects it, so the turn retries inline
+    assert [c async for c in stream_chat_response("q2", system_prompt)] == ["ok"]
+    assert configs[1].cached_content.startswith("cachedContents/local-")
+    assert configs[1].system_instruction is None
+    assert configs[2].system_instruction == system_prompt
+    assert cache.stats()["invalidations"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_streams_share_one_gemini_call(mock_genai_client):
+    """Concurrent identical streams share one Gemini call."""
+    release = asyncio.Event()
+
+    async def mock_iter():
+        await release.wait()
+        yield MagicMock(text="shared")
+
+    mock_genai_client.aio.models.generate_content_stream = AsyncMock(side_effect=lambda **_: mock_iter())
+    history = [{"role": "user", "content": "Once upon a time"}]
+
+    async def consume(query):
+        return [chunk async for chunk in stream_chat_response(query, "You are a storyteller.", history)]
+
+    tasks = [asyncio.create_task(consume("Continue")) for _ in range(3)]
+    other = asyncio.create_task(consume("Something else"))
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await asyncio.gather(*tasks) == [["shared"]] * 3
+    assert await other == ["shared"]
+    assert mock_genai_client.aio.models.generate_content_stream.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_closes_the_gemini_stream(mock_genai_client):
+    """Closing the chat stream closes the Gemini stream."""
+    closed = asyncio.Event()
+
+    async def mock_iter():
+        try:
+            yield MagicMock(text="first")
+            await asyncio.sleep(10)
+            yield MagicMock(text="never")
+        finally:
+            closed.set()
+
+    mock_genai_client.aio.models.generate_content_stream = AsyncMock(return_value=mock_iter())
+    stream = stream_chat_response("Tell me a story", "You are a storyteller.", [])
+    assert await stream.__anext__() == "first"
+    await stream.aclose()  # The only listener left; the shared upstream is cancelled
+    await asyncio.wait_for(closed.wait(), timeout=1)
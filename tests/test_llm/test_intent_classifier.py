@@ -0,0 +1,72 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.llm import gemini_integration
+from app.llm.intent_classifier import LocalIntentClassifier, classify_by_rules
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("Bubble sort visualization with array [64, 34, 25, 12]", "visualization"),
+        ("Trace DFS on tree with root=1, left=2, right=3", "visualization"),
+        ("explain how quicksort works", "cs_tutor"),
+        ("solve leetcode 1. two sum", "cs_tutor"),
+        ("hello there", "general"),
+        ("thanks!", "general"),
+    ],
+)
+def test_classify_by_rules(query, expected):
+    """Unambiguous queries are labelled by the keyword rules."""
+    intent, confidence = classify_by_rules(query)
+    assert intent == expected
+    assert confidence >= 0.9
+
+
+def test_classify_by_rules_abstains_on_ambiguous_query():
+    """The rules abstain on an ambiguous query."""
+    assert classify_by_rules("show me how it works") is None
+
+
+def test_local_classifier_escalates_below_threshold():
+    """Predictions below the confidence threshold are escalated."""
+    classifier = LocalIntentClassifier(threshold=1.01)
+    assert classifier.classify("hello") is None
+    assert classifier.stats()["escalations"] == 1
+
+
+def test_local_classifier_model_learns_seed_examples():
+    """The local model labels a general query as general."""
+    classifier = LocalIntentClassifier()
+    probs = classifier.model.predict_proba("what can you help me with")
+    assert max(probs, key=probs.get) == "general"
+
+
+@pytest.mark.asyncio
+async def test_classify_intent_with_llm_skips_llm_for_confident_query():
+    """A confident local prediction skips the Gemini call."""
+    with patch("app.llm.gemini_integration.client") as mock_client:
+        mock_client.aio.models.generate_content = AsyncMock()
+        intent = await gemini_integration.classify_intent_with_llm("visualize merge sort on [3, 1, 2]")
+
+    assert intent == "visualization"
+    mock_client.aio.models.generate_content.assert_not_called()
+
+
+@pytest.mark.parametrize("query", ["what is love", "what is the meaning of life", "explain the plot of inception"])
+def test_off_topic_questions_are_not_labelled_cs_tutor(query):
+    """Off-topic questions are not labelled as CS tutor questions."""
+    classifier = LocalIntentClassifier()
+    classifier.train()
+    assert classifier.classify(query) in (None, "general")
+
+
+def test_classify_escalates_instead_of_training_on_the_request_path():
+    """An untrained model escalates rather than training during a request."""
+    classifier = LocalIntentClassifier()
+    assert classifier.classify("tell me something interesting") is None
+    assert classifier._model is None
+    assert classifier.classify("hello there") == "general"  # Rules still answer
+    classifier.train()
+    assert classifier.classify("tell me a joke please") == "general"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.llm import prompt_cache as prompt_cache_module
+from app.llm.prompt_cache import InMemoryCachesAPI, PromptCache
+
+LONG_PROMPT = "You are an expert computer science tutor. " * 50
+
+
+async def settle():
+    """Let background create/refresh tasks run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_creates_in_background_then_hits():
+    """The first lookup starts a background create; later lookups hit."""
+    caches = InMemoryCachesAPI()
+    cache = PromptCache(ttl=600, min_tokens=100)
+    assert cache.lookup(caches, "model-a", LONG_PROMPT) is None  # Miss: sent inline this turn
+    assert cache.lookup(caches, "model-a", LONG_PROMPT) is None  # Creation already in flight
+    await settle()
+    assert caches.calls["create"] == 1
+    name = cache.lookup(caches, "model-a", LONG_PROMPT)
+    assert caches.caches[name]["system_instruction"] == LONG_PROMPT
+    assert caches.caches[name]["ttl"] == "600s"
+    # Caches are per model
+    assert cache.lookup(caches, "model-b", LONG_PROMPT) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["creates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_skips_small_prompts_and_disabled():
+    """Small prompts and a disabled cache are never cached."""
+    caches = InMemoryCachesAPI()
+    assert PromptCache(min_tokens=100).lookup(caches, "m", "Be brief.") is None
+    assert PromptCache(min_tokens=1, enabled=False).lookup(caches, "m", LONG_PROMPT) is None
+    await settle()
+    assert caches.calls["create"] == 0
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_refreshes_before_expiry_and_recreates_after(monkeypatch):
+    """Entries are refreshed before expiry and recreated after it."""
+    now = [1000.0]
+    monkeypatch.setattr(prompt_cache_module.time, "monotonic", lambda: now[0])
+    caches = InMemoryCachesAPI()
+    cache = PromptCache(ttl=100, min_tokens=1)
+    cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    now[0] += 90  # Within the last 20% of the TTL
+    name = cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    assert caches.calls["update"] == 1 and cache.stats()["refreshes"] == 1
+    now[0] += 50  # Extended, so still valid
+    assert cache.lookup(caches, "m", LONG_PROMPT) == name
+    now[0] += 500  # Lapsed
+    assert cache.lookup(caches, "m", LONG_PROMPT) is None
+    await settle()
+    assert caches.calls["create"] == 2
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_backs_off_after_failures_and_invalidates():
+    """Failed creates back off, and invalidated entries are recreated."""
+    caches = InMemoryCachesAPI()
+    caches.fail = True
+    cache = PromptCache(min_tokens=1)
+    cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    assert caches.calls["create"] == 1  # No retry during the backoff
+    assert cache.stats()["failures"] == 1
+
+    caches = InMemoryCachesAPI()
+    cache = PromptCache(min_tokens=1)
+    cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    name = cache.lookup(caches, "m", LONG_PROMPT)
+    cache.invalidate(name)
+    assert cache.lookup(caches, "m", LONG_PROMPT) is None
+    await settle()
+    assert caches.calls["create"] == 2
+
+
+@pytest.mark.asyncio
+async def test_prompt_cache_close_deletes_created_caches():
+    """Closing the cache deletes the provider caches it created."""
+    caches = InMemoryCachesAPI()
+    cache = PromptCache(min_tokens=1)
+    cache.lookup(caches, "m", LONG_PROMPT)
+    await settle()
+    assert len(caches.caches) == 1
+    await cache.close(caches)
+    assert caches.caches == {}
+    assert cache.stats()["caches"] == 0
@@ -0,0 +1,106 @@
+import pytest
+
+from app.llm import semantic_cache
+from app.llm.semantic_cache import (
+    SemanticCache,
+    cacheable_question,
+    content_tokens,
+    depends_on_history,
+    embed,
+    semantic_namespace,
+)
+
+HISTORY = [{"role": "user", "content": "explain quicksort"}, {"role": "model", "content": "Quicksort picks a pivot..."}]
+
+
+def cosine(a, b):
+    """Return the cosine similarity of the embeddings of `a` and `b`."""
+    a, b = embed(a), embed(b)
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+
+def index_kinds():
+    """Return the index kinds to test: sparse, plus numpy when it is installed."""
+    kinds = [False]
+    if semantic_cache._NUMPY:
+        kinds.append(True)
+    return kinds
+
+
+def test_content_tokens_drop_question_framing():
+    """Question framing words are dropped from the content tokens."""
+    assert content_tokens("Can you please explain Dijkstra's algorithm?") == ["dijkstra", "algorithm"]
+    assert content_tokens("what is it") == []
+
+
+def test_embedding_matches_rephrasings_but_not_neighbouring_topics():
+    """Rephrasings embed close together; neighbouring topics do not."""
+    assert cosine("explain binary search", "What is binary search?") == pytest.approx(1.0)
+    assert cosine("how does dijkstra's algorithm work", "explain dijkstra algorithm") == pytest.approx(1.0)
+    assert cosine("what is binary search", "what is a binary search tree") < 0.9
+    assert cosine("time complexity of merge sort", "space complexity of merge sort") < 0.9
+    assert cosine("what is a stack", "what is a queue") < 0.5
+    assert embed("what is it") == {}
+
+
+def test_depends_on_history():
+    """Follow-ups and very short queries depend on the history."""
+    assert not depends_on_history("why is it faster?", [])
+    assert depends_on_history("why is it faster?", HISTORY)
+    assert depends_on_history("what about heaps", HISTORY)
+    assert depends_on_history("recursion?", HISTORY)  # Too short to stand alone
+    assert not depends_on_history("explain binary search trees", HISTORY)
+
+
+def test_cacheable_question(monkeypatch):
+    """Long, code-bearing and follow-up questions are not cacheable."""
+    assert cacheable_question("explain binary search", HISTORY)
+    assert not cacheable_question("and this one?", HISTORY)
+    assert not cacheable_question("fix my code ```x = 1```", [])
+    assert not cacheable_question("explain " + "binary search " * 40, [])
+    monkeypatch.setattr(semantic_cache.settings, "SEMANTIC_CACHE_ENABLED", False)
+    assert not cacheable_question("explain binary search", [])
+
+
+@pytest.mark.parametrize("use_numpy", index_kinds())
+def test_lookup_hits_near_duplicates_within_a_namespace(use_numpy):
+    """Near-duplicate questions hit only within their own namespace."""
+    cache = SemanticCache(threshold=0.9, max_entries=4, use_numpy=use_numpy)
+    tutor = semantic_namespace("model", "tutor prompt")
+    cache.store(tutor, "explain binary search", "Binary search halves the range.")
+    cache.store(tutor, "what is a heap", "A heap is a tree-shaped priority queue.")
+
+    assert cache.lookup(tutor, "what is binary search?") == "Binary search halves the range."
+    assert cache.lookup(tutor, "tell me about heaps") is None  # "heaps" != "heap"; below the threshold
+    assert cache.lookup(tutor, "explain binary search trees") is None
+    assert cache.lookup(semantic_namespace("model", "other prompt"), "explain binary search") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+@pytest.mark.parametrize("use_numpy", index_kinds())
+def test_store_replaces_equivalent_question_and_evicts_least_recently_used(use_numpy):
+    """Storing an equivalent question replaces it; the LRU entry is evicted."""
+    cache = SemanticCache(max_entries=2, use_numpy=use_numpy)
+    cache.store("ns", "explain recursion", "old answer")
+    cache.store("ns", "what is recursion?", "new answer")  # Same question; replaces the entry
+    assert cache.stats()["entries"] == 1
+    assert cache.lookup("ns", "explain recursion") == "new answer"
+
+    cache.store("ns", "explain dynamic programming", "dp")
+    cache.lookup("ns", "explain recursion")  # Recursion is now the most recently used
+    cache.store("ns", "explain backtracking", "backtracking")
+    assert cache.lookup("ns", "explain dynamic programming") is None
+    assert cache.lookup("ns", "explain recursion") == "new answer"
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 2
+
+
+@pytest.mark.parametrize("use_numpy", index_kinds())
+def test_expired_entries_are_not_served(use_numpy, monkeypatch):
+    """Expired answers are not served."""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(ttl=60, max_entries=2, use_numpy=use_numpy)
+    cache.store("ns", "explain tries", "A trie is a prefix tree.")
+    now[0] += 61
+    assert cache.lookup("ns", "explain tries") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 0
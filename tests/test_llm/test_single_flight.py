@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app.llm.single_flight import StreamFanout, single_flight_key
+
+
+class Upstream:
+    """Fake token stream released chunk by chunk by the test."""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = 0
+        self.cancelled = False
+        self.gate = asyncio.Queue()
+
+    async def __call__(self):
+        """Yield each chunk once the test releases it, failing at `fail_after` if set."""
+        self.calls += 1
+        try:
+            for i, chunk in enumerate(self.chunks):
+                await self.gate.get()
+                if self.fail_after is not None and i == self.fail_after:
+                    raise RuntimeError("upstream failed")
+                yield chunk
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    def release(self, n=1):
+        """Let the stream yield `n` more chunks."""
+        for _ in range(n):
+            self.gate.put_nowait(None)
+
+
+async def collect(stream):
+    """Return every chunk of `stream`."""
+    return [chunk async for chunk in stream]
+
+
+async def settle():
+    """Let pending tasks run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_single_flight_key():
+    """The key changes with any input that changes the answer."""
+    history = [{"role": "user", "content": "hi"}]
+    key = single_flight_key("m", "sys", history, "q")
+    assert key == single_flight_key("m", "sys", [{"role": "user", "content": "hi"}], "q")
+    assert key != single_flight_key("m", "sys", [], "q")
+    assert key != single_flight_key("m", "other", history, "q")
+    assert single_flight_key("m", "sys", None, "q") == single_flight_key("m", "sys", [], "q")
+
+
+@pytest.mark.asyncio
+async def test_identical_streams_share_one_upstream_and_late_joiners_replay():
+    """Identical streams share one upstream; late joiners replay earlier chunks."""
+    fanout = StreamFanout()
+    upstream = Upstream(["a", "b", "c"])
+    first = asyncio.create_task(collect(fanout.stream("k", upstream)))
+    await settle()
+    upstream.release()
+    await settle()
+    late = asyncio.create_task(collect(fanout.stream("k", upstream)))  # Joins after "a" was produced
+    await settle()
+    upstream.release(2)
+    assert await first == ["a", "b", "c"]
+    assert await late == ["a", "b", "c"]
+    assert upstream.calls == 1
+    assert fanout.stats() == {"in_flight": 0, "started": 1, "joined": 1, "abandoned": 0}
+
+    # Finished streams are not joinable
+    upstream.release(3)
+    assert await collect(fanout.stream("k", upstream)) == ["a", "b", "c"]
+    assert upstream.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_first_subscriber_disconnecting_does_not_stop_the_others():
+    """One subscriber leaving does not stop the others."""
+    fanout = StreamFanout()
+    upstream = Upstream(["a", "b", "c"])
+    first = fanout.stream("k", upstream)
+    second = asyncio.create_task(collect(fanout.stream("k", upstream)))
+    upstream.release()
+    assert await first.__anext__() == "a"
+    await first.aclose()  # The client that started the generation goes away
+    upstream.release(2)
+    assert await second == ["a", "b", "c"]
+    assert not upstream.cancelled
+    assert fanout.stats()["abandoned"] == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_is_cancelled_when_every_subscriber_leaves():
+    """The upstream is cancelled once every subscriber has left."""
+    fanout = StreamFanout()
+    upstream = Upstream(["a", "b"])
+    tasks = [asyncio.create_task(collect(fanout.stream("k", upstream))) for _ in range(2)]
+    await settle()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await settle()
+    assert upstream.cancelled
+    assert fanout.stats()["abandoned"] == 1 and fanout.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_reach_every_subscriber():
+    """An upstream error is raised in every subscriber."""
+    fanout = StreamFanout()
+    upstream = Upstream(["a", "b"], fail_after=1)
+    results = [asyncio.create_task(collect(fanout.stream("k", upstream))) for _ in range(2)]
+    upstream.release(2)
+    for result in await asyncio.gather(*results, return_exceptions=True):
+        assert isinstance(result, RuntimeError)
+    assert fanout.stats()["in_flight"] == 0
@@ -0,0 +1,64 @@
+import pytest
+
+from app.core.cache import LRUCache
+from app.llm import solution_cache
+from app.llm.solution_cache import (
+    PROMPT_VERSION,
+    canonical_language,
+    get_solution,
+    replay_chunks,
+    solution_key,
+    store_solution,
+)
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """Replace the solution cache with an in-memory one."""
+    monkeypatch.setattr(solution_cache, "_solution_cache", LRUCache("solutions"))
+
+
+def test_canonical_language():
+    """Language aliases map to one canonical name."""
+    assert canonical_language("Python3") == "python"
+    assert canonical_language("  in C++ please ") == "cpp"
+    assert canonical_language("golang.") == "go"
+    assert canonical_language("JS") == "javascript"
+    assert canonical_language("c#") == "csharp"
+    assert canonical_language("klingon") is None
+    assert canonical_language("") is None
+
+
+def test_solution_key():
+    """The key depends on slug, language, visualization and prompt version."""
+    assert solution_key("two-sum", "Python", False) == f"two-sum:python:0:{PROMPT_VERSION}"
+    assert solution_key("two-sum", "py", False) == solution_key("two-sum", "python3", False)
+    assert solution_key("two-sum", "python", True) != solution_key("two-sum", "python", False)
+    # Unknown languages and problems without a slug are never shared
+    assert solution_key("two-sum", "klingon", False) is None
+    assert solution_key(None, "python", False) is None
+
+
+@pytest.mark.asyncio
+async def test_store_and_get_solution(monkeypatch):
+    """A stored solution is returned for the same key only."""
+    key = solution_key("two-sum", "java", True)
+    assert await get_solution(key) is None
+    await store_solution(key, "answer", {"visualizationType": "array"})
+    assert await get_solution(key) == {"text": "answer", "visualization": {"visualizationType": "array"}}
+    await store_solution(None, "ignored")
+    await store_solution(solution_key("two-sum", "go", False), "")  # Empty answers aren't cached
+    assert await get_solution(solution_key("two-sum", "go", False)) is None
+
+    monkeypatch.setattr(solution_cache.settings, "SOLUTION_CACHE_ENABLED", False)
+    assert await get_solution(key) is None
+
+
+def test_replay_chunks_reassemble_and_prefer_line_breaks():
+    """Replay chunks reassemble the answer and split at line breaks."""
+    text = "\n".join(f"line {i} " + "x" * 30 for i in range(40))
+    chunks = list(replay_chunks(text, size=100))
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(chunk.endswith("\n") for chunk in chunks[:-1])
+    assert list(replay_chunks("")) == []
@@ -8,3 +8,51 @@ def test_read_health():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "OK"}
+
+
+def test_search_problems():
+    """The search endpoint ranks fuzzy title matches."""
+    from unittest.mock import AsyncMock, patch
+
+    from app.scrapers.leetcode_scraper import ProblemCatalog
+    catalog = ProblemCatalog([
+        {"stat": {"frontend_question_id": 1, "question__title": "Two Sum", "question__title_slug": "two-sum"}},
+        {"stat": {"frontend_question_id": 3, "question__title": "Longest Substring Without Repeating Characters",
+                  "question__title_slug": "longest-substring-without-repeating-characters"}},
+    ])
+    with patch("app.scrapers.leetcode_scraper.get_problem_catalog", new_callable=AsyncMock, return_value=catalog):
+        response = client.get("/problems/search", params={"q": "two summ"})
+        assert response.status_code == 200
+        assert response.json()["results"][0] == {"id": "1", "title": "Two Sum", "slug": "two-sum", "score": 0.7083}
+
+        response = client.get("/problems/search", params={"q": "3"})
+        assert response.json()["results"][0]["slug"] == "longest-substring-without-repeating-characters"
+
+
+def test_search_problems_unavailable():
+    """The search endpoint returns 503 without a problems list and 422 without a query."""
+    from unittest.mock import AsyncMock, patch
+    with patch("app.scrapers.leetcode_scraper.get_problem_catalog", new_callable=AsyncMock, return_value=None):
+        assert client.get("/problems/search", params={"q": "two sum"}).status_code == 503
+    assert client.get("/problems/search").status_code == 422
+
+
+def test_import_is_lazy_and_within_startup_budget():
+    """Cold-start guard: importing app.main must not load the Gemini/Supabase SDKs and must stay fast.
+
+    The budget (seconds, best of 3 fresh interpreters) can be raised for slow CI machines with
+    STARTUP_IMPORT_BUDGET.
+    """
+    import importlib.util
+    import os
+
+    spec = importlib.util.spec_from_file_location(
+        "bench_startup", os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "bench_startup.py")
+    )
+    bench_startup = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bench_startup)
+
+    runs = [bench_startup.import_app() for _ in range(3)]
+    assert all(not eager for _, eager, _ in runs), f"SDKs imported at boot: {runs[0][1]}"
+    budget = float(os.getenv("STARTUP_IMPORT_BUDGET", "1.0"))
+    assert min(elapsed for elapsed, _, _ in runs) < budget
@@ -1,5 +1,9 @@
+import asyncio
+
 import pytest
-from app.memory.chat_memory import ChatSession, ChatMemory
+
+from app.memory.chat_memory import ChatMemory, ChatSession
+
 
 def test_chat_session_initialization():
     session_id = "test_session_1"
@@ -70,4 +74,116 @@ def test_chat_memory_get_session():
     assert session2.session_id == session_id_2
     assert session1 is not session2
 
-    assert len(memory.sessions) == 2
\ No newline at end of file
+    assert len(memory.store.sessions) == 2
+def test_chat_memory_evicts_least_recently_used_sessions():
+    """Sessions beyond max_sessions are evicted least recently used first."""
+    memory = ChatMemory(max_sessions=2)
+    memory.get_session("a")
+    memory.get_session("b")
+    memory.get_session("a")  # "b" is now least recently used
+    memory.get_session("c")
+    assert list(memory.store.sessions) == ["a", "c"]
+    assert memory.stats()["evictions"]["max_sessions"] == 1
+
+def test_chat_memory_enforces_byte_budget():
+    """Sessions are evicted to stay within max_bytes."""
+    memory = ChatMemory(max_bytes=2000)
+    memory.get_session("a").set_state("scraped_question", {"content": "x" * 1500})
+    assert memory.store.total_bytes > 1500
+    memory.get_session("b").add_message("user", "y" * 600)
+    # Limits are enforced on the next fetch, never against the session being returned
+    memory.get_session("b")
+    assert list(memory.store.sessions) == ["b"]
+    assert memory.stats()["evictions"]["max_bytes"] == 1
+    assert memory.store.total_bytes == memory.store.sessions["b"].nbytes
+
+def test_chat_session_tracks_size_as_history_rolls_over():
+    """The session size follows its history as old messages roll off."""
+    session = ChatSession("s", max_history_length=2)
+    session.add_message("user", "a" * 100)
+    session.add_message("bot", "b" * 10)
+    full = session.nbytes
+    session.add_message("user", "c" * 10)  # Rolls the 100-char message out of history
+    assert [msg["content"] for msg in session.evicted] == ["a" * 100]
+    assert session.nbytes == full + session.history[-1].nbytes  # Still counted while it waits
+    assert session.take_evicted()[0]["content"] == "a" * 100
+    assert session.nbytes == full - 90
+    session.set_state("scraped_question", {"content": "z" * 50})
+    session.set_state("scraped_question", None)
+    assert session.nbytes == full - 90
+
+
+def test_chat_session_evicted_is_bounded_and_restorable():
+    """Evicted messages are bounded and can be restored."""
+    import app.memory.chat_memory as chat_memory_module
+    session = ChatSession("s", max_history_length=1)
+    for i in range(chat_memory_module.MAX_EVICTED_MESSAGES + 5):
+        session.add_message("user", f"m{i}")
+    assert len(session.evicted) == chat_memory_module.MAX_EVICTED_MESSAGES
+    assert session.evicted[0]["content"] == "m4"  # Oldest dropped first
+    taken = session.take_evicted()
+    size = session.nbytes
+    session.add_message("user", "newer")  # Evicts the last history message
+    session.restore_evicted(taken[-3:])
+    assert [msg["content"] for msg in session.evicted][:3] == [msg["content"] for msg in taken[-3:]]
+    # The rolled-out message stays counted while it waits; restored ones are counted again
+    assert len(session.evicted) == 4
+    assert session.nbytes == size + session.history[0].nbytes + sum(msg.nbytes for msg in taken[-3:])
+
+def test_chat_memory_ttl_expiry_and_sweep(monkeypatch):
+    """Idle sessions expire and are removed by the sweep."""
+    import app.memory.chat_memory as chat_memory_module
+    now = [1000.0]
+    monkeypatch.setattr(chat_memory_module.time, "monotonic", lambda: now[0])
+    memory = ChatMemory(ttl=60)
+    old = memory.get_session("old")
+    old.set_state("awaiting_language", True)
+    now[0] += 30
+    memory.get_session("recent")
+    now[0] += 45  # "old" idle for 75s, "recent" for 45s
+    assert memory.sweep() == 1
+    assert list(memory.store.sessions) == ["recent"]
+
+    now[0] += 61
+    fresh = memory.get_session("recent")
+    assert fresh.get_state("awaiting_language") is None
+    assert memory.stats()["evictions"]["expired"] == 2
+
+@pytest.mark.asyncio
+async def test_chat_memory_sweeper_task():
+    """The background sweeper removes expired sessions."""
+    memory = ChatMemory(ttl=0.01, sweep_interval=0.01)
+    memory.get_session("a")
+    memory.start_sweeper()
+    await asyncio.sleep(0.1)
+    await memory.stop_sweeper()
+    assert len(memory.store.sessions) == 0
+
+def test_message_record_is_compact_and_dict_compatible():
+    """Message records have no __dict__, read like dicts and compress long answers."""
+    from app.memory.chat_memory import COMPRESS_MIN_CHARS, Message, Role
+    short = Message("user", "Hello")
+    assert short.role is Role.USER
+    assert short["role"] == "user" and short["content"] == "Hello"
+    assert short.get("missing", "x") == "x"
+    assert short == {"role": "user", "content": "Hello"}
+    assert not hasattr(short, "__dict__")
+
+    answer = "def solve(nums):\n    return sorted(nums)\n" * (COMPRESS_MIN_CHARS // 20)
+    long_bot = Message("bot", answer)
+    assert long_bot._packed is not None and long_bot._text is None
+    assert long_bot.content == answer
+    assert long_bot.nbytes < len(answer)
+    # User messages are never compressed
+    assert Message("user", answer)._packed is None
+
+def test_get_history_is_a_snapshot_of_shared_records():
+    """get_history returns a snapshot that later turns don't change."""
+    session = ChatSession("s", max_history_length=5)
+    session.add_message("user", "1")
+    session.add_message("bot", "2")
+    history = session.get_history()
+    session.add_message("user", "3")
+    assert [m["content"] for m in history] == ["1", "2"]
+    assert history[0] is session.history[0]
+    assert session.get_history(context_window_size=1) == [{"role": "user", "content": "3"}]
@@ -0,0 +1,86 @@
+from app.memory.chat_memory import ChatSession, Message
+from app.memory.context_window import build_context, estimate_tokens, split_context
+
+
+def test_estimate_tokens():
+    """Punctuation and long words count as extra tokens."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("two sum") == 2
+    assert estimate_tokens("nums[i] + x") == 6
+    assert estimate_tokens("characters") == 3  # Long words cost several tokens
+    assert Message("user", "two sum").tokens == 2
+
+
+def make_history():
+    """Return a history with one old, long answer followed by short turns."""
+    session = ChatSession("s", max_history_length=20)
+    session.add_message("user", "Explain two sum")
+    session.add_message("bot", "An old, very long explanation. " * 200)
+    session.add_message("user", "And three sum?")
+    session.add_message("bot", "Sort, then use two pointers.")
+    session.add_message("user", "Thanks")
+    return session.get_history()
+
+
+def test_build_context_keeps_everything_within_budget():
+    """A history within the budget is kept unchanged."""
+    history = make_history()[2:]
+    assert build_context(history, budget_tokens=1000) == history
+    assert build_context(history, budget_tokens=1000)[0] is history[0]
+
+
+def test_build_context_elides_old_long_answers():
+    """Old long answers are elided to fit the budget."""
+    history = make_history()
+    context = build_context(history, budget_tokens=1000, keep_recent=2, elide_over_tokens=100)
+    assert len(context) == 5
+    elided = context[1]["content"]
+    assert "omitted" in elided
+    assert estimate_tokens(elided) < 150
+    assert elided.startswith("An old, very long explanation.")
+    assert sum(estimate_tokens(m["content"]) for m in context) <= 1000
+
+
+def test_build_context_skips_what_does_not_fit():
+    """Messages that don't fit are skipped; the newest is always kept."""
+    history = make_history()
+    # Room for the last three short messages and the first question; the long answer can't be squeezed below 32 tokens
+    recent = sum(estimate_tokens(m["content"]) for m in history[2:])
+    context = build_context(history, budget_tokens=recent + 10, elide_over_tokens=100)
+    assert context == [history[0]] + history[2:]
+
+    assert build_context(history, budget_tokens=0) == []
+
+
+def test_build_context_elides_answers_larger_than_the_budget():
+    """Answers larger than the whole budget are elided to fit it."""
+    from app.llm.prompts import VISUALIZATION_PROMPT
+    session = ChatSession("s", max_history_length=20)
+    session.add_message("user", "Visualize it")
+    session.add_message("bot", VISUALIZATION_PROMPT)  # ~6.7k estimated tokens of JSON-heavy text
+    history = session.get_history()
+    assert estimate_tokens(VISUALIZATION_PROMPT) > 3000
+
+    context = build_context(history, budget_tokens=3000)
+    assert [m["role"] for m in context] == ["user", "bot"]
+    assert "omitted" in context[1]["content"]
+    assert sum(estimate_tokens(m["content"]) for m in context) <= 3000
+
+    # The newest message is kept even when it alone exceeds the budget
+    newest = build_context(history[1:], budget_tokens=100)
+    assert len(newest) == 1 and estimate_tokens(newest[0]["content"]) <= 100
+
+
+def test_split_context_reports_excluded_messages_for_the_summary():
+    """split_context returns the messages it left out, which the session can evict."""
+    session = ChatSession("s", max_history_length=20)
+    for i in range(6):
+        session.add_message("user", f"question number {i} " * 10)
+    history = session.get_history()
+    context, excluded = split_context(history, budget_tokens=100)
+    assert excluded and excluded + context == history
+    assert all(message is original for message, original in zip(excluded, history))
+
+    session.evict(excluded)
+    assert session.get_history() == context
+    assert list(session.evicted) == excluded
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from app.memory.chat_memory import ChatMemory, ChatSession
+from app.memory.session_store import (
+    InMemorySessionStore,
+    SQLiteSessionStore,
+    build_session_store,
+    deserialize_session,
+    serialize_session,
+)
+
+
+def make_session():
+    """Build a session with history and a large scraped question."""
+    session = ChatSession("s1", max_history_length=3)
+    session.add_message("user", "Two Sum please")
+    session.add_message("bot", "Which language?")
+    session.set_state("awaiting_language", True)
+    session.set_state("scraped_question", {"title": "Two Sum", "content": "Given an array... " * 50})
+    session.set_state("request_visualization", None)
+    return session
+
+
+def test_serialization_round_trip_and_compression():
+    """Sessions survive serialization and large ones are compressed."""
+    session = make_session()
+    blob = serialize_session(session)
+    assert blob[:1] == b"z"  # Large scraped question -> compressed
+    assert len(blob) < len(session.get_state("scraped_question")["content"])
+
+    restored = deserialize_session("s1", blob)
+    assert restored.get_history() == session.get_history()
+    assert restored.history.maxlen == 3
+    assert restored.get_state("scraped_question") == session.get_state("scraped_question")
+    assert restored.get_state("awaiting_language") is True
+    assert restored.nbytes > 0
+
+    small = ChatSession("s2")
+    small.add_message("user", "hi")
+    assert serialize_session(small)[:1] == b"j"
+    assert deserialize_session("s2", serialize_session(small)).get_history() == [{"role": "user", "content": "hi"}]
+
+
+def test_sqlite_store_shared_between_workers(tmp_path):
+    """Two SQLite stores on one file share sessions."""
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = ChatMemory(store=SQLiteSessionStore(path))
+    worker_b = ChatMemory(store=SQLiteSessionStore(path))
+
+    session = worker_a.get_session("s1")
+    session.add_message("user", "Two Sum")
+    session.set_state("awaiting_language", True)
+    worker_a.save_session(session)
+
+    # The next turn lands on the other worker
+    other = worker_b.get_session("s1")
+    assert other.get_state("awaiting_language") is True
+    assert other.get_history() == [{"role": "user", "content": "Two Sum"}]
+    assert worker_b.stats()["backend"] == "sqlite"
+
+
+def test_sqlite_store_ttl_and_sweep(tmp_path, monkeypatch):
+    """Idle sessions in the SQLite store expire and are swept."""
+    import app.memory.session_store as session_store_module
+    now = [1000.0]
+    monkeypatch.setattr(session_store_module.time, "time", lambda: now[0])
+    store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), max_sessions=2, ttl=60)
+    for session_id in ("a", "b", "c"):
+        store.put(ChatSession(session_id))
+        now[0] += 10
+    assert store.sweep() == 1  # Over max_sessions: oldest ("a") goes
+    assert store.get("a") is None
+
+    now[0] += 45  # "b" idle 65s, "c" 55s
+    assert store.get("b") is None
+    assert store.get("c") is not None
+    now[0] += 10
+    assert store.sweep() == 1
+    assert len(store) == 0
+    assert store.stats()["evictions"] == {"expired": 2, "max_sessions": 1}
+
+
+def test_build_session_store(tmp_path):
+    """The configured backend is built."""
+    assert isinstance(build_session_store("memory", max_sessions=5), InMemorySessionStore)
+    store = build_session_store("sqlite", path=str(tmp_path / "s.sqlite3"))
+    assert isinstance(store, SQLiteSessionStore)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_store_io_runs_off_the_event_loop(tmp_path):
+    """Async access to a shared store runs in the executor."""
+    memory = ChatMemory(store=SQLiteSessionStore(str(tmp_path / "sessions.sqlite3")))
+    loop_thread = threading.get_ident()
+    io_threads = []
+    store_get, store_put = memory.store.get, memory.store.put
+
+    def recording(method):
+        def wrapper(*args):
+            io_threads.append(threading.get_ident())
+            return method(*args)
+        return wrapper
+
+    memory.store.get, memory.store.put = recording(store_get), recording(store_put)
+    session = await memory.aget_session("s1")
+    session.add_message("user", "hi")
+    await memory.asave_session(session)
+    assert (await memory.aget_session("s1")).get_history() == [{"role": "user", "content": "hi"}]
+    assert io_threads and loop_thread not in io_threads
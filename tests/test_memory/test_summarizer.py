@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.memory.chat_memory import ChatMemory, ChatSession
+from app.memory.session_store import SQLiteSessionStore, deserialize_session, serialize_session
+from app.memory.summarizer import SUMMARY_STATE_KEY, RollingSummarizer, summary_message
+
+
+def make_session(turns: int) -> ChatSession:
+    """Build a session of `turns` question/answer pairs that keeps only the last two messages."""
+    session = ChatSession("s", max_history_length=2)
+    for i in range(turns):
+        session.add_message("user", f"question {i}")
+        session.add_message("bot", f"answer {i}")
+    return session
+
+
+@pytest.mark.asyncio
+async def test_summarizer_folds_evicted_messages_into_state():
+    """Evicted messages are folded into the session summary."""
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append((previous, [msg["content"] for msg in messages]))
+        return f"{previous}+{len(messages)}".lstrip("+")
+
+    saved = []
+
+    async def update_stored(session_id, apply):
+        saved.append(session_id)
+        apply(session)  # In-process store: the stored session is this object
+
+    summarizer = RollingSummarizer(summarize, min_messages=2)
+    session = make_session(2)  # question 0 / answer 0 rolled out
+    assert summarizer.schedule(session, update_stored)
+    await summarizer.stop()
+    assert calls == [("", ["question 0", "answer 0"])]
+    assert session.get_state(SUMMARY_STATE_KEY) == "2"
+    assert not session.evicted
+    assert saved == ["s"]
+
+    session.add_message("user", "question 2")
+    session.add_message("bot", "answer 2")
+    summarizer.schedule(session)
+    await summarizer.stop()
+    assert calls[-1] == ("2", ["question 1", "answer 1"])
+    assert summary_message(session) == {
+        "role": "user", "content": "[Summary of the earlier conversation]\n2+2",
+    }
+    assert summarizer.stats()["runs"] == 2
+
+
+@pytest.mark.asyncio
+async def test_summarizer_skips_small_batches_and_duplicate_runs():
+    """Small batches and overlapping runs are skipped."""
+    release = asyncio.Event()
+
+    async def summarize(previous, messages):
+        await release.wait()
+        return "summary"
+
+    summarizer = RollingSummarizer(summarize, min_messages=2)
+    session = ChatSession("s", max_history_length=2)
+    session.add_message("user", "a")
+    session.add_message("bot", "b")
+    session.add_message("user", "c")
+    assert not summarizer.schedule(session)  # Only one message evicted so far
+    assert summary_message(session) is None
+
+    session.add_message("bot", "d")
+    assert summarizer.schedule(session)
+    session.add_message("user", "e")
+    session.add_message("bot", "f")
+    assert not summarizer.schedule(session)  # Still running for this session
+    release.set()
+    await summarizer.stop()
+    assert summarizer.stats() == {"runs": 1, "failures": 0, "skipped": 1, "in_flight": 0}
+    # Messages evicted during the run wait for the next one
+    assert [msg["content"] for msg in session.evicted] == ["c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_summarizer_restores_messages_on_failure():
+    """Evicted messages are restored when summarizing fails."""
+    async def summarize(previous, messages):
+        raise RuntimeError("quota")
+
+    summarizer = RollingSummarizer(summarize, min_messages=1)
+    session = make_session(2)
+    size = session.nbytes
+    summarizer.schedule(session)
+    await summarizer.stop()
+    assert [msg["content"] for msg in session.evicted] == ["question 0", "answer 0"]
+    assert session.nbytes == size
+    assert session.get_state(SUMMARY_STATE_KEY) is None
+    assert summarizer.stats()["failures"] == 1
+
+
+def test_pending_evictions_survive_serialization():
+    """Messages awaiting a summary survive serialization."""
+    session = make_session(2)
+    session.set_state(SUMMARY_STATE_KEY, "earlier")
+    restored = deserialize_session("s", serialize_session(session))
+    assert [msg["content"] for msg in restored.evicted] == ["question 0", "answer 0"]
+    assert restored.get_state(SUMMARY_STATE_KEY) == "earlier"
+    assert restored.nbytes == session.nbytes
+
+
+@pytest.mark.asyncio
+async def test_summary_does_not_overwrite_turns_stored_meanwhile(tmp_path):
+    """Writing the summary keeps turns stored while it ran."""
+    release = asyncio.Event()
+
+    async def summarize(previous, messages):
+        await release.wait()
+        return "summary of " + ", ".join(msg["content"] for msg in messages)
+
+    memory = ChatMemory(store=SQLiteSessionStore(str(tmp_path / "sessions.sqlite3")))
+    session = make_session(2)  # question 0 / answer 0 rolled out
+    await memory.asave_session(session)
+    summarizer = RollingSummarizer(summarize, min_messages=2)
+    assert summarizer.schedule(session, memory.aupdate_session)
+
+    # The next turn lands (here or on another worker) while the summary is still being written
+    newer = await memory.aget_session("s")
+    newer.add_message("user", "question 2")
+    await memory.asave_session(newer)
+    release.set()
+    await summarizer.stop()
+
+    stored = await memory.aget_session("s")
+    assert stored.get_state(SUMMARY_STATE_KEY) == "summary of question 0, answer 0"
+    assert [msg["content"] for msg in stored.get_history()] == ["answer 1", "question 2"]
+    assert [msg["content"] for msg in stored.evicted] == ["question 1"]  # Folded ones are gone, newer ones wait
@@ -0,0 +1,123 @@
+import ast
+import json
+import os
+import random
+import time
+
+from app.scrapers import example_parser
+from app.scrapers.example_parser import (
+    extract_examples_from_content,
+    parse_input_data,
+    parse_output_data,
+    parse_value,
+)
+from app.scrapers.html_to_text import html_to_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "question_html")
+
+
+def test_parse_input_data_multiple_variables():
+    """Several assignments are parsed into separate variables."""
+    parsed = parse_input_data('nums = [2,7,11,15], target = 9, s = "a, b = c", flag = true')
+    assert parsed["variables"] == {"nums": [2, 7, 11, 15], "target": 9, "s": "a, b = c", "flag": True}
+
+
+def test_parse_input_data_nested_and_plain_text():
+    """Nested lists parse; plain text is kept as a string."""
+    parsed = parse_input_data("grid = [['1','0'],['0','1']], mode = fast lane, k = -2")
+    assert parsed["variables"] == {"grid": [["1", "0"], ["0", "1"]], "mode": "fast lane", "k": -2}
+
+
+def test_parse_output_data_values():
+    """Outputs parse to Python values."""
+    assert parse_output_data("[null,1.5,-3]")["value"] == [None, 1.5, -3]
+    assert parse_output_data('"bab"')["value"] == "bab"
+    assert parse_output_data("[1,2]\n* trailing note")["value"] == [1, 2]
+    assert parse_output_data("two nodes")["value"] == "two nodes"
+
+
+def test_parse_value_tuples_and_dicts_follow_literal_eval():
+    """Tuples and dicts parse as ast.literal_eval would."""
+    assert parse_value("(1)") == (1, True)
+    assert parse_value("(1,)") == ((1,), True)
+    assert parse_value("[(1, 2), ()]") == ([(1, 2), ()], True)
+    assert parse_value('{"a": 1, "b": [1, {}]}') == ({"a": 1, "b": [1, {}]}, True)
+    assert parse_input_data("d = {'x': 1}, k = 2")["variables"] == {"d": {"x": 1}, "k": 2}
+    for bad in ("{1:}", "{1, 2}", "{[1]: 2}", "[1: 2]", "{1: 2: 3}"):
+        assert parse_value(bad) == (bad, False)
+
+
+def test_parse_value_rejects_oversized_and_deep_values(monkeypatch):
+    """Oversized or deeply nested values are not parsed."""
+    monkeypatch.setattr(example_parser, "MAX_VALUE_CHARS", 50)
+    big = "[" + ",".join("1" for _ in range(100)) + "]"
+    assert parse_value(big) == (big, False)
+    deep = "[" * 40 + "]" * 40
+    assert parse_value(deep) == (deep, False)
+
+
+def test_parse_input_data_large_array_is_linear():
+    """A large array is parsed quickly, or kept raw above MAX_VALUE_CHARS."""
+    values = list(range(200000))
+    text = f"nums = {json.dumps(values)}, k = 3"
+    start = time.perf_counter()
+    parsed = parse_input_data(text)
+    assert time.perf_counter() - start < 5
+    # Above MAX_VALUE_CHARS the value stays raw instead of being parsed
+    assert isinstance(parsed["variables"]["nums"], str)
+    assert parsed["variables"]["k"] == 3
+
+
+def test_extract_examples_stops_at_constraints():
+    """Example extraction stops at the constraints section."""
+    content = (
+        "Example 1:\nInput: s = \"abc\"\nOutput: 3\nExplanation: All distinct.\n"
+        "Example 2:\nInput\n[\"MinStack\",\"push\"]\n[[],[1]]\nOutput\n[null,null]\n"
+        "Constraints:\n1 <= s.length <= 10^4"
+    )
+    examples = extract_examples_from_content(content)
+    assert [e["example_number"] for e in examples] == [1, 2]
+    assert examples[0]["explanation"] == "All distinct."
+    assert examples[0]["input"]["variables"] == {"s": "abc"}
+    assert examples[1]["output"]["value"] == [None, None]
+    assert "Constraints" not in examples[1]["raw_content"]
+
+
+def test_extract_examples_from_corpus():
+    """Examples are extracted from real problem statements."""
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+            examples = extract_examples_from_content(html_to_text(f.read()))
+        assert examples, name
+        for example in examples:
+            assert example["output"] is not None, name
+
+
+def test_parse_value_fuzz_matches_literal_eval():
+    """Random literals parse as ast.literal_eval would."""
+    rng = random.Random(7)
+
+    def make(depth=0):
+        kind = rng.randrange(6 if depth < 4 else 3)
+        if kind == 0:
+            return rng.randint(-10**6, 10**6)
+        if kind == 1:
+            return round(rng.uniform(-100, 100), 3)
+        if kind == 2:
+            return "".join(rng.choice("abc xyz,=[]") for _ in range(rng.randrange(6)))
+        if kind == 3:
+            return [make(depth + 1) for _ in range(rng.randrange(4))]
+        if kind == 4:
+            return tuple(make(depth + 1) for _ in range(rng.randrange(4)))
+        return {rng.randint(0, 9): make(depth + 1) for _ in range(rng.randrange(4))}
+
+    for _ in range(2000):
+        value = make()
+        text = repr(value)
+        parsed, ok = parse_value(text)
+        assert ok, text
+        assert parsed == ast.literal_eval(text)
+        # Truncated input must fail cleanly rather than raise
+        cut = text[: rng.randrange(len(text) + 1)]
+        parse_value(cut)
+        parse_input_data(f"x = {cut}, y = 1")
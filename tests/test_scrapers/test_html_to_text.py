@@ -0,0 +1,59 @@
+import os
+import re
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.scrapers.html_to_text import html_to_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "question_html")
+
+
+def reference_html_to_text(html_content):
+    """Clean HTML with the previous BeautifulSoup-based pipeline."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    for br in soup.find_all("br"):
+        br.replace_with("\n")
+    for p in soup.find_all("p"):
+        p.append("\n\n")
+    for li in soup.find_all("li"):
+        li.insert(0, "* ")
+        li.append("\n")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    clean_content = soup.get_text(separator=" ").strip()
+    clean_content = re.sub(r'\s*\n\s*', '\n', clean_content).strip()
+    return re.sub(r'[ \t]{2,}', ' ', clean_content)
+
+
+def test_html_to_text_basic_layout():
+    """Blocks, list items and line breaks become newlines."""
+    html = "<p>Intro <code>nums</code>.</p><ul><li>one</li><li>two<br>lines</li></ul><script>x()</script>"
+    assert html_to_text(html) == "Intro nums .\n* one\n* two\nlines"
+
+
+def test_html_to_text_decodes_entities():
+    """HTML entities are decoded."""
+    assert html_to_text("<p>1 &lt;= n &amp;&amp; s = &quot;ab&quot;</p>") == '1 <= n && s = "ab"'
+
+
+@pytest.mark.parametrize("name", sorted(f for f in os.listdir(CORPUS_DIR) if f.endswith(".html")))
+def test_html_to_text_matches_reference_on_corpus(name):
+    """Output matches the previous pipeline on real problem statements."""
+    with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+        html = f.read()
+    assert html_to_text(html) == reference_html_to_text(html)
+
+
+@pytest.mark.parametrize("html", [
+    "<p>unclosed paragraph",
+    "<ol><li>a<ul><li>b</li></ul></li><li>c</li></ol>",
+    "<pre><strong>Input:</strong>x = 1\n<strong>Output:</strong>2</pre>",
+    "text<br/>more<br>end",
+    "<style>p {}</style><p>\tspaced \t out\t</p>",
+    "x<!--c-->y",
+    "<p>a<!-- note --><code>b</code></p>",
+])
+def test_html_to_text_matches_reference_on_edge_cases(html):
+    """Output matches the previous pipeline on edge cases."""
+    assert html_to_text(html) == reference_html_to_text(html)
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from app.scrapers import http_client
+
+
+@pytest.mark.asyncio
+async def test_shared_client_lifecycle():
+    """The shared client is created once and closed on shutdown."""
+    await http_client.start_http_client()
+    client = http_client.get_http_client()
+    assert http_client.get_http_client() is client  # Same pooled client for every caller
+
+    await http_client.close_http_client()
+    assert client.is_closed
+    assert http_client._client is None
+
+
+@pytest.mark.asyncio
+async def test_host_slot_caps_concurrency_per_host(monkeypatch):
+    """host_slot caps concurrent requests to one host."""
+    monkeypatch.setattr(http_client.settings, "SCRAPER_HTTP_PER_HOST_LIMIT", 2)
+    monkeypatch.setattr(http_client, "_host_semaphores", {})
+    active = 0
+    peak = 0
+
+    async def fake_request():
+        nonlocal active, peak
+        async with http_client.host_slot("https://leetcode.com/graphql"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(fake_request() for _ in range(6)))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_uses_configured_limits(monkeypatch):
+    """The connection pool uses the configured limits."""
+    monkeypatch.setattr(http_client.settings, "SCRAPER_HTTP_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(http_client.settings, "SCRAPER_HTTP_MAX_KEEPALIVE", 3)
+    client = http_client._build_client()
+    pool = client._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    await client.aclose()
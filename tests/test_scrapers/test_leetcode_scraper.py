@@ -1,27 +1,30 @@
-import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+
 import httpx
+import pytest
 from bs4 import BeautifulSoup
+
 from app.scrapers.leetcode_scraper import (
+    LEETCODE_ALL_PROBLEMS_URL,
+    LEETCODE_GRAPHQL_URL,
+    ProblemCatalog,
     _fetch_all_problems,
-    normalize_text,
-    get_title_slug,
-    fetch_leetcode_question,
-    scrape_leetcode_question,
+    _problems_cache,  # Import the global cache
     extract_examples_from_content,
+    fetch_leetcode_question,
+    get_title_slug,
+    normalize_text,
     parse_input_data,
     parse_output_data,
-    LEETCODE_ALL_PROBLEMS_URL,
-    LEETCODE_GRAPHQL_URL,
-    _problems_cache # Import the global cache
+    scrape_leetcode_question,
 )
 
-# Fixture to mock httpx.AsyncClient and reset global cache
+
+# Fixture to mock the shared scraper HTTP client and reset global cache
 @pytest.fixture(autouse=True)
 def mock_httpx_client():
-    with patch('httpx.AsyncClient') as MockAsyncClient:
-        mock_client_instance = AsyncMock()
-        MockAsyncClient.return_value.__aenter__.return_value = mock_client_instance
+    mock_client_instance = AsyncMock()
+    with patch('app.scrapers.leetcode_scraper.get_http_client', return_value=mock_client_instance):
         
         # Reset the global cache before each test
         global _problems_cache
@@ -32,6 +35,18 @@ def mock_httpx_client():
         
         _problems_cache = original_problems_cache
 
+# Isolate the question detail cache so tests never share cached results or touch disk
+@pytest.fixture(autouse=True)
+def isolated_question_cache(monkeypatch):
+    """Replace the question cache with an empty in-memory one."""
+    from app.core.cache import LRUCache
+    from app.scrapers import leetcode_scraper
+    cache = LRUCache("questions")
+    monkeypatch.setattr(leetcode_scraper, "_question_cache", cache)
+    monkeypatch.setattr(leetcode_scraper, "_inflight_questions", {})
+    monkeypatch.setattr(leetcode_scraper, "_corpus", False)
+    return cache
+
 # Test _fetch_all_problems
 @pytest.mark.asyncio
 async def test_fetch_all_problems_success(mock_httpx_client):
@@ -39,7 +54,11 @@ async def test_fetch_all_problems_success(mock_httpx_client):
     mock_response.json.return_value = {
         "stat_status_pairs": [
             {"stat": {"frontend_question_id": 1, "question__title": "Two Sum", "question__title_slug": "two-sum"}},
-            {"stat": {"frontend_question_id": 2, "question__title": "Add Two Numbers", "question__title_slug": "add-two-numbers"}},
+            {"stat": {
+                "frontend_question_id": 2,
+                "question__title": "Add Two Numbers",
+                "question__title_slug": "add-two-numbers",
+            }},
         ]
     }
     mock_httpx_client.get.return_value = mock_response
@@ -306,7 +325,10 @@ def test_extract_examples_from_content_no_examples():
 def test_parse_input_data():
     assert parse_input_data("nums = [2,7,11,15], target = 9") == {"raw": "nums = [2,7,11,15], target = 9", "variables": {"nums": [2, 7, 11, 15], "target": 9}}
     assert parse_input_data("s = \"hello\"") == {"raw": "s = \"hello\"", "variables": {"s": "hello"}}
-    assert parse_input_data("grid = [['1','1','1'],['0','1','0']]") == {"raw": "grid = [['1','1','1'],['0','1','0']]", "variables": {"grid": [['1'], ['1'], ['1'], ['0'], ['1'], ['0']]}}
+    assert parse_input_data("grid = [['1','1','1'],['0','1','0']]") == {
+        "raw": "grid = [['1','1','1'],['0','1','0']]",
+        "variables": {"grid": [['1', '1', '1'], ['0', '1', '0']]},
+    }
     assert parse_input_data("num = -123") == {"raw": "num = -123", "variables": {"num": -123}}
     assert parse_input_data("val = 3.14") == {"raw": "val = 3.14", "variables": {"val": 3.14}}
     assert parse_input_data("single_var = value_text") == {"raw": "single_var = value_text", "variables": {"single_var": "value_text"}}
@@ -320,3 +342,254 @@ def test_parse_output_data():
     assert parse_output_data("true") == {"raw": "true", "value": True}
     assert parse_output_data("false") == {"raw": "false", "value": False}
     assert parse_output_data("some text output") == {"raw": "some text output", "value": "some text output"}
+
+# Test ProblemCatalog
+def _catalog_problems():
+    return [
+        {"stat": {"frontend_question_id": 1, "question__title": "Two Sum", "question__title_slug": "two-sum"}},
+        {"stat": {
+            "frontend_question_id": 167,
+            "question__title": "Two Sum II - Input Array Is Sorted",
+            "question__title_slug": "two-sum-ii-input-array-is-sorted",
+        }},
+        {"stat": {
+            "frontend_question_id": 3,
+            "question__title": "Longest Substring Without Repeating Characters",
+            "question__title_slug": "longest-substring-without-repeating-characters",
+        }},
+        {"stat": {"frontend_question_id": 4, "question__title": "Déjà Problem", "question__title_slug": None}},
+    ]
+
+def test_problem_catalog_indexes():
+    """The catalog indexes problems by id, slug and title."""
+    catalog = ProblemCatalog(_catalog_problems())
+    assert len(catalog) == 3
+    assert catalog.lookup_number("1") == ("two-sum", False)
+    assert catalog.lookup_number("1", "two sum") == ("two-sum", True)
+    assert catalog.lookup_number("999") is None
+    assert catalog.lookup_title("two sum") == "two-sum"
+
+def test_problem_catalog_prefers_longest_contained_title():
+    """The longest title contained in a query wins."""
+    catalog = ProblemCatalog(_catalog_problems())
+    assert catalog.find_contained_title("please solve two sum for me") == ("two-sum", "two sum")
+    assert catalog.find_contained_title(
+        "help with longest substring without repeating characters in python"
+    ) == ("longest-substring-without-repeating-characters", "longest substring without repeating characters")
+    assert catalog.find_contained_title("nothing relevant here") is None
+
+@pytest.mark.asyncio
+async def test_get_title_slug_uses_catalog_for_contained_title():
+    """A title inside a longer query is resolved from the catalog."""
+    with patch('app.scrapers.leetcode_scraper._fetch_all_problems', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = _catalog_problems()
+        assert await get_title_slug("can you solve two sum please") == "two-sum"
+        assert await get_title_slug("167. Two Sum II") == "two-sum-ii-input-array-is-sorted"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("identifier", [
+    "how do I solve Two Sum?", "solve two sum?", "what is two sum, explain", "two sum,please",
+])
+async def test_get_title_slug_ignores_punctuation_around_contained_title(identifier):
+    """Punctuation next to a title inside a longer query doesn't stop the match."""
+    with patch('app.scrapers.leetcode_scraper._fetch_all_problems', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = _catalog_problems()
+        assert await get_title_slug(identifier) == "two-sum"
+
+def test_problem_catalog_contained_title_drops_punctuation_on_both_sides():
+    """Titles with punctuation match queries written with or without it."""
+    catalog = ProblemCatalog(_catalog_problems())
+    assert catalog.find_contained_title("help with two sum ii - input array is sorted!") == (
+        "two-sum-ii-input-array-is-sorted", "two sum ii input array is sorted"
+    )
+    assert catalog.find_contained_title("two sum ii input array is sorted") == (
+        "two-sum-ii-input-array-is-sorted", "two sum ii input array is sorted"
+    )
+
+# Test problems snapshot persistence and failure backoff
+@pytest.fixture
+def fresh_problems_state(monkeypatch):
+    """Reset the problems list state and snapshot path."""
+    from app.scrapers import leetcode_scraper
+    monkeypatch.setattr(leetcode_scraper, "_problems_cache", None)
+    monkeypatch.setattr(leetcode_scraper, "_problems_fetched_at", 0.0)
+    monkeypatch.setattr(leetcode_scraper, "_problems_failures", 0)
+    monkeypatch.setattr(leetcode_scraper, "_problems_next_retry_at", 0.0)
+    monkeypatch.setattr(leetcode_scraper, "_problems_refresh_task", None)
+    monkeypatch.setattr(leetcode_scraper, "_snapshot_path", None)
+    return leetcode_scraper
+
+@pytest.mark.asyncio
+async def test_problems_snapshot_round_trip(fresh_problems_state, tmp_path):
+    """The problems list is saved to and loaded from the snapshot."""
+    scraper = fresh_problems_state
+    path = str(tmp_path / "problems.json.gz")
+    assert scraper.load_problems_snapshot(path) is False
+
+    with patch.object(scraper, "_download_problems", new_callable=AsyncMock) as mock_download:
+        mock_download.return_value = _catalog_problems()
+        await scraper._fetch_all_problems()
+
+    scraper._problems_cache = None
+    assert scraper.load_problems_snapshot(path) is True
+    slugs = [p["stat"]["question__title_slug"] for p in scraper._problems_cache]
+    assert slugs == ["two-sum", "two-sum-ii-input-array-is-sorted", "longest-substring-without-repeating-characters"]
+
+@pytest.mark.asyncio
+async def test_failed_problems_fetch_backs_off_then_retries(fresh_problems_state):
+    """A failed download backs off before retrying."""
+    scraper = fresh_problems_state
+    with patch.object(scraper, "_download_problems", new_callable=AsyncMock) as mock_download:
+        mock_download.return_value = None
+        assert await scraper._fetch_all_problems() is None
+        assert await scraper._fetch_all_problems() is None  # Within backoff window: no new request
+        assert mock_download.await_count == 1
+
+        scraper._problems_next_retry_at = 0.0  # Backoff elapsed
+        mock_download.return_value = _catalog_problems()
+        assert len(await scraper._fetch_all_problems()) == 4
+        assert scraper._problems_failures == 0
+
+@pytest.mark.asyncio
+async def test_concurrent_problems_fetches_share_one_download(fresh_problems_state):
+    """Concurrent fetches of the problems list share one download."""
+    import asyncio
+    scraper = fresh_problems_state
+    release = asyncio.Event()
+
+    async def slow_download():
+        await release.wait()
+        return download_result
+
+    with patch.object(scraper, "_download_problems", side_effect=slow_download) as mock_download:
+        download_result = None
+        waiters = [asyncio.create_task(scraper._fetch_all_problems()) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == [None] * 5
+        assert mock_download.call_count == 1
+        assert await scraper._fetch_all_problems() is None  # Waiters behind the failure honour the backoff
+        assert mock_download.call_count == 1
+
+        scraper._problems_next_retry_at = 0.0
+        release.clear()
+        download_result = _catalog_problems()
+        waiters = [asyncio.create_task(scraper._fetch_all_problems()) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+    assert mock_download.call_count == 2
+    assert all(len(r) == 4 for r in results)
+
+@pytest.mark.asyncio
+async def test_stale_problems_served_while_refreshing(fresh_problems_state):
+    """A stale list is served while a refresh runs."""
+    scraper = fresh_problems_state
+    scraper._problems_cache = _catalog_problems()[:1]
+    scraper._problems_fetched_at = 1.0  # Long stale
+    with patch.object(scraper, "_download_problems", new_callable=AsyncMock) as mock_download:
+        mock_download.return_value = _catalog_problems()
+        problems = await scraper._fetch_all_problems()
+        assert len(problems) == 1  # Stale data returned immediately
+        await scraper._problems_refresh_task
+    assert len(scraper._problems_cache) == 4
+
+# Test question detail cache
+@pytest.mark.asyncio
+async def test_get_question_details_caches_result(isolated_question_cache):
+    """Question details are cached after the first fetch."""
+    from app.scrapers.leetcode_scraper import get_question_details
+    details = {"id": "1", "title": "Two Sum"}
+    with patch('app.scrapers.leetcode_scraper.fetch_leetcode_question', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = details
+        assert await get_question_details("two-sum") == details
+        assert await get_question_details("two-sum") == details
+    mock_fetch.assert_awaited_once_with("two-sum")
+    assert isolated_question_cache.get("two-sum") == details
+
+@pytest.mark.asyncio
+async def test_get_question_details_deduplicates_concurrent_fetches():
+    """Concurrent requests for one question share a fetch."""
+    import asyncio
+
+    from app.scrapers.leetcode_scraper import get_question_details
+    release = asyncio.Event()
+
+    async def slow_fetch(slug):
+        await release.wait()
+        return {"id": "1", "slug": slug}
+
+    with patch('app.scrapers.leetcode_scraper.fetch_leetcode_question', side_effect=slow_fetch) as mock_fetch:
+        waiters = [asyncio.create_task(get_question_details("two-sum")) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+    assert mock_fetch.call_count == 1
+    assert all(r == {"id": "1", "slug": "two-sum"} for r in results)
+
+@pytest.mark.asyncio
+async def test_get_question_details_does_not_cache_failures(isolated_question_cache):
+    """Failed fetches are not cached."""
+    from app.scrapers.leetcode_scraper import get_question_details
+    with patch('app.scrapers.leetcode_scraper.fetch_leetcode_question', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = None
+        assert await get_question_details("missing") is None
+        assert await get_question_details("missing") is None
+    assert mock_fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_question_details_falls_back_to_corpus(isolated_question_cache, monkeypatch, tmp_path):
+    """The corpus is served when upstream fails."""
+    from app.scrapers import leetcode_scraper
+    from app.scrapers.question_corpus import QuestionCorpus, build_corpus
+    path = str(tmp_path / "questions.corpus")
+    build_corpus([("two-sum", {"id": "1", "title": "Two Sum"})], path)
+    monkeypatch.setattr(leetcode_scraper, "_corpus", QuestionCorpus.open(path))
+    with patch('app.scrapers.leetcode_scraper.fetch_leetcode_question', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = None
+        assert await leetcode_scraper.get_question_details("two-sum") == {"id": "1", "title": "Two Sum"}
+        assert await leetcode_scraper.get_question_details("three-sum") is None
+
+        monkeypatch.setattr(leetcode_scraper.settings, "QUESTION_CORPUS_MODE", "offline")
+        mock_fetch.reset_mock()
+        assert await leetcode_scraper.get_question_details("two-sum") == {"id": "1", "title": "Two Sum"}
+        mock_fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_get_title_slug_fuzzy_title():
+    """Misspelled titles are resolved by fuzzy matching."""
+    from app.scrapers.leetcode_scraper import ProblemCatalog, get_title_slug
+    catalog = ProblemCatalog([
+        {"stat": {"frontend_question_id": 1, "question__title": "Two Sum", "question__title_slug": "two-sum"}},
+        {"stat": {
+            "frontend_question_id": 206,
+            "question__title": "Reverse Linked List",
+            "question__title_slug": "reverse-linked-list",
+        }},
+    ])
+    with patch('app.scrapers.leetcode_scraper._get_catalog', new_callable=AsyncMock, return_value=catalog):
+        assert await get_title_slug("two summ") == "two-sum"
+        assert await get_title_slug("revers linkd list") == "reverse-linked-list"
+        assert await get_title_slug("what is dynamic programming") is None
+
+
+@pytest.mark.asyncio
+async def test_get_title_slug_fuzzy_title_rejects_topic_questions():
+    """Topic questions are not fuzzily matched to a title."""
+    from app.scrapers.leetcode_scraper import ProblemCatalog, get_title_slug
+    titles = ["Binary Tree Inorder Traversal", "Binary Tree Postorder Traversal", "Implement Queue using Stacks",
+              "Sort an Array", "Number of Islands"]
+    catalog = ProblemCatalog([
+        {"stat": {"frontend_question_id": i, "question__title": title,
+                  "question__title_slug": title.lower().replace(" ", "-")}}
+        for i, title in enumerate(titles, 1)
+    ])
+    with patch('app.scrapers.leetcode_scraper._get_catalog', new_callable=AsyncMock, return_value=catalog):
+        assert await get_title_slug("binary tree traversal") is None
+        assert await get_title_slug("implement a queue") is None
+        assert await get_title_slug("sorting an array") is None
+        assert await get_title_slug("implement queue using stack") == "implement-queue-using-stacks"
+        assert await get_title_slug("binary tree inorder travesal") == "binary-tree-inorder-traversal"
+
@@ -0,0 +1,42 @@
+from app.scrapers.question_corpus import QuestionCorpus, build_corpus
+
+
+def test_build_and_read_corpus(tmp_path):
+    """A built corpus returns the stored questions."""
+    path = str(tmp_path / "questions.corpus")
+    records = [
+        ("two-sum", {"id": "1", "title": "Two Sum", "content": "Find two numbers ✓"}),
+        ("add-two-numbers", {"id": "2", "title": "Add Two Numbers", "examples": [{"output": {"value": [7, 0, 8]}}]}),
+        ("two-sum", {"id": "dup"}),
+    ]
+    assert build_corpus(records, path) == 2
+
+    corpus = QuestionCorpus.open(path)
+    assert len(corpus) == 2
+    assert "two-sum" in corpus
+    assert corpus.get("two-sum") == records[0][1]
+    assert corpus.get("add-two-numbers")["examples"][0]["output"]["value"] == [7, 0, 8]
+    assert corpus.get("missing") is None
+    assert corpus.stats() == {"questions": 2, "hits": 2, "misses": 1}
+    corpus.close()
+
+
+def test_open_missing_or_mismatched_corpus(tmp_path):
+    """A missing or mismatched corpus opens as None."""
+    path = str(tmp_path / "questions.corpus")
+    assert QuestionCorpus.open(path) is None
+
+    build_corpus([("two-sum", {"id": "1"})], path)
+    with open(path, "ab") as f:
+        f.write(b"garbage")
+    assert QuestionCorpus.open(path) is None
+
+
+def test_empty_corpus(tmp_path):
+    """An empty corpus opens and returns nothing."""
+    path = str(tmp_path / "questions.corpus")
+    assert build_corpus([], path) == 0
+    corpus = QuestionCorpus.open(path)
+    assert len(corpus) == 0
+    assert corpus.get("two-sum") is None
+    corpus.close()
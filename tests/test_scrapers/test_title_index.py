@@ -0,0 +1,53 @@
+from app.scrapers.title_index import TrigramTitleIndex, covers_title
+
+TITLES = [
+    "two sum",
+    "two sum ii - input array is sorted",
+    "add two numbers",
+    "longest substring without repeating characters",
+    "longest palindromic substring",
+    "reverse linked list",
+    "merge intervals",
+    "number of islands",
+]
+
+
+def make_index():
+    """Build a title index over a few problems."""
+    return TrigramTitleIndex([(title.replace(" ", "-"), title) for title in TITLES])
+
+
+def test_search_tolerates_typos_and_partial_titles():
+    """Search finds titles despite typos and missing words."""
+    index = make_index()
+    assert index.search("two summ", limit=1)[0][0] == "two-sum"
+    assert index.search("longest substring without repeating", limit=1)[0][0] == (
+        "longest-substring-without-repeating-characters"
+    )
+    assert index.search("revers linkd list", limit=1)[0][0] == "reverse-linked-list"
+
+
+def test_search_ranks_and_limits():
+    """Results are ranked by score and capped at the limit."""
+    results = make_index().search("two sum", limit=2)
+    assert [key for key, _ in results] == ["two-sum", "two-sum-ii---input-array-is-sorted"]
+    assert results[0][1] == 1.0
+    assert results[0][1] > results[1][1]
+
+
+def test_search_filters_unrelated_queries():
+    """Unrelated queries return nothing."""
+    index = make_index()
+    assert index.search("explain how recursion works in python") == []
+    assert index.search("") == []
+    assert len(TrigramTitleIndex([])) == 0
+
+
+def test_covers_title_allows_typos_but_not_missing_words():
+    """covers_title allows typos but not missing title words."""
+    assert covers_title("revers linkd list", "reverse linked list")
+    assert covers_title(
+        "longest substrng without repeatng characters", "longest substring without repeating characters"
+    )
+    assert not covers_title("binary tree traversal", "binary tree inorder traversal")
+    assert not covers_title("sorting an array", "sort an array")
@@ -0,0 +1,36 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import warm_question_cache
+
+
+@pytest.fixture(autouse=True)
+def no_http_client():
+    """Stop the warm script from opening or closing the shared client."""
+    with patch.object(warm_question_cache, "start_http_client", new_callable=AsyncMock), \
+            patch.object(warm_question_cache, "close_http_client", new_callable=AsyncMock):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_warm_exit_code_reflects_failures():
+    """The exit code is 0 on success and 1 when any question failed."""
+    scraper = warm_question_cache.leetcode_scraper
+    details = {"two-sum": {"id": "1"}, "missing-problem": None}
+    with patch.object(scraper, "is_question_cached", new_callable=AsyncMock, return_value=False), \
+            patch.object(scraper, "get_question_details", new_callable=AsyncMock,
+                         side_effect=lambda slug: details[slug]) as mock_details:
+        assert await warm_question_cache.main(["two-sum", "--rate", "0"]) == 0
+        assert await warm_question_cache.main(["two-sum", "missing-problem", "--rate", "0"]) == 1
+    assert mock_details.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_warm_fails_when_identifiers_or_top_list_cannot_be_resolved():
+    """The exit code is 1 when identifiers or the top list can't be resolved."""
+    scraper = warm_question_cache.leetcode_scraper
+    with patch.object(scraper, "get_title_slug", new_callable=AsyncMock, return_value=None), \
+            patch.object(scraper, "get_problems_list", new_callable=AsyncMock, return_value=None):
+        assert await warm_question_cache.main(["No Such Problem"]) == 1
+        assert await warm_question_cache.main(["--top", "10"]) == 1
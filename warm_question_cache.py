@@ -0,0 +1,127 @@
+"""Prefetch LeetCode question details into the scraper's question cache.
+
+Run before (or right after) a deployment so the first users don't pay the GraphQL latency:
+
+    python warm_question_cache.py two-sum 2 "3. Longest Substring Without Repeating Characters"
+    python warm_question_cache.py --top 200 --concurrency 8 --rate 4
+
+Only the on-disk tier survives this process, so use QUESTION_CACHE_BACKEND=tiered (default) or sqlite.
+"""
+import argparse
+import asyncio
+import re
+import sys
+import time
+from typing import List, Optional
+
+from app.core.config import settings
+from app.scrapers import leetcode_scraper
+from app.scrapers.http_client import close_http_client, start_http_client
+
+SLUG_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+
+
+class RateLimiter:
+    """Spaces request starts at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Sleep until the next request may start."""
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.interval
+
+
+async def top_slugs(count: int) -> List[str]:
+    """Most popular problems by LeetCode's frequency, then submissions."""
+    # The snapshot-loaded list has no popularity fields, so fetch a fresh one
+    problems = await leetcode_scraper.get_problems_list(refresh=True) or []
+
+    def popularity(problem):
+        stat = problem.get("stat", {})
+        return (problem.get("frequency") or 0, stat.get("total_submitted") or 0)
+
+    ranked = sorted(problems, key=popularity, reverse=True)
+    return [p["stat"]["question__title_slug"] for p in ranked if p.get("stat", {}).get("question__title_slug")][:count]
+
+
+async def resolve(identifier: str) -> Optional[str]:
+    """Map an id, title or URL to a slug; plain slugs are used as-is."""
+    identifier = identifier.strip()
+    if SLUG_RE.match(identifier) and not identifier.isdigit():
+        return identifier
+    return await leetcode_scraper.get_title_slug(identifier)
+
+
+async def warm(slugs: List[str], concurrency: int, rate: float) -> int:
+    """Fetch every slug into the cache with bounded concurrency. Returns the number that failed."""
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    failed = 0
+
+    async def warm_one(slug: str):
+        nonlocal failed
+        async with semaphore:
+            if await leetcode_scraper.is_question_cached(slug):
+                print(f"  cached   {slug}")
+                return
+            await limiter.wait()
+            details = await leetcode_scraper.get_question_details(slug)
+            if details:
+                print(f"  fetched  {slug}")
+            else:
+                failed += 1
+                print(f"  FAILED   {slug}")
+
+    await asyncio.gather(*(warm_one(slug) for slug in slugs))
+    return failed
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    """Warm the cache for the given identifiers. Returns the process exit code (1 if anything failed)."""
+    parser = argparse.ArgumentParser(description="Warm the LeetCode question cache.")
+    parser.add_argument("identifiers", nargs="*", help="Slugs, problem numbers, titles or URLs")
+    parser.add_argument("--top", type=int, default=0, help="Also warm the N most popular problems")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Max upstream requests per second (0 = unlimited)")
+    args = parser.parse_args(argv)
+
+    if settings.QUESTION_CACHE_BACKEND == "memory":
+        print("Warning: QUESTION_CACHE_BACKEND=memory; nothing will outlive this process.")
+
+    await start_http_client()
+    try:
+        slugs = []
+        unresolved = 0
+        for identifier in args.identifiers:
+            slug = await resolve(identifier)
+            if slug:
+                slugs.append(slug)
+            else:
+                unresolved += 1
+                print(f"Could not resolve '{identifier}'")
+        if args.top:
+            top = await top_slugs(args.top)
+            if not top:
+                unresolved += 1
+                print("Could not fetch the LeetCode problems list for --top")
+            slugs.extend(top)
+        slugs = list(dict.fromkeys(slugs))  # De-duplicate, keep order
+
+        print(f"Warming {len(slugs)} questions (concurrency={args.concurrency}, rate={args.rate}/s)...")
+        start = time.perf_counter()
+        failed = await warm(slugs, args.concurrency, args.rate)
+        print(f"Done in {time.perf_counter() - start:.1f}s: {len(slugs) - failed} ok, {failed} failed.")
+    finally:
+        await close_http_client()
+    return 1 if failed or unresolved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))